@@ -13,15 +13,100 @@ class Settings(BaseSettings):
     milvus_host: str = "localhost"
     milvus_port: str = "19530"
     milvus_collection: str = "resumes"
+    milvus_connect_on_startup: bool = True
+    milvus_connect_retries: int = 3
+    milvus_connect_backoff_seconds: float = 0.5
+    milvus_flush_policy: str = "interval"
+    milvus_flush_every_rows: int = 10_000
+    milvus_flush_interval_seconds: float = 60.0
+    milvus_search_consistency_level: str = "Session"
+    milvus_scalar_indexes: bool = True
+    milvus_index_profile: str = "hnsw"
+    milvus_index_build_params: dict | None = None
+    milvus_search_params: dict | None = None
+    embedding_storage: str = "float32"
+    embedding_rescore_factor: int = 4
+    vector_backend: str = "milvus"
+    local_vector_store_path: str | None = None
+    local_vector_index: str = "flat"
+    local_hnsw_min_rows: int = 20_000
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = "torch"
+    embedding_onnx_dir: str = "models/onnx"
+    embedding_onnx_quantization: str = "int8"
+    embedding_onnx_threads: int = 0
+    embedding_warmup_on_startup: bool = True
+    embedding_max_loaded_models: int = 1
+    embedding_batching_enabled: bool = True
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5.0
+    embedding_queue_max_depth: int = 1024
     chunk_size: int = 500
     chunk_overlap: int = 50
     text_chunk_max_length: int = 2048
+    chunk_boundary: str = "tokens"
+    query_embedding_cache_size: int = 1024
+    search_result_cache_size: int = 1024
+    search_result_cache_ttl_seconds: float = 300.0
+    skill_extraction_enabled: bool = True
+    skills_taxonomy_path: str | None = None
+    search_mode: str = "vector"
+    lexical_index_enabled: bool = True
+    lexical_index_rebuild_on_startup: bool = True
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    hybrid_rrf_k: int = 60
+    hybrid_candidate_pool: int = 50
+    candidate_search_overfetch: int = 200
+    candidate_aggregation: str = "fusion"
+    candidate_aggregation_top_m: int = 3
+    candidate_fusion_weight: float = 0.7
+    candidate_chunks_per_result: int = 3
+    search_batch_max_queries: int = 500
+    search_batch_queries_per_call: int = 32
+    reranker_model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_batch_size: int = 32
+    reranker_max_length: int = 512
+    rerank_top_k: int = 50
+    rerank_chunks_per_candidate: int = 3
+    search_cursor_cache_size: int = 256
+    search_cursor_ttl_seconds: float = 600.0
+    bulk_insert_batch_rows: int = 1000
+    dedup_cache_path: str | None = None
+    dedup_upsert_by_candidate: bool = False
+    milvus_max_workers: int = 8
+    pdf_max_workers: int = 2
+    pdf_use_processes: bool = True
+    pdf_extractor: str = "auto"
+    pdf_extract_timeout_seconds: float = 60.0
+    pdf_parallel_min_pages: int = 16
+    upload_max_bytes: int = 10 * 1024 * 1024
+    upload_max_concurrency: int = 4
+    ingest_background: bool = False
+    ingest_queue_path: str = ".cache/ingest_queue.sqlite3"
+    ingest_workers: int = 2
+    ingest_max_attempts: int = 3
+    ingest_retry_backoff_seconds: float = 10.0
+    ingest_job_lease_seconds: float = 300.0
+    ingest_poll_interval_seconds: float = 1.0
+    llm_max_concurrency: int = 16
+    llm_call_timeout_seconds: float = 60.0
+    llm_max_attempts: int = 3
+    llm_retry_backoff_seconds: float = 0.5
+    llm_retry_max_backoff_seconds: float = 8.0
+    match_batch_max_candidates: int = 100
+    match_batch_rerank_top_m: int = 0
     openai_api_key: str | None = None
     gemini_api_key: str | None = None
     llm_provider: str = "openai"
     llm_model: str = "gpt-4o-mini"
     gemini_model: str = "gemini-2.0-flash"
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 2048
+    llm_cache_path: str | None = None
+    prompt_profile_token_budget: int = 1500
+    prompt_compression_chunk_size: int = 80
+    prompt_tokenizer: str | None = None
 
 
 settings = Settings()
@@ -1,12 +1,85 @@
-from fastapi import FastAPI, UploadFile
+import json
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from pymilvus import MilvusException
+
+from app.core.config import settings
+from app.services.bulk_ingestion import bulk_ingest, upload_pdf_sources
+from app.services.candidate_search import (
+    CursorExpiredError,
+    iter_top_candidates_batch,
+    search_top_candidates,
+)
+from app.services.concurrency import llm_slot, run_milvus, shutdown_executors, upload_slot
+from app.services.dedup_cache import close_dedup_cache, get_dedup_cache, hash_bytes
+from app.services.embedding_batcher import EmbeddingQueueFullError
+from app.services.embeddings import (
+    is_embedding_model_ready,
+    shutdown_embedding_batcher,
+    start_embedding_warmup,
+)
+from app.services.flush_policy import close_flush_policy, get_flush_policy
+from app.services.ingest_queue import close_ingest_queue, get_ingest_queue, start_ingest_workers
+from app.services.ingestion import find_ingested_document, ingest_chunks
+from app.services.lexical_index import get_lexical_index, start_lexical_index_rebuild
+from app.services.llm_cache import close_llm_cache, get_llm_cache
+from app.services.match_batch import BatchCandidate, iter_match_batch, rank_candidates, ranking
+from app.services.milvus_client import (
+    CONNECTION_ERRORS,
+    close_milvus,
+    get_or_create_collection,
+    is_milvus_ready,
+    is_request_error,
+)
+from app.services.pdf_extraction import (
+    PdfExtractionTimeoutError,
+    extract_pdf_chunks,
+    extract_pdf_text,
+)
+from app.services.reasoning_engine import analyze_match_async, stream_match_analysis
+from app.services.search import SEARCH_MODES, search_candidates
+from app.services.search_cache import search_cache_stats
+from app.services.search_filters import SearchFilters
+from app.services.uploads import UploadTooLargeError, read_upload, upload_filename
+
+logger = logging.getLogger(__name__)
+
 
-from app.services.ingestion import extract_text_from_pdf, ingest_resume
-from app.services.reasoning_engine import analyze_match
-from app.services.search import search_candidates
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Load the shared embedding model off the request path; /health reports when it is ready.
+    if settings.embedding_warmup_on_startup:
+        start_embedding_warmup()
+    # Connect, index-check and load the collection once so requests reuse the cached handle.
+    if settings.milvus_connect_on_startup:
+        try:
+            collection = await run_milvus(get_or_create_collection)
+        except MilvusException:
+            logger.exception("Milvus unavailable at startup; the collection will be opened on first use")
+        else:
+            # Hybrid search needs the BM25 index; searches during the build fall back to vector hits.
+            if settings.lexical_index_enabled and settings.lexical_index_rebuild_on_startup:
+                start_lexical_index_rebuild(collection)
+    # Queued uploads (including ones interrupted by the last shutdown) resume in the workers.
+    start_ingest_workers()
+    yield
+    close_ingest_queue()
+    shutdown_executors()
+    shutdown_embedding_batcher()
+    close_flush_policy()
+    close_dedup_cache()
+    close_llm_cache()
+    close_milvus()
 
-app = FastAPI(title="Ema Talent Orchestration")
+
+app = FastAPI(title="Ema Talent Orchestration", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,54 +93,363 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(EmbeddingQueueFullError)
+async def embedding_queue_full_handler(_: Request, exc: EmbeddingQueueFullError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(CursorExpiredError)
+async def cursor_expired_handler(_: Request, exc: CursorExpiredError) -> JSONResponse:
+    return JSONResponse(status_code=410, content={"detail": str(exc)})
+
+
+@app.exception_handler(PdfExtractionTimeoutError)
+async def pdf_extraction_timeout_handler(_: Request, exc: PdfExtractionTimeoutError) -> JSONResponse:
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+
+@app.exception_handler(MilvusException)
+async def milvus_error_handler(_: Request, exc: MilvusException) -> JSONResponse:
+    if is_request_error(exc):
+        return JSONResponse(status_code=422, content={"detail": exc.message})
+    if isinstance(exc, CONNECTION_ERRORS):
+        return JSONResponse(status_code=503, content={"detail": "Milvus is unavailable."})
+    logger.error("Milvus request failed: %s", exc)
+    return JSONResponse(status_code=500, content={"detail": "Milvus request failed."})
+
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(_: Request, exc: UploadTooLargeError) -> JSONResponse:
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+class CandidateSearchRequest(BaseModel):
+    job_description: Optional[str] = None
+    top_n: int = Field(10, ge=1, le=100)
+    cursor: Optional[str] = None
+    aggregation: Optional[Literal["max", "mean_top_m", "fusion"]] = None
+    filters: Optional[dict] = None
+    search_params: Optional[Dict[str, int]] = None
+    recall: Optional[Literal["fast", "balanced", "high"]] = None
+    rerank: bool = False
+
+
+class CandidateSearchBatchRequest(BaseModel):
+    job_descriptions: List[str] = Field(..., min_length=1)
+    top_n: int = Field(10, ge=1, le=100)
+    aggregation: Optional[Literal["max", "mean_top_m", "fusion"]] = None
+    filters: Optional[dict] = None
+    search_params: Optional[Dict[str, int]] = None
+    recall: Optional[Literal["fast", "balanced", "high"]] = None
+    rerank: bool = False
+    stream: bool = False
+
+
 class MatchRequest(BaseModel):
     candidate_profile: str
     job_description: str
 
 
+class MatchBatchCandidate(BaseModel):
+    candidate_profile: str
+    candidate_id: Optional[str] = None
+
+
+class MatchBatchRequest(BaseModel):
+    job_description: str
+    candidates: List[MatchBatchCandidate]
+    stream: bool = False
+    rerank_top_m: Optional[int] = Field(None, ge=0)
+
+
 @app.get("/health")
-def health_check() -> dict:
-    return {"status": "ok"}
+async def health_check() -> dict:
+    return {
+        "status": "ok",
+        "embedding_model_ready": is_embedding_model_ready(),
+        "milvus_ready": is_milvus_ready(),
+    }
 
 
-@app.post("/ingest")
-async def ingest(file: UploadFile) -> dict:
-    temp_path = f"/tmp/{file.filename}"
-    content = await file.read()
-    with open(temp_path, "wb") as temp_file:
-        temp_file.write(content)
+@app.get("/metrics")
+async def metrics() -> dict:
+    dedup_cache = get_dedup_cache()
+    llm_cache = get_llm_cache()
+    return {
+        "flush": get_flush_policy().metrics(),
+        "dedup": dedup_cache.stats() if dedup_cache else None,
+        "search_cache": search_cache_stats(),
+        "lexical_index": get_lexical_index().stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "ingest_queue": await run_milvus(get_ingest_queue().stats) if settings.ingest_background else None,
+    }
+
 
-    chunks = ingest_resume(temp_path)
+@app.post("/ingest")
+async def ingest(file: UploadFile, background: Optional[bool] = None):
+    filename = upload_filename(file.filename)
+    candidate_name = Path(filename).stem
+    if background and not settings.ingest_background:
+        raise HTTPException(status_code=422, detail="Background ingestion is disabled (INGEST_BACKGROUND=false).")
+    if settings.ingest_background if background is None else background:
+        # Queued uploads are ingested by the worker pool; the response only carries the job ID.
+        async with upload_slot():
+            content = await read_upload(file)
+            job = await run_milvus(get_ingest_queue().enqueue, candidate_name, filename, content)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job.id, "status": job.status, "status_url": f"/ingest/jobs/{job.id}"},
+        )
+    # The PDF is parsed from memory; the slot bounds how many uploads are held at once.
+    async with upload_slot():
+        content = await read_upload(file)
+        file_hash = await run_milvus(hash_bytes, content)
+        # Unchanged re-uploads are answered from the dedup cache without parsing the PDF again.
+        chunks = await run_milvus(find_ingested_document, file_hash)
+        if chunks is not None:
+            return {"chunks": len(chunks)}
+        # Long PDFs are split into page ranges parsed in parallel on the PDF worker pool.
+        text_chunks = await extract_pdf_chunks(content)
+        del content  # drop the PDF bytes before the slower embed/insert step
+    chunks = await run_milvus(ingest_chunks, candidate_name, text_chunks, file_hash=file_hash)
     return {"chunks": len(chunks)}
 
 
+@app.get("/ingest/jobs/{job_id}")
+async def ingest_job(job_id: str) -> dict:
+    job = await run_milvus(get_ingest_queue().get, job_id) if settings.ingest_background else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job {job_id}.")
+    return job.to_dict()
+
+
+@app.post("/ingest/batch")
+async def ingest_batch(files: List[UploadFile]) -> dict:
+    """Bulk-ingest several PDFs (or .zip archives of PDFs) with one flush at the end."""
+
+    sources = upload_pdf_sources(files)
+    report = await run_milvus(bulk_ingest, sources)
+    return report.to_dict()
+
+
 @app.post("/extract-text")
 async def extract_text(file: UploadFile) -> dict:
-    temp_path = f"/tmp/{file.filename}"
-    content = await file.read()
-    with open(temp_path, "wb") as temp_file:
-        temp_file.write(content)
+    async with upload_slot():
+        content = await read_upload(file)
+        text = await extract_pdf_text(content)
+    return {"filename": upload_filename(file.filename), "text": text}
 
-    text = extract_text_from_pdf(temp_path)
-    return {"filename": file.filename, "text": text}
+
+def _parse_filters(payload) -> Optional[SearchFilters]:
+    try:
+        return SearchFilters.from_dict(payload)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid filters: {exc}") from exc
+
+
+def _parse_search_params(value) -> Optional[Dict[str, int]]:
+    if value is None:
+        return None
+    if not isinstance(value, dict) or not all(
+        isinstance(item, int) and not isinstance(item, bool) for item in value.values()
+    ):
+        raise HTTPException(
+            status_code=422, detail='search_params must map a knob to an integer, e.g. {"ef": 256}.'
+        )
+    return value
+
+
+_FLAG_STRINGS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+
+def _parse_flag(value, name: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in _FLAG_STRINGS:
+        return _FLAG_STRINGS[value.strip().lower()]
+    raise HTTPException(status_code=422, detail=f"{name} must be a boolean.")
 
 
 @app.post("/search")
 async def search(payload: dict) -> dict:
     job_description = payload.get("job_description", "")
-    matches = search_candidates(job_description)
+    mode = payload.get("mode") or settings.search_mode
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {list(SEARCH_MODES)}.")
+    filters = _parse_filters(payload.get("filters"))
+    params = _parse_search_params(payload.get("search_params"))
+    rerank = _parse_flag(payload.get("rerank", False), "rerank")
+    try:
+        matches = await run_milvus(
+            search_candidates,
+            job_description,
+            mode=mode,
+            filters=filters,
+            params=params,
+            recall=payload.get("recall"),
+            rerank=rerank,
+        )
+    except ValueError as exc:
+        # Search knobs are validated against the collection's index type.
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
     serialized = [
         {"text": match[0], "score": match[1]} for match in matches
     ]
     return {"results": serialized}
 
 
-@app.post("/api/match")
-async def match(request: MatchRequest) -> dict:
-    """Generate an explainable match analysis between a candidate and a job description."""
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/search/candidates")
+async def search_candidates_grouped(request: CandidateSearchRequest) -> dict:
+    """Return the top-N distinct candidates with their best supporting chunks.
 
-    result = analyze_match(
-        candidate_profile=request.candidate_profile,
-        job_description=request.job_description,
+    Pass the returned ``next_cursor`` (and no job description) to fetch the next page.
+    """
+
+    if request.cursor is None and not request.job_description:
+        raise HTTPException(status_code=422, detail="job_description or cursor is required.")
+    try:
+        return await run_milvus(
+            search_top_candidates,
+            request.job_description,
+            request.top_n,
+            cursor=request.cursor,
+            aggregation=request.aggregation,
+            filters=_parse_filters(request.filters),
+            params=request.search_params,
+            recall=request.recall,
+            rerank=request.rerank,
+        )
+    except ValueError as exc:
+        # Search knobs are validated against the collection's index type.
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.post("/search/batch")
+async def search_candidates_batch(request: CandidateSearchBatchRequest):
+    """Rank candidates for many job descriptions at once.
+
+    Job descriptions are embedded in batches and each batch is one multi-vector Milvus
+    search. The response is ``{ results: [{ index, candidates, total_candidates,
+    next_cursor }] }`` in input order; with ``stream=true`` each query is sent as an NDJSON
+    line as soon as its batch is ranked.
+    """
+
+    if len(request.job_descriptions) > settings.search_batch_max_queries:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.search_batch_max_queries} job descriptions per batch.",
+        )
+    pages = iter_top_candidates_batch(
+        request.job_descriptions,
+        request.top_n,
+        aggregation=request.aggregation,
+        filters=_parse_filters(request.filters),
+        params=request.search_params,
+        recall=request.recall,
+        rerank=request.rerank,
     )
+    try:
+        # The first batch runs before responding, so invalid knobs still map to 422.
+        first = await run_milvus(next, pages, None)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    if request.stream:
+
+        async def lines():
+            item = first
+            try:
+                while item is not None:
+                    index, page = item
+                    yield json.dumps({"index": index, **page}) + "\n"
+                    item = await run_milvus(next, pages, None)
+            except Exception as exc:
+                logger.exception("Streaming batch search failed")
+                yield json.dumps({"error": str(exc)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    rest = await run_milvus(list, pages)
+    return {"results": [{"index": index, **page} for index, page in [first, *rest]]}
+
+
+@app.post("/api/match")
+async def match(request: MatchRequest, stream: bool = False):
+    """Generate an explainable match analysis between a candidate and a job description.
+
+    With ``?stream=true`` the analysis is sent as server-sent events: ``token`` events as
+    the model writes, a ``field`` event per completed top-level field, then ``result``
+    (or ``error``).
+    """
+
+    if stream:
+
+        async def events():
+            async with llm_slot():
+                try:
+                    async for event, data in stream_match_analysis(
+                        candidate_profile=request.candidate_profile,
+                        job_description=request.job_description,
+                    ):
+                        yield _sse(event, data)
+                except Exception as exc:
+                    logger.exception("Streaming match analysis failed")
+                    yield _sse("error", {"detail": str(exc)})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async with llm_slot():
+        result = await analyze_match_async(
+            candidate_profile=request.candidate_profile,
+            job_description=request.job_description,
+        )
     return result
+
+
+@app.post("/api/match/batch")
+async def match_batch(request: MatchBatchRequest):
+    """Score many candidates against one job description concurrently.
+
+    Failed candidates are reported per item instead of failing the batch. With
+    ``rerank_top_m`` only the cross-encoder's top-M candidates are sent to the LLM and the
+    rest are reported as ``skipped``. With ``stream=true`` results are sent as NDJSON lines
+    in completion order.
+    """
+
+    if len(request.candidates) > settings.match_batch_max_candidates:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.match_batch_max_candidates} candidates per batch.",
+        )
+    candidates = [
+        BatchCandidate(item.candidate_profile, item.candidate_id) for item in request.candidates
+    ]
+
+    if request.stream:
+
+        async def lines():
+            async for outcome in iter_match_batch(
+                request.job_description, candidates, rerank_top_m=request.rerank_top_m
+            ):
+                yield json.dumps(outcome.to_dict()) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    outcomes = await rank_candidates(
+        request.job_description, candidates, rerank_top_m=request.rerank_top_m
+    )
+    return {
+        "results": [outcome.to_dict() for outcome in outcomes],
+        "ranking": ranking(outcomes),
+        "succeeded": sum(outcome.ok for outcome in outcomes),
+        "failed": sum(outcome.error is not None for outcome in outcomes),
+        "skipped": sum(outcome.skipped for outcome in outcomes),
+    }
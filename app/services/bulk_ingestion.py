@@ -0,0 +1,291 @@
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from pymilvus import Collection
+
+from app.core.config import settings
+from app.services.concurrency import get_pdf_executor
+from app.services.dedup_cache import DedupCache, get_dedup_cache, hash_bytes, hash_file
+from app.services.flush_policy import get_flush_policy
+from app.services.ingestion import (
+    delete_rows,
+    embed_chunks,
+    insert_chunk_rows,
+    stale_candidate_row_ids,
+)
+from app.services.milvus_client import call_with_reconnect, get_or_create_collection
+from app.services.pdf_extraction import PdfSource, extract_chunks_from_pdf
+from app.services.skill_extraction import extract_profile
+from app.services.uploads import UploadTooLargeError, read_limited, upload_filename
+
+logger = logging.getLogger(__name__)
+
+# A named, lazily-read PDF: the loader is only called when the file is handed to a worker.
+BulkSource = Tuple[str, Callable[[], PdfSource]]
+ProgressCallback = Callable[["BulkIngestReport", str], None]
+
+
+@dataclass
+class BulkIngestFailure:
+    source: str
+    error: str
+
+
+@dataclass
+class BulkIngestReport:
+    files_total: int
+    files_processed: int = 0
+    files_succeeded: int = 0
+    files_skipped: int = 0
+    chunks_inserted: int = 0
+    failures: List[BulkIngestFailure] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "files_total": self.files_total,
+            "files_processed": self.files_processed,
+            "files_succeeded": self.files_succeeded,
+            "files_skipped": self.files_skipped,
+            "chunks_inserted": self.chunks_inserted,
+            "failures": [{"source": item.source, "error": item.error} for item in self.failures],
+        }
+
+
+@dataclass
+class _PendingFile:
+    name: str
+    candidate_name: str
+    file_hash: Optional[str]
+    chunks: List[str]
+
+
+@dataclass
+class _PendingRows:
+    files: List[_PendingFile] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    skills: List[List[str]] = field(default_factory=list)
+    years: List[int] = field(default_factory=list)
+
+
+def discover_pdf_sources(path: str) -> List[BulkSource]:
+    """List PDFs under a directory, inside a ``.zip`` archive, or a single PDF file."""
+
+    root = Path(path)
+    if root.is_dir():
+        return [(str(pdf), _path_loader(str(pdf))) for pdf in sorted(root.rglob("*.pdf"))]
+    if zipfile.is_zipfile(root):
+        return zip_pdf_sources(str(root))
+    return [(str(root), _path_loader(str(root)))]
+
+
+def zip_pdf_sources(archive: Any, max_member_bytes: Optional[int] = None) -> List[BulkSource]:
+    """List PDFs in a zip archive (path or binary file object); members are read on demand.
+
+    Members whose uncompressed size exceeds ``max_member_bytes`` fail instead of being read.
+    """
+
+    zip_file = zipfile.ZipFile(archive)
+    return [
+        (info.filename, _zip_member_loader(zip_file, info, max_member_bytes))
+        for info in zip_file.infolist()
+        if not info.is_dir() and info.filename.lower().endswith(".pdf")
+    ]
+
+
+def upload_pdf_sources(uploads: Sequence[Any]) -> List[BulkSource]:
+    """Turn uploaded files (objects with ``filename`` and ``file``) into sources; zips are expanded."""
+
+    sources: List[BulkSource] = []
+    for upload in uploads:
+        name = upload_filename(upload.filename)
+        if name.lower().endswith(".zip"):
+            sources.extend(zip_pdf_sources(upload.file, max_member_bytes=settings.upload_max_bytes))
+        else:
+            sources.append((name, _stream_loader(upload.file, name)))
+    return sources
+
+
+def _stream_loader(stream: Any, name: str) -> Callable[[], PdfSource]:
+    # Each file is read into memory only when its turn comes, capped at UPLOAD_MAX_BYTES.
+    return lambda: read_limited(stream, name=name)
+
+
+def _path_loader(path: str) -> Callable[[], PdfSource]:
+    return lambda: path
+
+
+def _zip_member_loader(
+    zip_file: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: Optional[int]
+) -> Callable[[], PdfSource]:
+    def load() -> PdfSource:
+        if max_bytes is not None and info.file_size > max_bytes:
+            raise UploadTooLargeError(max_bytes, info.filename)
+        return zip_file.read(info.filename)
+
+    return load
+
+
+def bulk_ingest(
+    sources: Sequence[BulkSource],
+    *,
+    collection: Optional[Collection] = None,
+    model: Optional[Any] = None,
+    executor: Optional[Executor] = None,
+    insert_batch_rows: int = settings.bulk_insert_batch_rows,
+    max_in_flight: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    dedup_cache: Optional[DedupCache] = None,
+) -> BulkIngestReport:
+    """Stream many resumes through extract -> chunk -> embed -> insert with a single final flush.
+
+    Extraction and chunking run page by page on ``executor`` (the shared PDF worker pool by default) with a bounded
+    number of files in flight. Chunks from several files are embedded and inserted together
+    in batches of about ``insert_batch_rows`` rows and flushed once at the end (unless the
+    flush policy is ``never``). A failing file is recorded in the report and the run continues.
+    With a dedup cache configured, files whose content was already ingested are skipped before
+    extraction, so re-running an import over an existing corpus is cheap.
+    """
+
+    shared_collection = collection is None
+    collection = collection or get_or_create_collection()
+    executor = executor or get_pdf_executor()
+    cache = dedup_cache or get_dedup_cache()
+    in_flight_limit = max_in_flight or max(settings.pdf_max_workers, 1) * 2
+
+    report = BulkIngestReport(files_total=len(sources))
+    pending = _PendingRows()
+    in_flight: Deque[Tuple[str, Optional[str], "Future[List[str]]"]] = deque()
+    remaining = iter(sources)
+
+    def submit_next() -> bool:
+        for name, loader in remaining:
+            try:
+                data = loader()
+                file_hash = None
+                if cache is not None:
+                    file_hash = hash_file(data) if isinstance(data, str) else hash_bytes(data)
+                    if cache.get_document(file_hash) is not None:
+                        _record_skip(report, name, progress)
+                        continue
+                in_flight.append((name, file_hash, executor.submit(extract_chunks_from_pdf, data)))
+                return True
+            except Exception as exc:
+                _record_failure(report, name, exc, progress)
+        return False
+
+    for _ in range(in_flight_limit):
+        if not submit_next():
+            break
+
+    while in_flight:
+        name, file_hash, future = in_flight.popleft()
+        submit_next()
+        try:
+            chunks = future.result()
+        except Exception as exc:
+            _record_failure(report, name, exc, progress)
+            continue
+
+        candidate_name = Path(name).stem
+        pending.files.append(_PendingFile(name, candidate_name, file_hash, chunks))
+        pending.texts.extend(chunks)
+        pending.names.extend(candidate_name for _ in chunks)
+        profile = extract_profile("\n".join(chunks))
+        pending.skills.extend(profile.skills for _ in chunks)
+        pending.years.extend(profile.years_experience for _ in chunks)
+        if len(pending.texts) >= insert_batch_rows:
+            _write_batch(collection, shared_collection, model, cache, pending, report, progress)
+            pending = _PendingRows()
+
+    _write_batch(collection, shared_collection, model, cache, pending, report, progress)
+    flush_policy = get_flush_policy()
+    if report.chunks_inserted and flush_policy.policy != "never":
+        flush_policy.flush(get_or_create_collection() if shared_collection else collection)
+    return report
+
+
+def _write_batch(
+    collection: Collection,
+    shared_collection: bool,
+    model: Optional[Any],
+    cache: Optional[DedupCache],
+    pending: _PendingRows,
+    report: BulkIngestReport,
+    progress: Optional[ProgressCallback],
+) -> None:
+    if not pending.files:
+        return
+    try:
+        if pending.texts:
+            embeddings = embed_chunks(pending.texts, model=model, cache=cache)
+
+            def write(collection: Collection) -> None:
+                stale: Dict[str, List[int]] = {}
+                if cache is not None:
+                    for item in pending.files:
+                        ids = stale_candidate_row_ids(collection, cache, item.candidate_name, item.file_hash)
+                        if ids:
+                            stale[item.candidate_name] = ids
+                insert_chunk_rows(
+                    collection,
+                    embeddings,
+                    pending.texts,
+                    pending.names,
+                    pending.skills,
+                    pending.years,
+                    replaced_candidates=list(stale),
+                )
+                delete_rows(collection, [row_id for ids in stale.values() for row_id in ids])
+                get_flush_policy().record_insert(collection, len(pending.texts), allow_flush=False)
+
+            # A Milvus error drops the shared handle; the next batch reconnects.
+            call_with_reconnect(
+                write,
+                get_or_create_collection() if shared_collection else collection,
+                shared=shared_collection,
+                retry=False,
+            )
+    except Exception as exc:
+        for item in pending.files:
+            _record_failure(report, item.name, exc, progress)
+        return
+
+    report.chunks_inserted += len(pending.texts)
+    for item in pending.files:
+        if cache is not None:
+            cache.put_document(
+                item.file_hash,
+                item.candidate_name,
+                item.chunks,
+                replace_candidate=settings.dedup_upsert_by_candidate,
+            )
+        report.files_processed += 1
+        report.files_succeeded += 1
+        if progress:
+            progress(report, item.name)
+
+
+def _record_skip(report: BulkIngestReport, name: str, progress: Optional[ProgressCallback]) -> None:
+    report.files_processed += 1
+    report.files_skipped += 1
+    if progress:
+        progress(report, name)
+
+
+def _record_failure(
+    report: BulkIngestReport,
+    name: str,
+    exc: Exception,
+    progress: Optional[ProgressCallback],
+) -> None:
+    logger.warning("Bulk ingest failed for %s: %s", name, exc)
+    report.files_processed += 1
+    report.failures.append(BulkIngestFailure(source=name, error=str(exc) or type(exc).__name__))
+    if progress:
+        progress(report, name)
@@ -0,0 +1,302 @@
+import base64
+import binascii
+import secrets
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pymilvus import Collection
+
+from app.core.config import settings
+from app.services.caches import TTLCache
+from app.services.milvus_client import call_with_reconnect, get_collection, get_or_create_collection
+from app.services.reranker import rerank_candidates
+from app.services.search import embed_queries, embed_query, search_chunk_hits, start_chunk_search_many
+from app.services.search_cache import collection_version, search_results
+from app.services.search_filters import SearchFilters
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+AGGREGATIONS = ("max", "mean_top_m", "fusion")
+
+
+class CursorExpiredError(LookupError):
+    """The pagination cursor is unknown or its result snapshot has expired."""
+
+
+# Ranked candidate lists keyed by cursor token; later pages are sliced from the snapshot.
+cursor_snapshots = TTLCache(settings.search_cursor_cache_size, settings.search_cursor_ttl_seconds)
+
+
+def aggregate_score(
+    scores: Sequence[float], aggregation: str, top_m: int, fusion_weight: float
+) -> float:
+    """Combine a candidate's chunk similarities (sorted best first) into one score."""
+
+    best = scores[0]
+    if aggregation == "max":
+        return best
+    mean_top = sum(scores[:top_m]) / len(scores[:top_m])
+    if aggregation == "mean_top_m":
+        return mean_top
+    # fusion: the best chunk dominates, the supporting chunks break ties.
+    return fusion_weight * best + (1.0 - fusion_weight) * mean_top
+
+
+def group_hits(
+    hits: Sequence[Dict[str, Any]],
+    *,
+    aggregation: str = settings.candidate_aggregation,
+    top_m: int = settings.candidate_aggregation_top_m,
+    fusion_weight: float = settings.candidate_fusion_weight,
+    chunks_per_candidate: int = settings.candidate_chunks_per_result,
+) -> List[Dict[str, Any]]:
+    """Group chunk hits by ``candidate_name`` and rank candidates by aggregated score."""
+
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"aggregation must be one of {AGGREGATIONS}")
+    top_m = max(top_m, 1)
+
+    grouped: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for hit in sorted(hits, key=lambda item: item["score"], reverse=True):
+        grouped.setdefault(hit["candidate_name"], []).append(hit)
+
+    candidates = []
+    for name, candidate_hits in grouped.items():
+        scores = [hit["score"] for hit in candidate_hits]
+        skills: List[Any] = []
+        for hit in candidate_hits:
+            skills.extend(skill for skill in hit["skills"] if skill not in skills)
+        candidates.append(
+            {
+                "candidate_name": name,
+                "score": aggregate_score(scores, aggregation, top_m, fusion_weight),
+                "chunk_hits": len(candidate_hits),
+                "skills": skills,
+                "chunks": [
+                    {"text": hit["text_chunk"], "score": hit["score"]}
+                    for hit in candidate_hits[:chunks_per_candidate]
+                ],
+            }
+        )
+    # Stable sort keeps best-chunk order for ties.
+    candidates.sort(key=lambda item: item["score"], reverse=True)
+    return candidates
+
+
+def _encode_cursor(token: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{token}:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        token, offset = raw.rsplit(":", 1)
+        position = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise CursorExpiredError("Invalid search cursor.") from exc
+    if position < 0:
+        raise CursorExpiredError("Invalid search cursor.")
+    return token, position
+
+
+def _page(token: str, ranked: List[Dict[str, Any]], offset: int, top_n: int) -> Dict[str, Any]:
+    end = offset + top_n
+    return {
+        "candidates": ranked[offset:end],
+        "total_candidates": len(ranked),
+        "next_cursor": _encode_cursor(token, end) if end < len(ranked) else None,
+    }
+
+
+def search_top_candidates(
+    job_description_text: Optional[str] = None,
+    top_n: int = 10,
+    *,
+    cursor: Optional[str] = None,
+    aggregation: Optional[str] = None,
+    overfetch: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+    params: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+    rerank: bool = False,
+    collection: Optional[Collection] = None,
+    model: Optional["SentenceTransformer"] = None,
+) -> Dict[str, Any]:
+    """Two-stage retrieval: over-fetch chunks, group by candidate, return top-N candidates.
+
+    One Milvus query fetches ``overfetch`` chunks (``CANDIDATE_SEARCH_OVERFETCH``); the
+    ranked candidate list is kept as a snapshot and later pages are served from it via
+    ``cursor`` without querying Milvus again. Pagination therefore covers the candidates
+    present in those chunks. ``filters`` are pushed down into the Milvus expression;
+    ``params``/``recall`` tune the index search knob as in ``search_candidates``. With
+    ``rerank`` the top ``RERANK_TOP_K`` candidates are rescored by the cross-encoder over
+    their best chunks, and pages are served from that reranked list.
+    """
+
+    if top_n <= 0:
+        raise ValueError("top_n must be positive")
+    if cursor is not None:
+        token, offset = _decode_cursor(cursor)
+        ranked = _snapshot(token)
+        if ranked is None:
+            raise CursorExpiredError("Search cursor has expired; run the search again.")
+        return _page(token, ranked, offset, top_n)
+
+    if not job_description_text:
+        raise ValueError("job_description is required without a cursor")
+    aggregation = aggregation or settings.candidate_aggregation
+    limit = max(overfetch or settings.candidate_search_overfetch, top_n)
+    expr = filters.to_expr() if filters else ""
+
+    shared_collection = collection is None
+    collection = collection or get_collection() or get_or_create_collection()
+    query_embedding, fingerprint = embed_query(job_description_text, model=model)
+
+    cache_key = None
+    ranked = None
+    if shared_collection and fingerprint is not None:
+        cache_key = _cache_key(fingerprint, limit, aggregation, expr, params, recall, rerank)
+        ranked = search_results.get(cache_key)
+    if ranked is None:
+        hits = call_with_reconnect(
+            lambda handle: search_chunk_hits(
+                query_embedding, limit, handle, expr=expr, params=params, recall=recall, model=model
+            ),
+            collection,
+            shared=shared_collection,
+        )
+        ranked = _rank(job_description_text, hits, aggregation, rerank, top_n)
+        if cache_key is not None:
+            search_results.put(cache_key, ranked)
+    return _first_page(ranked, top_n)
+
+
+def _cache_key(
+    fingerprint: str,
+    limit: int,
+    aggregation: str,
+    expr: str,
+    params: Optional[Dict[str, Any]],
+    recall: Optional[str],
+    rerank: bool,
+) -> Tuple[Any, ...]:
+    return (
+        settings.milvus_collection,
+        collection_version(),
+        fingerprint,
+        "candidates",
+        limit,
+        aggregation,
+        expr,
+        tuple(sorted((params or {}).items())),
+        recall,
+        rerank,
+    )
+
+
+def _rank(
+    job_description_text: str, hits: Sequence[Dict[str, Any]], aggregation: str, rerank: bool, top_n: int
+) -> List[Dict[str, Any]]:
+    ranked = group_hits(hits, aggregation=aggregation)
+    if rerank:
+        ranked = rerank_candidates(job_description_text, ranked[: max(settings.rerank_top_k, top_n)])
+    return ranked
+
+
+def _snapshot(token: str) -> Optional[List[Dict[str, Any]]]:
+    """The ranking behind a cursor token: ``<token>`` for one search, ``<batch>.<index>`` for
+    a query of a batch (a batch keeps all its rankings under one cache entry)."""
+
+    token, _, index = token.partition(".")
+    snapshot = cursor_snapshots.get(token)
+    if index:
+        return snapshot.get(int(index)) if isinstance(snapshot, dict) and index.isdigit() else None
+    return snapshot if isinstance(snapshot, list) else None
+
+
+def _first_page(ranked: List[Dict[str, Any]], top_n: int) -> Dict[str, Any]:
+    token = secrets.token_urlsafe(12)
+    if len(ranked) > top_n:
+        cursor_snapshots.put(token, ranked)
+    return _page(token, ranked, 0, top_n)
+
+
+def iter_top_candidates_batch(
+    job_descriptions: Sequence[str],
+    top_n: int = 10,
+    *,
+    aggregation: Optional[str] = None,
+    overfetch: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+    params: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+    rerank: bool = False,
+    queries_per_call: Optional[int] = None,
+    collection: Optional[Collection] = None,
+    model: Optional["SentenceTransformer"] = None,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """:func:`search_top_candidates` for many job descriptions; yields ``(index, page)``.
+
+    Queries are taken ``SEARCH_BATCH_QUERIES_PER_CALL`` at a time. Each group is embedded in
+    one encode call and searched with one multi-vector ``collection.search``; queries with a
+    cached ranking skip the search. Pages come in input order and carry their own cursor;
+    the batch's rankings share one cursor snapshot, so a batch larger than
+    ``SEARCH_CURSOR_CACHE_SIZE`` cannot evict its own cursors.
+    """
+
+    if top_n <= 0:
+        raise ValueError("top_n must be positive")
+    if any(not text for text in job_descriptions):
+        raise ValueError("every job_description must be non-empty")
+    aggregation = aggregation or settings.candidate_aggregation
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"aggregation must be one of {AGGREGATIONS}")
+    limit = max(overfetch or settings.candidate_search_overfetch, top_n)
+    expr = filters.to_expr() if filters else ""
+    group_size = max(queries_per_call or settings.search_batch_queries_per_call, 1)
+
+    shared_collection = collection is None
+    batch_token = secrets.token_urlsafe(12)
+    snapshots: Dict[int, List[Dict[str, Any]]] = {}
+    for offset in range(0, len(job_descriptions), group_size):
+        # Resolved per group so the groups after a reconnect use the new handle.
+        group_collection = collection or get_collection() or get_or_create_collection()
+        texts = job_descriptions[offset : offset + group_size]
+        embedded = embed_queries(texts, model=model)
+        keys: List[Optional[Tuple[Any, ...]]] = [
+            _cache_key(fingerprint, limit, aggregation, expr, params, recall, rerank)
+            if shared_collection and fingerprint is not None
+            else None
+            for _, fingerprint in embedded
+        ]
+        ranked: List[Optional[List[Dict[str, Any]]]] = [
+            search_results.get(key) if key is not None else None for key in keys
+        ]
+        missing = [position for position, entry in enumerate(ranked) if entry is None]
+        if missing:
+            vectors = [embedded[position][0] for position in missing]
+            found = call_with_reconnect(
+                lambda handle: start_chunk_search_many(
+                    vectors, limit, handle, expr=expr, params=params, recall=recall, model=model
+                )(),
+                group_collection,
+                shared=shared_collection,
+            )
+            for position, hits in zip(missing, found):
+                ranked[position] = _rank(texts[position], hits, aggregation, rerank, top_n)
+                if keys[position] is not None:
+                    search_results.put(keys[position], ranked[position])
+        for position, entry in enumerate(ranked):
+            index = offset + position
+            if len(entry) > top_n:
+                if not snapshots:
+                    cursor_snapshots.put(batch_token, snapshots)
+                snapshots[index] = entry
+            yield index, _page(f"{batch_token}.{index}", entry, 0, top_n)
+
+
+def search_top_candidates_batch(job_descriptions: Sequence[str], top_n: int = 10, **options: Any) -> List[Dict[str, Any]]:
+    """All pages of :func:`iter_top_candidates_batch`, in input order."""
+
+    return [page for _, page in iter_top_candidates_batch(job_descriptions, top_n, **options)]
@@ -0,0 +1,176 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from app.core.config import settings
+
+CHUNK_BOUNDARIES = ("tokens", "sentence", "section")
+
+SECTION_HEADINGS = frozenset(
+    {
+        "experience",
+        "employment",
+        "skills",
+        "education",
+        "projects",
+        "summary",
+        "profile",
+        "certifications",
+        "publications",
+        "awards",
+    }
+)
+_SENTENCE_ENDINGS = (".", "!", "?")
+# A preferred boundary is only used if it keeps the chunk at least this fraction of chunk_size.
+_MIN_BOUNDARY_FRACTION = 0.5
+# Consumed tokens are dropped from the window once this many have piled up.
+_COMPACT_AFTER = 4096
+
+TextSource = Union[str, Iterable[str]]
+
+
+def _utf8_length(value: str) -> int:
+    return len(value.encode("utf-8"))
+
+
+def _trim_to_max_bytes(value: str, max_bytes: int) -> str:
+    if max_bytes <= 0:
+        return ""
+    encoded = value.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return value
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    # Splitting on "\n" only is safe: it is whitespace, so tokens never straddle a cut.
+    position = 0
+    while True:
+        newline = text.find("\n", position)
+        if newline == -1:
+            yield text[position:]
+            return
+        yield text[position:newline]
+        position = newline + 1
+
+
+def _iter_tokens(source: TextSource) -> Iterator[Tuple[str, bool]]:
+    """Yield ``(token, is_heading)`` pairs from a string or an iterable of page texts."""
+
+    pages = [source] if isinstance(source, str) else source
+    for page in pages:
+        for line in _iter_lines(page):
+            tokens = line.split()
+            if not tokens:
+                continue
+            first = tokens[0]
+            yield first, len(tokens) <= 3 and first.strip(":").lower() in SECTION_HEADINGS
+            for token in tokens[1:]:
+                yield token, False
+
+
+def iter_chunks(
+    source: TextSource,
+    chunk_size: int = settings.chunk_size,
+    overlap: int = settings.chunk_overlap,
+    max_length: int = settings.text_chunk_max_length,
+    boundary: str = settings.chunk_boundary,
+) -> Iterator[str]:
+    """Yield whitespace-token chunks with overlap and a UTF-8 byte cap, streaming from ``source``.
+
+    ``source`` is a string or an iterable of page texts, consumed lazily. Cumulative byte
+    offsets make each byte-cap check a binary search instead of re-joining the chunk, so the
+    whole pass is linear in the input. With ``boundary="sentence"`` a chunk prefers to end
+    after a sentence-ending token; ``"section"`` also prefers to end right before a resume
+    heading line (Experience, Skills, Education, ...).
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if boundary not in CHUNK_BOUNDARIES:
+        raise ValueError(f"boundary must be one of {CHUNK_BOUNDARIES}")
+
+    tokens = _iter_tokens(source)
+    window: List[str] = []
+    # offsets[i] = UTF-8 bytes of window[:i] plus one separator per token, so the joined
+    # length of window[a:b] is offsets[b] - offsets[a] - 1.
+    offsets: List[int] = [0]
+    # Window indices where a chunk may preferably end (exclusive end positions), ascending.
+    section_breaks: List[int] = []
+    sentence_breaks: List[int] = []
+    exhausted = False
+    min_boundary = max(int(chunk_size * _MIN_BOUNDARY_FRACTION), 1)
+    start = 0
+
+    while True:
+        while not exhausted and len(window) < start + chunk_size:
+            try:
+                token, is_heading = next(tokens)
+            except StopIteration:
+                exhausted = True
+                break
+            if boundary == "section" and is_heading and window:
+                section_breaks.append(len(window))
+            window.append(token)
+            offsets.append(offsets[-1] + _utf8_length(token) + 1)
+            if boundary != "tokens" and token.endswith(_SENTENCE_ENDINGS):
+                sentence_breaks.append(len(window))
+
+        if start >= len(window):
+            return
+
+        end = min(start + chunk_size, len(window))
+        if max_length > 0 and offsets[end] - offsets[start] - 1 > max_length:
+            end = bisect_right(offsets, offsets[start] + max_length + 1, start, end + 1) - 1
+            if end == start:
+                # Single token longer than max_length; truncate to fit.
+                chunk = _trim_to_max_bytes(window[start], max_length)
+                if chunk:
+                    yield chunk
+                start += 1
+                continue
+
+        if boundary != "tokens" and (end < len(window) or not exhausted):
+            lowest = start + min_boundary
+            preferred = _preferred_end(section_breaks, lowest, end)
+            end = preferred or _preferred_end(sentence_breaks, lowest, end) or end
+
+        yield " ".join(window[start:end])
+
+        if overlap > 0:
+            next_start = end - overlap
+            start = end if next_start <= start else next_start
+        else:
+            start = end
+
+        if start >= _COMPACT_AFTER:
+            del window[:start]
+            base = offsets[start]
+            offsets = [offset - base for offset in offsets[start:]]
+            section_breaks = _rebase(section_breaks, start)
+            sentence_breaks = _rebase(sentence_breaks, start)
+            start = 0
+
+
+def _preferred_end(breaks: List[int], lowest: int, end: int) -> int:
+    """Return the last break in ``[lowest, end]``, or 0 when there is none."""
+
+    index = bisect_right(breaks, end) - 1
+    if index >= 0 and breaks[index] >= lowest:
+        return breaks[index]
+    return 0
+
+
+def _rebase(breaks: List[int], start: int) -> List[int]:
+    return [position - start for position in breaks[bisect_left(breaks, start) :]]
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = settings.chunk_size,
+    overlap: int = settings.chunk_overlap,
+    max_length: int = settings.text_chunk_max_length,
+    boundary: str = settings.chunk_boundary,
+) -> List[str]:
+    """Chunk text by whitespace tokens with configurable overlap and size caps."""
+
+    return list(iter_chunks(text, chunk_size, overlap, max_length, boundary))
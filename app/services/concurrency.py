@@ -0,0 +1,104 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_milvus_executor: Optional[ThreadPoolExecutor] = None
+_pdf_executor: Optional[Executor] = None
+# asyncio primitives are bound to the loop that first awaits them, so keep one per loop.
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+_upload_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_milvus_executor() -> ThreadPoolExecutor:
+    global _milvus_executor
+    with _lock:
+        if _milvus_executor is None:
+            _milvus_executor = ThreadPoolExecutor(
+                max_workers=max(settings.milvus_max_workers, 1),
+                thread_name_prefix="milvus",
+            )
+        return _milvus_executor
+
+
+def get_pdf_executor() -> Executor:
+    global _pdf_executor
+    with _lock:
+        if _pdf_executor is None:
+            workers = max(settings.pdf_max_workers, 1)
+            if settings.pdf_use_processes:
+                # forkserver children start from a clean process, so they never inherit
+                # the model, batcher or gRPC threads of the web worker.
+                _pdf_executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            else:
+                _pdf_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf")
+        return _pdf_executor
+
+
+async def _run_in(executor: Executor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_milvus(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run Milvus-bound work (insert/flush/search) on the bounded Milvus thread pool."""
+
+    return await _run_in(get_milvus_executor(), func, *args, **kwargs)
+
+
+async def run_pdf(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound PDF parsing on the PDF worker pool; ``func`` and its arguments must pickle."""
+
+    return await _run_in(get_pdf_executor(), func, *args, **kwargs)
+
+
+def llm_slot() -> asyncio.Semaphore:
+    """Return the semaphore that caps in-flight LLM calls on the running event loop."""
+
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(settings.llm_max_concurrency, 1))
+        _llm_semaphores[loop] = semaphore
+    return semaphore
+
+
+def upload_slot() -> asyncio.Semaphore:
+    """Return the semaphore that caps uploads being read and parsed on the running event loop.
+
+    Each holder keeps at most ``UPLOAD_MAX_BYTES`` of PDF in memory, so this bounds the
+    memory taken by concurrent uploads; further requests wait for a slot.
+    """
+
+    loop = asyncio.get_running_loop()
+    semaphore = _upload_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(settings.upload_max_concurrency, 1))
+        _upload_semaphores[loop] = semaphore
+    return semaphore
+
+
+def shutdown_executors() -> None:
+    global _milvus_executor, _pdf_executor
+    with _lock:
+        executors = [_milvus_executor, _pdf_executor]
+        _milvus_executor = None
+        _pdf_executor = None
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file_hash TEXT PRIMARY KEY,
+    candidate_name TEXT NOT NULL,
+    chunks TEXT NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_candidate ON documents (candidate_name);
+CREATE TABLE IF NOT EXISTS chunk_embeddings (
+    model_key TEXT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model_key, chunk_hash)
+);
+"""
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DedupCache:
+    """Content-addressed SQLite cache of ingested documents and chunk embeddings.
+
+    ``documents`` maps a file hash to the chunks that were inserted for it, so an unchanged
+    resume is skipped entirely. ``chunk_embeddings`` maps (model, chunk-text hash) to a
+    float32 vector so identical chunks (shared boilerplate, re-uploads) are never re-encoded.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self.document_hits = 0
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+
+    def get_document(self, file_hash: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunks FROM documents WHERE file_hash = ?", (file_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.document_hits += 1
+        return json.loads(row[0])
+
+    def candidate_hashes(self, candidate_name: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_hash FROM documents WHERE candidate_name = ?", (candidate_name,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def put_document(
+        self,
+        file_hash: str,
+        candidate_name: str,
+        chunks: Sequence[str],
+        *,
+        replace_candidate: bool = False,
+    ) -> None:
+        """Record ``chunks`` as ingested for ``file_hash``.
+
+        With ``replace_candidate`` (the by-name upsert) the candidate's other documents are
+        forgotten, since their rows were deleted; otherwise they stay in the collection and
+        keep their entries.
+        """
+
+        with self._lock, self._conn:
+            if replace_candidate:
+                self._conn.execute("DELETE FROM documents WHERE candidate_name = ?", (candidate_name,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (file_hash, candidate_name, json.dumps(list(chunks)), time.time()),
+            )
+
+    def get_embeddings(self, model_key: str, chunk_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        wanted = list(dict.fromkeys(chunk_hashes))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for offset in range(0, len(wanted), 500):
+                batch = wanted[offset : offset + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM chunk_embeddings "
+                    f"WHERE model_key = ? AND chunk_hash IN ({placeholders})",
+                    (model_key, *batch),
+                ).fetchall()
+                for chunk_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[chunk_hash] = vector.tolist()
+            self.embedding_hits += len(found)
+            self.embedding_misses += len(wanted) - len(found)
+        return found
+
+    def put_embeddings(self, model_key: str, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        rows = [
+            (model_key, chunk_hash, array("f", [float(value) for value in vector]).tobytes())
+            for chunk_hash, vector in items
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO chunk_embeddings VALUES (?, ?, ?)", rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            vectors = self._conn.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+            return {
+                "documents": documents,
+                "chunk_embeddings": vectors,
+                "document_hits": self.document_hits,
+                "embedding_hits": self.embedding_hits,
+                "embedding_misses": self.embedding_misses,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[DedupCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_dedup_cache() -> Optional[DedupCache]:
+    """Return the shared cache, or ``None`` when ``DEDUP_CACHE_PATH`` is not configured."""
+
+    global _cache
+    if not settings.dedup_cache_path:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DedupCache(settings.dedup_cache_path)
+        return _cache
+
+
+def close_dedup_cache() -> None:
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
@@ -0,0 +1,125 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmbeddingQueueFullError(RuntimeError):
+    """Raised when the embedding queue is at capacity and cannot accept more work."""
+
+
+class _EncodeRequest:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: "Future[List[Any]]" = Future()
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent encode calls into batches run on a dedicated worker thread.
+
+    Requests are grouped until either ``max_batch_size`` texts are pending or
+    ``max_wait_ms`` has elapsed since the first request of the batch arrived.
+    """
+
+    def __init__(
+        self,
+        model_provider: Callable[[], Any],
+        *,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_queue_depth: int,
+    ):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        self._model_provider = model_provider
+        self._max_batch_size = max_batch_size
+        self._max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(max_queue_depth, 0))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches_run = 0
+        self.texts_encoded = 0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._start_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def submit(self, texts: Sequence[str]) -> "Future[List[Any]]":
+        request = _EncodeRequest(list(texts))
+        if not request.texts:
+            request.future.set_result([])
+            return request.future
+        self.start()
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full as exc:
+            raise EmbeddingQueueFullError("Embedding queue is full; retry later.") from exc
+        return request.future
+
+    def encode(self, texts: Sequence[str], timeout: Optional[float] = None) -> List[Any]:
+        return self.submit(texts).result(timeout)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            pending = len(first.texts)
+            deadline = time.monotonic() + self._max_wait
+            stop_after_batch = False
+            while pending < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop_after_batch = True
+                    break
+                batch.append(item)
+                pending += len(item.texts)
+
+            self._encode_batch(batch)
+            if stop_after_batch:
+                return
+
+    def _encode_batch(self, batch: List[_EncodeRequest]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = self._model_provider().encode(texts, show_progress_bar=False)
+        except Exception as exc:
+            logger.exception("Embedding batch of %d texts failed", len(texts))
+            for request in batch:
+                request.future.set_exception(exc)
+            return
+
+        self.batches_run += 1
+        self.texts_encoded += len(texts)
+        offset = 0
+        for request in batch:
+            size = len(request.texts)
+            request.future.set_result(list(vectors[offset : offset + size]))
+            offset += size
@@ -0,0 +1,140 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+
+# sentence-transformers (and with it torch) is imported only when the torch backend loads a
+# model, so workers running EMBEDDING_BACKEND=onnx never import torch.
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXT = "Senior backend engineer with Python, FastAPI and Milvus experience."
+
+_models: "OrderedDict[str, Any]" = OrderedDict()
+_lock = threading.Lock()
+_ready = threading.Event()
+_batcher: Optional[EmbeddingBatcher] = None
+
+
+def embedding_backend() -> str:
+    backend = settings.embedding_backend.lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+    return backend
+
+
+def _load_model(name: str) -> Any:
+    if embedding_backend() == "onnx":
+        from app.services.onnx_embeddings import load_onnx_model
+
+        return load_onnx_model(name)
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name)
+
+
+def get_embedding_model(model_name: Optional[str] = None) -> Any:
+    """Return the process-wide embedding model for the configured backend, loading it on first use.
+
+    Both backends expose SentenceTransformer's ``encode(texts, show_progress_bar=...)``.
+    """
+
+    name = model_name or settings.embedding_model_name
+    key = embedding_model_key(name)
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+
+        model = _load_model(name)
+        _models[key] = model
+        # Keep the number of resident models bounded so worker memory stays predictable.
+        while len(_models) > max(settings.embedding_max_loaded_models, 1):
+            evicted, _ = _models.popitem(last=False)
+            logger.info("Evicted embedding model %s from registry", evicted)
+        return model
+
+
+def warm_up_embedding_model(model_name: Optional[str] = None) -> None:
+    """Load the default model and run one encode so the first request is not penalised."""
+
+    model = get_embedding_model(model_name)
+    model.encode([WARMUP_TEXT], show_progress_bar=False)
+    if model_name is None or model_name == settings.embedding_model_name:
+        _ready.set()
+
+
+def start_embedding_warmup() -> threading.Thread:
+    """Warm up the default model on a background thread; failures leave the registry not ready."""
+
+    def _run() -> None:
+        try:
+            warm_up_embedding_model()
+        except Exception:  # pragma: no cover - depends on model availability
+            logger.exception("Embedding model warm-up failed")
+
+    thread = threading.Thread(target=_run, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_embedding_model_ready() -> bool:
+    return _ready.is_set()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Return the shared micro-batcher that coalesces encode calls for the default model."""
+
+    global _batcher
+    with _lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher(
+                get_embedding_model,
+                max_batch_size=settings.embedding_batch_max_size,
+                max_wait_ms=settings.embedding_batch_max_wait_ms,
+                max_queue_depth=settings.embedding_queue_max_depth,
+            )
+        return _batcher
+
+
+def embedding_model_key(model_name: Optional[str] = None) -> str:
+    """Identify the vectors produced by a model and backend (used to key cached embeddings).
+
+    ONNX vectors get their own key, since int8 quantization moves them slightly.
+    """
+
+    name = model_name or settings.embedding_model_name
+    if embedding_backend() == "onnx":
+        return f"{name}@onnx-{settings.embedding_onnx_quantization.lower()}"
+    return name
+
+
+def encode_texts(texts: Sequence[str], *, model: Optional[Any] = None) -> List[Any]:
+    """Embed ``texts`` with an explicit model, or through the shared batcher by default."""
+
+    if model is not None:
+        return list(model.encode(list(texts), show_progress_bar=False))
+    if not settings.embedding_batching_enabled:
+        return list(get_embedding_model().encode(list(texts), show_progress_bar=False))
+    return get_embedding_batcher().encode(texts)
+
+
+def shutdown_embedding_batcher() -> None:
+    global _batcher
+    with _lock:
+        batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.stop(timeout=5)
+
+
+def reset_embedding_registry() -> None:
+    shutdown_embedding_batcher()
+    with _lock:
+        _models.clear()
+        _ready.clear()
@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FLUSH_POLICIES = ("per_insert", "rows", "interval", "shutdown", "never")
+
+
+class FlushPolicy:
+    """Decide when inserted rows are flushed (sealed) instead of flushing after every document.
+
+    Unflushed rows live in Milvus growing segments and are still searchable; the search
+    consistency level (``MILVUS_SEARCH_CONSISTENCY_LEVEL``) controls how soon they are visible.
+
+    - ``per_insert``: flush after every insert (the old behaviour).
+    - ``rows``: flush once ``every_rows`` rows are pending.
+    - ``interval``: flush pending rows every ``interval_seconds`` from a background thread.
+    - ``shutdown``: only flush when the app shuts down.
+    - ``never``: leave sealing entirely to Milvus.
+    """
+
+    def __init__(self, policy: str, *, every_rows: int = 10_000, interval_seconds: float = 60.0):
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy {policy!r}; expected one of {FLUSH_POLICIES}.")
+        self.policy = policy
+        self.every_rows = max(every_rows, 1)
+        self.interval_seconds = max(interval_seconds, 0.1)
+
+        self._lock = threading.Lock()
+        self._collection: Optional[Any] = None
+        self._timer: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self.rows_inserted = 0
+        self.rows_since_flush = 0
+        self.flush_count = 0
+        self.flush_seconds_total = 0.0
+        self.last_flush_at: Optional[float] = None
+
+    def record_insert(self, collection: Any, rows: int, *, allow_flush: bool = True) -> bool:
+        """Account for ``rows`` newly inserted rows and flush if the policy says so.
+
+        Callers that flush on their own schedule (bulk ingestion) pass ``allow_flush=False``.
+        """
+
+        with self._lock:
+            self._collection = collection
+            self.rows_inserted += rows
+            self.rows_since_flush += rows
+            due = allow_flush and (
+                self.policy == "per_insert"
+                or (self.policy == "rows" and self.rows_since_flush >= self.every_rows)
+            )
+        if self.policy == "interval":
+            self._ensure_timer()
+        if due:
+            self.flush(collection)
+        return due
+
+    def flush(self, collection: Optional[Any] = None) -> None:
+        target = collection or self._collection
+        if target is None:
+            return
+        started = time.perf_counter()
+        target.flush()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.rows_since_flush = 0
+            self.flush_count += 1
+            self.flush_seconds_total += elapsed
+            self.last_flush_at = time.time()
+
+    def close(self) -> None:
+        """Stop the interval thread and flush pending rows unless the policy is ``never``."""
+
+        self._stopped.set()
+        if self.policy != "never" and self.rows_since_flush:
+            try:
+                self.flush()
+            except Exception:  # pragma: no cover - best effort on shutdown
+                logger.exception("Final Milvus flush failed")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "rows_inserted": self.rows_inserted,
+                "rows_since_flush": self.rows_since_flush,
+                "flush_count": self.flush_count,
+                "flush_seconds_total": round(self.flush_seconds_total, 6),
+                "last_flush_at": self.last_flush_at,
+            }
+
+    def _ensure_timer(self) -> None:
+        with self._lock:
+            if self._timer is not None or self._stopped.is_set():
+                return
+            self._timer = threading.Thread(target=self._run_timer, name="milvus-flush", daemon=True)
+            self._timer.start()
+
+    def _run_timer(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            if self.rows_since_flush:
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Periodic Milvus flush failed")
+
+
+_policy: Optional[FlushPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_flush_policy() -> FlushPolicy:
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = FlushPolicy(
+                settings.milvus_flush_policy,
+                every_rows=settings.milvus_flush_every_rows,
+                interval_seconds=settings.milvus_flush_interval_seconds,
+            )
+        return _policy
+
+
+def close_flush_policy() -> None:
+    global _policy
+    with _policy_lock:
+        policy, _policy = _policy, None
+    if policy is not None:
+        policy.close()
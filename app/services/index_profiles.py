@@ -0,0 +1,179 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from pymilvus import Collection, MilvusException
+
+from app.core.config import settings
+from app.services.caches import TTLCache
+from app.services.vector_storage import collection_storage
+
+logger = logging.getLogger(__name__)
+
+METRIC_TYPE = "COSINE"
+BINARY_METRIC_TYPE = "HAMMING"
+VECTOR_FIELD = "embedding"
+RECALL_LEVELS = {"fast": 0.5, "balanced": 1.0, "high": 4.0}
+
+
+@dataclass(frozen=True)
+class IndexProfile:
+    """Build parameters for one Milvus vector index type plus its search knob.
+
+    ``search_knob`` is the single parameter that trades recall for latency (``ef`` for HNSW,
+    ``nprobe`` for IVF, ``search_list`` for DiskANN). ``knob_covers_limit`` marks knobs that
+    Milvus requires to be at least the result limit. Binary profiles use ``BINARY_METRIC_TYPE``
+    and only index ``EMBEDDING_STORAGE=binary`` collections.
+    """
+
+    name: str
+    index_type: str
+    build_params: Dict[str, Any] = field(default_factory=dict)
+    search_knob: Optional[str] = None
+    search_default: int = 0
+    search_max: int = 0
+    knob_covers_limit: bool = False
+    metric_type: str = METRIC_TYPE
+
+
+INDEX_PROFILES: Dict[str, IndexProfile] = {
+    # Exact brute-force search: perfect recall, linear cost; fine for small collections.
+    "flat": IndexProfile("flat", "FLAT"),
+    # Graph index in RAM: best recall/latency, ~1.5-2x the raw vector size in memory.
+    "hnsw": IndexProfile(
+        "hnsw", "HNSW", {"M": 48, "efConstruction": 200}, "ef", 64, 32768, knob_covers_limit=True
+    ),
+    # Inverted lists over raw vectors: cheaper to build, no graph overhead.
+    "ivf_flat": IndexProfile("ivf_flat", "IVF_FLAT", {"nlist": 1024}, "nprobe", 16, 65536),
+    # Scalar-quantized IVF: ~4x smaller than float32 with a small recall loss.
+    "ivf_sq8": IndexProfile("ivf_sq8", "IVF_SQ8", {"nlist": 1024}, "nprobe", 16, 65536),
+    # Product-quantized IVF: 384 dims -> 48 sub-vectors of 8 bits, ~32x smaller; rescore if needed.
+    "ivf_pq": IndexProfile(
+        "ivf_pq", "IVF_PQ", {"nlist": 1024, "m": 48, "nbits": 8}, "nprobe", 16, 65536
+    ),
+    # Disk-resident graph for corpora that do not fit in memory (needs local NVMe on the node).
+    "diskann": IndexProfile(
+        "diskann", "DISKANN", {}, "search_list", 100, 65535, knob_covers_limit=True
+    ),
+    # Binary (sign-bit) vectors: exhaustive Hamming scan, or inverted lists for large corpora.
+    "bin_flat": IndexProfile("bin_flat", "BIN_FLAT", metric_type=BINARY_METRIC_TYPE),
+    "bin_ivf_flat": IndexProfile(
+        "bin_ivf_flat", "BIN_IVF_FLAT", {"nlist": 1024}, "nprobe", 16, 65536,
+        metric_type=BINARY_METRIC_TYPE,
+    ),
+}
+DEFAULT_BINARY_PROFILE = "bin_ivf_flat"
+
+_TYPE_TO_PROFILE = {profile.index_type: profile for profile in INDEX_PROFILES.values()}
+
+# How long a collection's index type and schema are trusted before they are re-read, so an
+# online rebuild or alias switch (scripts/rebuild_index.py) is picked up without a restart.
+LIVE_SCHEMA_TTL_SECONDS = 60.0
+
+# Index type actually built on each collection.
+_live_index_types = TTLCache(64, LIVE_SCHEMA_TTL_SECONDS)
+
+
+def get_index_profile(name: Optional[str] = None) -> IndexProfile:
+    name = (name or settings.milvus_index_profile).lower()
+    try:
+        return INDEX_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown index profile {name!r}; expected one of {sorted(INDEX_PROFILES)}")
+
+
+def profile_for_storage(profile: IndexProfile, storage: str) -> IndexProfile:
+    """Return ``profile`` if it can index ``storage`` vectors, else the closest one that can.
+
+    Binary vectors need a binary profile, so e.g. the default ``hnsw`` becomes ``bin_ivf_flat``.
+    """
+
+    is_binary = profile.metric_type == BINARY_METRIC_TYPE
+    if storage == "binary" and not is_binary:
+        return INDEX_PROFILES[DEFAULT_BINARY_PROFILE]
+    if storage != "binary" and is_binary:
+        raise ValueError(f"Index profile {profile.name!r} only indexes binary vectors")
+    return profile
+
+
+def vector_index_params(
+    profile: Optional[IndexProfile] = None, storage: Optional[str] = None
+) -> Dict[str, Any]:
+    """``create_index`` parameters for ``profile`` (default: ``MILVUS_INDEX_PROFILE``) on
+    ``storage`` vectors (default: ``EMBEDDING_STORAGE``)."""
+
+    configured = get_index_profile()
+    profile = profile_for_storage(profile or configured, storage or settings.embedding_storage)
+    params = dict(profile.build_params)
+    if profile.name == configured.name and settings.milvus_index_build_params:
+        params.update(settings.milvus_index_build_params)
+    return {"index_type": profile.index_type, "metric_type": profile.metric_type, "params": params}
+
+
+def collection_index_profile(collection: Collection) -> IndexProfile:
+    """Profile matching the vector index built on ``collection``, else the configured one
+    (adjusted to the collection's embedding storage)."""
+
+    fallback = profile_for_storage(get_index_profile(), collection_storage(collection))
+    name = getattr(collection, "name", None)
+    if name is None or not hasattr(collection, "indexes"):
+        return fallback
+    index_type = _live_index_types.get(name)
+    if index_type is None:
+        try:
+            index_type = next(
+                (
+                    index.params.get("index_type")
+                    for index in collection.indexes
+                    if index.field_name == VECTOR_FIELD
+                ),
+                None,
+            )
+        except MilvusException:
+            logger.warning("Could not describe the vector index of %s", name)
+        index_type = index_type or fallback.index_type
+        _live_index_types.put(name, index_type)
+    return _TYPE_TO_PROFILE.get(index_type, fallback)
+
+
+def forget_index_profile(collection_name: str) -> None:
+    _live_index_types.pop(collection_name)
+
+
+def search_params(
+    collection: Collection,
+    limit: int,
+    *,
+    overrides: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Search parameters for ``collection``'s index type.
+
+    The knob starts at the profile default (or ``MILVUS_SEARCH_PARAMS``), is scaled by a
+    ``recall`` level (``fast``, ``balanced``, ``high``), can be set directly with
+    ``overrides`` (e.g. ``{"ef": 256}``), and is clamped to what Milvus accepts.
+    """
+
+    profile = collection_index_profile(collection)
+    params: Dict[str, Any] = {}
+    if profile.search_knob:
+        value = profile.search_default
+        configured = settings.milvus_search_params or {}
+        if profile.search_knob in configured:
+            value = int(configured[profile.search_knob])
+        if recall is not None:
+            if recall not in RECALL_LEVELS:
+                raise ValueError(f"recall must be one of {sorted(RECALL_LEVELS)}")
+            value = int(value * RECALL_LEVELS[recall])
+        if overrides:
+            unknown = set(overrides) - {profile.search_knob}
+            if unknown:
+                raise ValueError(
+                    f"{profile.index_type} accepts only {profile.search_knob!r}, "
+                    f"got {sorted(unknown)}"
+                )
+            value = int(overrides[profile.search_knob])
+        if profile.knob_covers_limit:
+            value = max(value, limit)
+        params[profile.search_knob] = max(1, min(value, profile.search_max))
+    return {"metric_type": profile.metric_type, "params": params}
@@ -0,0 +1,423 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.concurrency import get_pdf_executor
+from app.services.dedup_cache import hash_bytes
+from app.services.ingestion import find_ingested_document, ingest_chunks
+from app.services.pdf_extraction import extract_chunks_from_pdf
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    candidate_name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    payload BLOB,
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    chunks INTEGER,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, available_at);
+"""
+
+_COLUMNS = (
+    "id, candidate_name, filename, status, stage, attempts, max_attempts, chunks, error, worker, "
+    "created_at, updated_at, available_at, finished_at"
+)
+
+
+class NonRetryableIngestError(Exception):
+    """Raised by a job handler for failures that a retry cannot fix."""
+
+
+@dataclass
+class IngestJob:
+    id: str
+    candidate_name: str
+    filename: str
+    status: str
+    stage: str
+    attempts: int
+    max_attempts: int
+    chunks: Optional[int]
+    error: Optional[str]
+    worker: Optional[str]
+    created_at: float
+    updated_at: float
+    available_at: float
+    finished_at: Optional[float]
+    payload: Optional[bytes] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "candidate_name": self.candidate_name,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "chunks": self.chunks,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "next_attempt_at": self.available_at if self.status == "queued" else None,
+            "finished_at": self.finished_at,
+        }
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class IngestQueue:
+    """Durable SQLite queue of upload ingestion jobs, shared by the API processes on one host.
+
+    A job holds the uploaded PDF until it finishes. Workers claim the oldest due job with a
+    conditional update (so two processes never take the same job) and hold it under a lease
+    that a heartbeat renews while the job runs. A job whose worker died is claimed again once
+    its lease expires. Failures are retried with exponential backoff up to ``max_attempts``.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def enqueue(
+        self, candidate_name: str, filename: str, payload: bytes, *, max_attempts: Optional[int] = None
+    ) -> IngestJob:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        attempts = max(max_attempts or settings.ingest_max_attempts, 1)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, candidate_name, filename, payload, status, stage, max_attempts, "
+                "created_at, updated_at, available_at) VALUES (?, ?, ?, ?, 'queued', 'queued', ?, ?, ?, ?)",
+                (job_id, candidate_name, filename, payload, attempts, now, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str, *, with_payload: bool = False) -> Optional[IngestJob]:
+        columns = _COLUMNS + (", payload" if with_payload else "")
+        with self._lock:
+            row = self._conn.execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return IngestJob(*row) if row is not None else None
+
+    def claim(self, worker: str, *, lease_seconds: Optional[float] = None) -> Optional[IngestJob]:
+        """Take the oldest due job (or one whose lease expired) and start a new attempt on it."""
+
+        lease = settings.ingest_job_lease_seconds if lease_seconds is None else lease_seconds
+        while True:
+            now = time.time()
+            with self._lock, self._conn:
+                # A worker that died on its last attempt leaves nothing to retry.
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', stage = 'failed', payload = NULL, "
+                    "error = 'Worker stopped before finishing the last attempt', updated_at = ?, finished_at = ? "
+                    "WHERE status = 'running' AND lease_expires_at <= ? AND attempts >= max_attempts",
+                    (now, now, now),
+                )
+                row = self._conn.execute(
+                    "SELECT id, status, attempts FROM jobs "
+                    "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_expires_at <= ?) "
+                    "ORDER BY available_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, status, attempts = row
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'starting', attempts = attempts + 1, worker = ?, "
+                    "updated_at = ?, lease_expires_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                    (worker, now, now + lease, job_id, status, attempts),
+                ).rowcount
+            if claimed:
+                return self.get(job_id, with_payload=True)
+            # Another process claimed it between the select and the update; try the next one.
+
+    def progress(self, job_id: str, stage: str, *, lease_seconds: Optional[float] = None) -> None:
+        """Record the running job's stage and renew its lease."""
+
+        lease = settings.ingest_job_lease_seconds if lease_seconds is None else lease_seconds
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, updated_at = ?, lease_expires_at = ? WHERE id = ? AND status = 'running'",
+                (stage, now, now + lease, job_id),
+            )
+
+    def renew(self, job_id: str, *, lease_seconds: Optional[float] = None) -> None:
+        """Extend the running job's lease without changing its stage."""
+
+        lease = settings.ingest_job_lease_seconds if lease_seconds is None else lease_seconds
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = 'running'",
+                (time.time() + lease, job_id),
+            )
+
+    def complete(self, job_id: str, chunks: int) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'succeeded', stage = 'done', chunks = ?, error = NULL, payload = NULL, "
+                "updated_at = ?, finished_at = ?, lease_expires_at = NULL WHERE id = ?",
+                (chunks, now, now, job_id),
+            )
+
+    def fail(self, job_id: str, error: str, *, retry: bool = True, backoff_seconds: Optional[float] = None) -> str:
+        """Record a failed attempt; the job is queued again unless it is out of attempts.
+
+        Returns the job's new status.
+        """
+
+        base = settings.ingest_retry_backoff_seconds if backoff_seconds is None else backoff_seconds
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return "failed"
+            attempts, max_attempts = row
+            if retry and attempts < max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', stage = 'retrying', error = ?, updated_at = ?, "
+                    "available_at = ?, lease_expires_at = NULL WHERE id = ?",
+                    (error, now, now + base * 2 ** (attempts - 1), job_id),
+                )
+                return "queued"
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', stage = 'failed', error = ?, payload = NULL, updated_at = ?, "
+                "finished_at = ?, lease_expires_at = NULL WHERE id = ?",
+                (error, now, now, job_id),
+            )
+            return "failed"
+
+    def requeue_orphaned(self, alive: Callable[[int], bool] = _pid_alive) -> int:
+        """Release jobs held by dead worker processes on this host without waiting for their lease.
+
+        Called when a worker pool starts, so jobs interrupted by a restart resume immediately.
+        """
+
+        host = socket.gethostname()
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT id, worker FROM jobs WHERE status = 'running'").fetchall()
+            orphaned = []
+            for job_id, worker in rows:
+                worker_host, _, pid = (worker or "").rpartition(":")
+                if worker_host == host and pid.isdigit() and not alive(int(pid)):
+                    orphaned.append(job_id)
+            for job_id in orphaned:
+                # Expiring the lease hands the job to the next claim, which also applies the attempt limit.
+                self._conn.execute(
+                    "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                    (now, now, job_id),
+                )
+        return len(orphaned)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def process_job(queue: IngestQueue, job: IngestJob) -> int:
+    """Ingest one queued upload like ``/ingest`` does inline; returns the number of chunks."""
+
+    file_hash = hash_bytes(job.payload)
+    chunks = find_ingested_document(file_hash)
+    if chunks is not None:
+        return len(chunks)
+    queue.progress(job.id, "extracting")
+    try:
+        text_chunks = get_pdf_executor().submit(extract_chunks_from_pdf, job.payload).result()
+    except Exception as exc:
+        # Parsing the same bytes again fails the same way (corrupt PDF, extraction timeout);
+        # only the embedding / Milvus step is worth retrying.
+        raise NonRetryableIngestError(f"{type(exc).__name__}: {exc}") from exc
+    queue.progress(job.id, "indexing")
+    return len(ingest_chunks(job.candidate_name, text_chunks, file_hash=file_hash))
+
+
+Handler = Callable[[IngestQueue, IngestJob], int]
+
+
+@contextmanager
+def _lease_heartbeat(queue: IngestQueue, job_id: str, lease_seconds: float) -> Iterator[None]:
+    """Renew the job's lease every third of it while the handler runs.
+
+    A single stage (e.g. embedding and inserting a long resume) can outlast the lease, and
+    another worker would then claim the job and insert its chunks a second time.
+    """
+
+    done = threading.Event()
+
+    def beat() -> None:
+        while not done.wait(lease_seconds / 3):
+            try:
+                queue.renew(job_id, lease_seconds=lease_seconds)
+            except Exception:  # e.g. a locked queue file; the next beat tries again
+                logger.exception("Could not renew the lease of ingest job %s", job_id)
+
+    thread = threading.Thread(target=beat, name=f"ingest-lease-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def work_once(
+    queue: IngestQueue, worker: str, handler: Handler = process_job, *, lease_seconds: Optional[float] = None
+) -> bool:
+    """Claim and run one job; returns ``False`` when nothing was due."""
+
+    lease = settings.ingest_job_lease_seconds if lease_seconds is None else lease_seconds
+    job = queue.claim(worker, lease_seconds=lease)
+    if job is None:
+        return False
+    try:
+        with _lease_heartbeat(queue, job.id, lease):
+            chunks = handler(queue, job)
+    except Exception as exc:
+        retry = not isinstance(exc, NonRetryableIngestError)
+        status = queue.fail(job.id, f"{type(exc).__name__}: {exc}" if retry else str(exc), retry=retry)
+        logger.warning("Ingest job %s attempt %d failed (%s); now %s", job.id, job.attempts, exc, status)
+    else:
+        queue.complete(job.id, chunks)
+    return True
+
+
+def run_worker(
+    queue: IngestQueue, stop: threading.Event, handler: Handler = process_job, poll_interval: Optional[float] = None
+) -> None:
+    """Worker loop: run due jobs until ``stop`` is set."""
+
+    interval = settings.ingest_poll_interval_seconds if poll_interval is None else poll_interval
+    worker = worker_id()
+    while not stop.is_set():
+        try:
+            if not work_once(queue, worker, handler):
+                stop.wait(interval)
+        except Exception:  # e.g. a locked or unreadable queue file; keep the worker alive
+            logger.exception("Ingest worker %s could not poll the queue", worker)
+            stop.wait(interval)
+
+
+class IngestWorkerPool:
+    """``INGEST_WORKERS`` threads in the API process draining the queue.
+
+    Jobs run in the web process so their inserts update its BM25 index, search-cache
+    versions and local vector store exactly like inline ``/ingest``. PDF parsing still runs
+    on the PDF process pool and embedding goes through the shared batcher.
+    """
+
+    def __init__(self, queue: IngestQueue, workers: int, handler: Handler = process_job):
+        self.queue = queue
+        self.workers = workers
+        self.handler = handler
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self.queue.requeue_orphaned():
+            logger.info("Re-queued ingest jobs interrupted by a restart")
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=run_worker, args=(self.queue, self._stop, self.handler), name=f"ingest-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Let each worker finish its current job; a job cut off by exit resumes after restart."""
+
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                logger.warning("Ingest worker %s still busy at shutdown; its job will be re-queued", thread.name)
+        self._threads.clear()
+
+
+_queue: Optional[IngestQueue] = None
+_pool: Optional[IngestWorkerPool] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingest_queue() -> IngestQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestQueue(settings.ingest_queue_path)
+        return _queue
+
+
+def start_ingest_workers() -> None:
+    """Start the worker pool when ``INGEST_BACKGROUND`` is on and ``INGEST_WORKERS`` > 0."""
+
+    global _pool
+    if not settings.ingest_background or settings.ingest_workers <= 0:
+        return
+    queue = get_ingest_queue()
+    with _queue_lock:
+        if _pool is not None:
+            return
+        _pool = IngestWorkerPool(queue, settings.ingest_workers)
+    _pool.start()
+
+
+def close_ingest_queue() -> None:
+    global _queue, _pool
+    with _queue_lock:
+        pool, _pool = _pool, None
+        queue, _queue = _queue, None
+    if pool is not None:
+        pool.stop()
+    if queue is not None:
+        queue.close()
@@ -1,111 +1,243 @@
+import json
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
 
-from PyPDF2 import PdfReader
 from pymilvus import Collection
-from sentence_transformers import SentenceTransformer
 
 from app.core.config import settings
-from app.services.milvus_client import get_or_create_collection
-
+from app.services.chunking import chunk_text
+from app.services.dedup_cache import DedupCache, get_dedup_cache, hash_file, hash_text
+from app.services.embeddings import embedding_model_key, encode_texts
+from app.services.flush_policy import FlushPolicy, get_flush_policy
+from app.services.lexical_index import lexical_index_for
+from app.services.milvus_client import call_with_reconnect, get_or_create_collection, has_field
+from app.services.pdf_extraction import extract_text_from_pdf
+from app.services.search_cache import bump_collection_version
+from app.services.skill_extraction import UNKNOWN_YEARS, extract_profile
+from app.services.vector_storage import collection_storage, to_storage
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+def embed_chunks(
+    text_chunks: Sequence[str],
+    *,
+    model: Optional["SentenceTransformer"] = None,
+    cache: Optional[DedupCache] = None,
+) -> List[Any]:
+    """Embed chunks, reusing cached vectors for chunk texts seen before.
+
+    The vector cache only applies to the shared default model; an explicit ``model`` is
+    always asked to encode.
+    """
+
+    if cache is None or model is not None:
+        return encode_texts(text_chunks, model=model)
+
+    model_key = embedding_model_key()
+    hashes = [hash_text(chunk) for chunk in text_chunks]
+    cached = cache.get_embeddings(model_key, hashes)
+    missing = {digest: chunk for digest, chunk in zip(hashes, text_chunks) if digest not in cached}
+    if missing:
+        vectors = encode_texts(list(missing.values()))
+        fresh = list(zip(missing.keys(), vectors))
+        cache.put_embeddings(model_key, fresh)
+        cached.update((digest, list(vector)) for digest, vector in fresh)
+    return [cached[digest] for digest in hashes]
+
+
+def stale_candidate_row_ids(
+    collection: Collection, cache: DedupCache, candidate_name: str, file_hash: str
+) -> List[int]:
+    """Primary keys of a candidate's rows that a changed resume replaces.
+
+    Opt-in (``DEDUP_UPSERT_BY_CANDIDATE``): candidates are named after the file stem, so two
+    people's ``resume.pdf`` would otherwise replace each other. Looked up before the insert;
+    the rows are deleted by id only after the new rows are in (:func:`delete_rows`).
+    """
+
+    if not settings.dedup_upsert_by_candidate:
+        return []
+    previous = cache.candidate_hashes(candidate_name)
+    if not previous or file_hash in previous:
+        return []
+    iterator = collection.query_iterator(
+        batch_size=1000,
+        expr=f"candidate_name == {json.dumps(candidate_name)}",
+        output_fields=["candidate_name"],
+    )
+    ids: List[int] = []
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                return ids
+            ids.extend(int(row["id"]) for row in batch)
+    finally:
+        iterator.close()
+
+
+def delete_rows(collection: Collection, ids: Sequence[int], batch_size: int = 1000) -> None:
+    """Delete rows by primary key (the replaced rows of an upsert)."""
+
+    for offset in range(0, len(ids), batch_size):
+        collection.delete(expr=f"id in {json.dumps(list(ids[offset : offset + batch_size]))}")
+    if ids:
+        bump_collection_version()
+
+
+def insert_chunk_rows(
+    collection: Collection,
+    embeddings: Sequence[Sequence[float]],
+    text_chunks: Sequence[str],
+    candidate_names: Sequence[str],
+    skills: Optional[Sequence[List[str]]] = None,
+    years_experience: Optional[Sequence[int]] = None,
+    replaced_candidates: Sequence[str] = (),
+) -> None:
+    """Insert one columnar batch of chunk rows; shared by single and bulk ingestion.
+
+    ``skills`` and ``years_experience`` are per row (every chunk carries its candidate's
+    profile so filters apply to all of them); they default to empty/unknown. Embeddings are
+    converted to the collection's storage type (float16, bfloat16 or binary) here. Once the
+    insert succeeds, ``replaced_candidates`` lose their previous chunks in the BM25 index.
+    """
+
+    if skills is None:
+        skills = [[] for _ in text_chunks]
+    if years_experience is None:
+        years_experience = [UNKNOWN_YEARS for _ in text_chunks]
 
-def _utf8_length(value: str) -> int:
-    return len(value.encode("utf-8"))
+    data = [
+        to_storage(embeddings, collection_storage(collection)),
+        list(text_chunks),
+        list(candidate_names),
+        list(skills),
+    ]
+    fields = ["embedding", "text_chunk", "candidate_name", "skills"]
+    if has_field(collection, "years_experience"):
+        data.append(list(years_experience))
+        fields.append("years_experience")
 
+    collection.insert(data, fields=fields)
+    index = lexical_index_for(collection)
+    if index is not None:
+        for candidate_name in replaced_candidates:
+            index.remove_candidate(candidate_name)
+        index.add(text_chunks, candidate_names, skills, years_experience)
+    bump_collection_version()
 
-def _trim_to_max_bytes(value: str, max_bytes: int) -> str:
-    if max_bytes <= 0:
-        return ""
-    encoded = value.encode("utf-8")
-    if len(encoded) <= max_bytes:
-        return value
-    return encoded[:max_bytes].decode("utf-8", errors="ignore")
 
+def find_ingested_chunks(
+    file_path: str, *, dedup_cache: Optional[DedupCache] = None
+) -> Optional[List[str]]:
+    """Return the chunks of an already-ingested, unchanged file, or ``None``."""
 
-def extract_text_from_pdf(file_path: str) -> str:
-    reader = PdfReader(file_path)
-    text_segments: List[str] = []
-    for page in reader.pages:
-        page_text = page.extract_text() or ""
-        text_segments.append(page_text)
-    return "\n".join(text_segments).strip()
+    cache = dedup_cache or get_dedup_cache()
+    if cache is None or not Path(file_path).is_file():
+        return None
+    return cache.get_document(hash_file(file_path))
 
 
-def chunk_text(
-    text: str,
-    chunk_size: int = settings.chunk_size,
-    overlap: int = settings.chunk_overlap,
-    max_length: int = settings.text_chunk_max_length,
-) -> List[str]:
-    """Chunk text by whitespace tokens with configurable overlap and size caps."""
+def find_ingested_document(
+    file_hash: str, *, dedup_cache: Optional[DedupCache] = None
+) -> Optional[List[str]]:
+    """Like :func:`find_ingested_chunks` for a document already hashed (e.g. an upload)."""
 
-    if chunk_size <= 0:
-        raise ValueError("chunk_size must be positive")
+    cache = dedup_cache or get_dedup_cache()
+    return cache.get_document(file_hash) if cache is not None else None
 
-    tokens = text.split()
-    chunks: List[str] = []
-    start = 0
-    while start < len(tokens):
-        end = min(start + chunk_size, len(tokens))
-        chunk = " ".join(tokens[start:end])
 
-        if max_length > 0 and _utf8_length(chunk) > max_length:
-            while end > start and _utf8_length(chunk) > max_length:
-                end -= 1
-                chunk = " ".join(tokens[start:end])
-
-            if end == start:
-                # Single token longer than max_length; truncate to fit.
-                chunk = _trim_to_max_bytes(tokens[start], max_length)
-                if chunk:
-                    chunks.append(chunk)
-                start += 1
-                continue
+def ingest_chunks(
+    candidate_name: str,
+    text_chunks: List[str],
+    *,
+    file_hash: Optional[str] = None,
+    profile_text: Optional[str] = None,
+    collection: Optional[Collection] = None,
+    model: Optional["SentenceTransformer"] = None,
+    flush_policy: Optional[FlushPolicy] = None,
+    dedup_cache: Optional[DedupCache] = None,
+) -> List[str]:
+    """Embed and insert the chunks of one document for ``candidate_name``.
 
-        if chunk:
-            chunks.append(chunk)
+    Used when the text was already chunked elsewhere (uploads are chunked page by page in
+    the PDF workers). The candidate profile is extracted from ``profile_text``, or from the
+    chunks when it is not given. With a dedup cache, ``file_hash`` identifies the document
+    so a changed resume replaces the candidate's previous rows.
+    """
 
-        if overlap > 0:
-            next_start = end - overlap
-            start = end if next_start <= start else next_start
-        else:
-            start = end
+    shared_collection = collection is None
+    collection = collection or get_or_create_collection()
+    cache = dedup_cache or get_dedup_cache()
+    if cache is not None and file_hash is None:
+        file_hash = hash_text(profile_text if profile_text is not None else "\n".join(text_chunks))
+
+    # Without an explicit model the chunks go through the shared batcher alongside other callers.
+    embeddings: Sequence[Sequence[float]] = embed_chunks(text_chunks, model=model, cache=cache)
+
+    profile = extract_profile(profile_text if profile_text is not None else "\n".join(text_chunks))
+
+    def write(collection: Collection) -> None:
+        stale_ids = stale_candidate_row_ids(collection, cache, candidate_name, file_hash) if cache is not None else []
+        # Insert before deleting: a failed insert leaves the candidate's previous rows in place.
+        insert_chunk_rows(
+            collection,
+            embeddings,
+            text_chunks,
+            [candidate_name for _ in text_chunks],
+            [profile.skills for _ in text_chunks],
+            [profile.years_experience for _ in text_chunks],
+            replaced_candidates=[candidate_name] if stale_ids else (),
+        )
+        delete_rows(collection, stale_ids)
+        (flush_policy or get_flush_policy()).record_insert(collection, len(text_chunks))
+
+    # Not retried (the rows may have reached Milvus); the next ingest reconnects.
+    call_with_reconnect(write, collection, shared=shared_collection, retry=False)
+    if cache is not None:
+        cache.put_document(
+            file_hash,
+            candidate_name,
+            text_chunks,
+            replace_candidate=settings.dedup_upsert_by_candidate,
+        )
 
-    return chunks
+    return text_chunks
 
 
 def ingest_resume(
     file_path: str,
     *,
     collection: Optional[Collection] = None,
-    model: Optional[SentenceTransformer] = None,
+    model: Optional["SentenceTransformer"] = None,
     extracted_text: Optional[str] = None,
+    flush_policy: Optional[FlushPolicy] = None,
+    dedup_cache: Optional[DedupCache] = None,
 ) -> List[str]:
-    """Ingest a resume PDF into Milvus and return the created chunks."""
-
-    collection = collection or get_or_create_collection()
-    model = model or SentenceTransformer(settings.embedding_model_name)
+    """Ingest a resume PDF into Milvus and return the created chunks.
 
-    raw_text = extracted_text if extracted_text is not None else extract_text_from_pdf(file_path)
-    text_chunks = chunk_text(raw_text)
-
-    # SentenceTransformer.encode accepts a sequence of strings and returns a list of embeddings.
-    embeddings: Sequence[Sequence[float]] = model.encode(text_chunks, show_progress_bar=False)
+    With a dedup cache configured, an unchanged file is skipped and its cached chunks are
+    returned, and a changed file replaces the candidate's previous rows.
+    """
 
-    candidate_name = Path(file_path).stem
-    skills: List[str] = []
+    cache = dedup_cache or get_dedup_cache()
+    file_hash = None
+    if cache is not None:
+        file_hash = hash_file(file_path) if Path(file_path).is_file() else hash_text(extracted_text or "")
+        cached_chunks = cache.get_document(file_hash)
+        if cached_chunks is not None:
+            return cached_chunks
 
-    data = [
-        list(embeddings),
-        text_chunks,
-        [candidate_name for _ in text_chunks],
-        [skills for _ in text_chunks],
-    ]
-
-    collection.insert(
-        data,
-        fields=["embedding", "text_chunk", "candidate_name", "skills"],
+    raw_text = extracted_text if extracted_text is not None else extract_text_from_pdf(file_path)
+    return ingest_chunks(
+        Path(file_path).stem,
+        chunk_text(raw_text),
+        file_hash=file_hash,
+        profile_text=raw_text,
+        collection=collection,
+        model=model,
+        flush_policy=flush_policy,
+        dedup_cache=cache,
     )
-    collection.flush()
-
-    return text_chunks
@@ -0,0 +1,92 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class IncrementalJSONObjectParser:
+    """Emit the top-level fields of a JSON object as soon as each one is complete.
+
+    Text is fed in arbitrary fragments (e.g. LLM tokens). Each character is scanned once:
+    the parser tracks string/escape state and nesting depth, and when a top-level value
+    ends (``,`` or the closing ``}`` at depth 1) the value's slice is decoded with
+    ``json.loads``. Anything before the first ``{`` (such as a Markdown fence) is ignored.
+    Malformed fields are skipped; the full payload is still parsed at the end of the stream.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expecting_value = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start = 0
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, fragment: str) -> List[Tuple[str, Any]]:
+        """Consume ``fragment`` and return the ``(key, value)`` pairs it completed."""
+
+        completed: List[Tuple[str, Any]] = []
+        if not fragment:
+            return completed
+        self._text += fragment
+        text = self._text
+        for index in range(self._position, len(text)):
+            if self.done:
+                break
+            char = text[index]
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and not self._expecting_value and self._key_start is not None:
+                        self._key = self._decode(text[self._key_start : index + 1])
+                        self._key_start = None
+                continue
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and not self._expecting_value:
+                    self._key_start = index
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    self._complete(text[self._value_start : index], completed)
+                    self.done = True
+                self._depth -= 1
+            elif self._depth == 1:
+                if char == ":" and not self._expecting_value:
+                    self._expecting_value = True
+                    self._value_start = index + 1
+                elif char == "," and self._expecting_value:
+                    self._complete(text[self._value_start : index], completed)
+        self._position = len(text)
+        return completed
+
+    def _complete(self, raw_value: str, completed: List[Tuple[str, Any]]) -> None:
+        if self._expecting_value and self._key is not None and raw_value.strip():
+            try:
+                completed.append((self._key, json.loads(raw_value)))
+            except json.JSONDecodeError:
+                pass
+        self._expecting_value = False
+        self._key = None
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[str]:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
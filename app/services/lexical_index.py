@@ -0,0 +1,287 @@
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymilvus import Collection
+
+from app.core.config import settings
+from app.services.milvus_client import has_field
+from app.services.skill_extraction import UNKNOWN_YEARS
+
+# Called as predicate(candidate_name, skills, years_experience) to filter lexical hits.
+HitPredicate = Callable[[str, Sequence[str], int], bool]
+
+logger = logging.getLogger(__name__)
+
+# Keeps skill tokens such as "c++", "c#", "node.js" and "ci-cd" intact.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over chunk texts.
+
+    Postings map a term to ``{doc_id: term frequency}``. Documents are added per insert
+    batch and removed per candidate, mirroring what the ingest path does to Milvus.
+    """
+
+    def __init__(self, k1: float = settings.bm25_k1, b: float = settings.bm25_b):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._docs: Dict[int, Tuple[str, str, int]] = {}
+        self._profiles: Dict[int, Tuple[List[str], int]] = {}
+        self._by_candidate: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._total_length = 0
+        # While a rebuild scans the collection, changes are recorded here and replayed
+        # onto the rebuilt index before it is swapped in.
+        self._journal: Optional[List[Callable[["BM25Index"], Any]]] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(
+        self,
+        text_chunks: Sequence[str],
+        candidate_names: Sequence[str],
+        skills: Optional[Sequence[List[str]]] = None,
+        years_experience: Optional[Sequence[int]] = None,
+    ) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(
+                    lambda index: index.add(text_chunks, candidate_names, skills, years_experience)
+                )
+            for position, (text, name) in enumerate(zip(text_chunks, candidate_names)):
+                terms = Counter(tokenize(text))
+                doc_id = self._next_id
+                self._next_id += 1
+                length = sum(terms.values())
+                self._docs[doc_id] = (name, text, length)
+                self._profiles[doc_id] = (
+                    list(skills[position]) if skills is not None else [],
+                    years_experience[position] if years_experience is not None else UNKNOWN_YEARS,
+                )
+                self._by_candidate.setdefault(name, []).append(doc_id)
+                self._total_length += length
+                for term, frequency in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove_candidate(self, candidate_name: str) -> int:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(lambda index: index.remove_candidate(candidate_name))
+            doc_ids = self._by_candidate.pop(candidate_name, [])
+            for doc_id in doc_ids:
+                _, text, length = self._docs.pop(doc_id)
+                self._profiles.pop(doc_id, None)
+                self._total_length -= length
+                for term in set(tokenize(text)):
+                    postings = self._postings.get(term)
+                    if postings is not None:
+                        postings.pop(doc_id, None)
+                        if not postings:
+                            del self._postings[term]
+            return len(doc_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._profiles.clear()
+            self._by_candidate.clear()
+            self._total_length = 0
+            self.ready = False
+
+    def record_changes(self) -> None:
+        """Start recording adds and removals for :meth:`swap_in`."""
+
+        with self._lock:
+            self._journal = []
+
+    def stop_recording(self) -> None:
+        with self._lock:
+            self._journal = None
+
+    def swap_in(self, fresh: "BM25Index") -> None:
+        """Replay the recorded changes onto ``fresh`` and take over its contents."""
+
+        with self._lock:
+            for change in self._journal or []:
+                change(fresh)
+            self._journal = None
+            self._postings = fresh._postings
+            self._docs = fresh._docs
+            self._profiles = fresh._profiles
+            self._by_candidate = fresh._by_candidate
+            self._next_id = fresh._next_id
+            self._total_length = fresh._total_length
+            self.ready = True
+
+    def search(
+        self, query: str, limit: int, predicate: Optional[HitPredicate] = None
+    ) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` hits shaped like vector-search hits, best BM25 score first.
+
+        ``predicate`` drops documents before ranking, mirroring a Milvus filter expression.
+        """
+
+        with self._lock:
+            count = len(self._docs)
+            if not count or limit <= 0:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[int, float] = {}
+            allowed: Dict[int, bool] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if predicate is not None:
+                        if doc_id not in allowed:
+                            allowed[doc_id] = self._allowed(doc_id, predicate)
+                        if not allowed[doc_id]:
+                            continue
+                    length = self._docs[doc_id][2]
+                    norm = self.k1 * (1.0 - self.b + self.b * length / average_length)
+                    weight = idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                {
+                    "candidate_name": self._docs[doc_id][0],
+                    "text_chunk": self._docs[doc_id][1],
+                    "skills": self._profiles[doc_id][0],
+                    "score": score,
+                }
+                for doc_id, score in best
+            ]
+
+    def _allowed(self, doc_id: int, predicate: HitPredicate) -> bool:
+        skills, years = self._profiles[doc_id]
+        return predicate(self._docs[doc_id][0], skills, years)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "documents": len(self._docs),
+                "terms": len(self._postings),
+                "candidates": len(self._by_candidate),
+            }
+
+
+_index = BM25Index()
+_build_lock = threading.Lock()
+
+
+def get_lexical_index() -> BM25Index:
+    return _index
+
+
+def lexical_index_for(collection: Collection) -> Optional[BM25Index]:
+    """Return the shared index if ``collection`` is the configured one and indexing is on."""
+
+    if not settings.lexical_index_enabled:
+        return None
+    if getattr(collection, "name", None) != settings.milvus_collection:
+        return None
+    return _index
+
+
+def _iter_collection_rows(collection: Collection, batch_size: int) -> Iterable[List[dict]]:
+    iterator = collection.query_iterator(
+        batch_size=batch_size,
+        expr="",
+        output_fields=[
+            name
+            for name in ("text_chunk", "candidate_name", "skills", "years_experience")
+            if name in ("text_chunk", "candidate_name") or has_field(collection, name)
+        ],
+    )
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                return
+            yield batch
+    finally:
+        iterator.close()
+
+
+def rebuild_lexical_index(collection: Collection, batch_size: int = 1000) -> BM25Index:
+    """Rebuild the shared index from every row of ``collection``.
+
+    The rows are indexed into a fresh index without holding the shared index's lock, so
+    searches and inserts go on during the scan. Inserts and removals made meanwhile are
+    replayed onto the fresh index before it is swapped in (a row written during the scan
+    may be indexed twice until the next rebuild).
+    """
+
+    with _build_lock:
+        return _rebuild(collection, batch_size)
+
+
+def _rebuild(collection: Collection, batch_size: int) -> BM25Index:
+    fresh = BM25Index(k1=_index.k1, b=_index.b)
+    _index.record_changes()
+    try:
+        for batch in _iter_collection_rows(collection, batch_size):
+            fresh.add(
+                [row.get("text_chunk") or "" for row in batch],
+                [row.get("candidate_name") or "Unknown" for row in batch],
+                [row.get("skills") or [] for row in batch],
+                [row.get("years_experience", UNKNOWN_YEARS) for row in batch],
+            )
+    except BaseException:
+        _index.stop_recording()
+        raise
+    _index.swap_in(fresh)
+    logger.info("Lexical index rebuilt with %d chunks", len(_index))
+    return _index
+
+
+def ensure_lexical_index(collection: Collection) -> Optional[BM25Index]:
+    """Return the shared index for ``collection``, building it on first use.
+
+    While another thread is building it (e.g. the startup rebuild), returns ``None`` instead
+    of waiting for the scan, so the search falls back to vector-only results.
+    """
+
+    index = lexical_index_for(collection)
+    if index is None or index.ready:
+        return index
+    if not _build_lock.acquire(blocking=False):
+        return None
+    try:
+        if not index.ready:
+            _rebuild(collection, 1000)
+    finally:
+        _build_lock.release()
+    return index
+
+
+def start_lexical_index_rebuild(collection: Collection) -> threading.Thread:
+    """Rebuild the index on a background thread; hybrid searches use vector results meanwhile."""
+
+    def _run() -> None:
+        try:
+            ensure_lexical_index(collection)
+        except Exception:  # pragma: no cover - depends on Milvus availability
+            logger.exception("Lexical index rebuild failed")
+
+    thread = threading.Thread(target=_run, name="lexical-index-rebuild", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,234 @@
+import asyncio
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.caches import LRUCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    fingerprint TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def prompt_fingerprint(
+    *,
+    provider: str,
+    model: str,
+    temperature: Optional[float],
+    system_instruction: str,
+    prompt_template: str,
+    candidate_profile: str,
+    job_description: str,
+) -> str:
+    """Hash everything that determines the LLM response for a match request."""
+
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "temperature": temperature,
+            "system_instruction": system_instruction,
+            "prompt_template": prompt_template,
+            "candidate_profile": _normalize(candidate_profile),
+            "job_description": _normalize(job_description),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Size-bounded cache of parsed LLM responses with optional SQLite persistence.
+
+    Concurrent requests for the same fingerprint are coalesced (single-flight): only the
+    first caller reaches the provider and the others wait for its result. Failures are
+    never cached.
+    """
+
+    def __init__(self, max_entries: int, path: Optional[str] = None):
+        self.max_entries = max(max_entries, 1)
+        self._memory = LRUCache(self.max_entries)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, "Future[Dict[str, Any]]"] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        value = self._memory.get(fingerprint)
+        if value is None and self._conn is not None:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT response FROM responses WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE fingerprint = ?",
+                        (time.time(), fingerprint),
+                    )
+            if row is not None:
+                value = json.loads(row[0])
+                self._memory.put(fingerprint, value)
+        return copy.deepcopy(value) if value is not None else None
+
+    def put(self, fingerprint: str, response: Dict[str, Any]) -> None:
+        self._memory.put(fingerprint, copy.deepcopy(response))
+        if self._conn is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (fingerprint, json.dumps(response), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE fingerprint IN ("
+                " SELECT fingerprint FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def get_or_compute(
+        self, fingerprint: str, compute: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        while True:
+            cached = self.get(fingerprint)
+            if cached is not None:
+                return cached
+            future, leader = self._join(fingerprint)
+            if not leader:
+                response = future.result()
+                if response is None:  # the leader was cancelled; take over or join the next one
+                    continue
+                return copy.deepcopy(response)
+            try:
+                response = compute()
+            except BaseException as exc:
+                self._finish(fingerprint, future, error=exc)
+                raise
+            self._finish(fingerprint, future, response=response)
+            return response
+
+    async def get_or_compute_async(
+        self, fingerprint: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        while True:
+            cached = self.get(fingerprint)
+            if cached is not None:
+                return cached
+            future, leader = self._join(fingerprint)
+            if not leader:
+                # Shielded: a cancelled follower must not cancel the shared future.
+                response = await asyncio.shield(asyncio.wrap_future(future))
+                if response is None:  # the leader was cancelled; take over or join the next one
+                    continue
+                return copy.deepcopy(response)
+            try:
+                response = await compute()
+            except asyncio.CancelledError:
+                # The leader's own timeout or disconnect is not the followers' failure.
+                self._abandon(fingerprint, future)
+                raise
+            except BaseException as exc:
+                self._finish(fingerprint, future, error=exc)
+                raise
+            self._finish(fingerprint, future, response=response)
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "memory": self._memory.stats(),
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+        }
+        if self._conn is not None:
+            with self._lock:
+                row = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+                stats["disk_entries"] = row[0]
+        return stats
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+    def _join(self, fingerprint: str) -> Tuple["Future[Dict[str, Any]]", bool]:
+        with self._lock:
+            future = self._inflight.get(fingerprint)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[fingerprint] = future
+            self.upstream_calls += 1
+            return future, True
+
+    def _abandon(self, fingerprint: str, future: "Future[Dict[str, Any]]") -> None:
+        """Release a cancelled leader's slot; waiting followers retry (one becomes the leader)."""
+
+        with self._lock:
+            if self._inflight.get(fingerprint) is future:
+                del self._inflight[fingerprint]
+        future.set_result(None)
+
+    def _finish(
+        self,
+        fingerprint: str,
+        future: "Future[Dict[str, Any]]",
+        *,
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if error is None:
+            self.put(fingerprint, response)
+        with self._lock:
+            self._inflight.pop(fingerprint, None)
+        if error is None:
+            future.set_result(response)
+        else:
+            future.set_exception(error)
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the shared response cache, or ``None`` when ``LLM_CACHE_ENABLED`` is false."""
+
+    global _cache
+    if not settings.llm_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(settings.llm_cache_max_entries, settings.llm_cache_path)
+        return _cache
+
+
+def close_llm_cache() -> None:
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
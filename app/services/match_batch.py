@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import openai
+
+from app.core.config import settings
+from app.services.concurrency import llm_slot, run_milvus
+from app.services.reasoning_engine import analyze_match_async
+from app.services.reranker import score_profiles
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchCandidate:
+    candidate_profile: str
+    candidate_id: Optional[str] = None
+
+
+@dataclass
+class MatchOutcome:
+    index: int
+    candidate_id: Optional[str]
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    rerank_score: Optional[float] = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+    @property
+    def status(self) -> str:
+        if self.skipped:
+            return "skipped"
+        return "ok" if self.ok else "error"
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "candidate_id": self.candidate_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "rerank_score": self.rerank_score,
+        }
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code
+    try:
+        from google.genai import errors as genai_errors
+    except ImportError:  # pragma: no cover - google-genai is optional at runtime
+        return None
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection errors, 429s and 5xx responses are worth another attempt."""
+
+    # A CancelledError that did not target the caller's task leaked from a shared call.
+    if isinstance(exc, (asyncio.TimeoutError, asyncio.CancelledError, openai.APIConnectionError)):
+        return True
+    status = _status_code(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, exc: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, stretched to honour a ``Retry-After`` header."""
+
+    ceiling = min(
+        settings.llm_retry_backoff_seconds * (2 ** (attempt - 1)),
+        settings.llm_retry_max_backoff_seconds,
+    )
+    delay = random.uniform(0, ceiling)
+    retry_after = _retry_after(exc) if exc is not None else None
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.llm_retry_max_backoff_seconds))
+    return delay
+
+
+async def analyze_candidate(
+    index: int,
+    candidate: BatchCandidate,
+    job_description: str,
+    *,
+    timeout: Optional[float] = None,
+    max_attempts: Optional[int] = None,
+) -> MatchOutcome:
+    """Score one candidate with a per-call timeout and jittered retries.
+
+    Failures become an error outcome; only cancelling this task itself propagates.
+
+    Each attempt holds an LLM slot only while the call is in flight, so a candidate sleeping
+    in backoff does not block others.
+    """
+
+    timeout = settings.llm_call_timeout_seconds if timeout is None else timeout
+    max_attempts = max(settings.llm_max_attempts if max_attempts is None else max_attempts, 1)
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with llm_slot():
+                result = await asyncio.wait_for(
+                    analyze_match_async(
+                        candidate_profile=candidate.candidate_profile,
+                        job_description=job_description,
+                    ),
+                    timeout,
+                )
+            return MatchOutcome(index, candidate.candidate_id, attempt, result=result)
+        except (Exception, asyncio.CancelledError) as exc:
+            if isinstance(exc, asyncio.CancelledError) and asyncio.current_task().cancelling():
+                raise  # this task itself was cancelled (batch closed or client gone)
+            if attempt < max_attempts and is_retryable(exc):
+                await asyncio.sleep(backoff_delay(attempt, exc))
+                continue
+            if isinstance(exc, asyncio.TimeoutError):
+                error = f"timed out after {timeout:g}s"
+            elif isinstance(exc, asyncio.CancelledError):
+                error = "cancelled upstream"
+            else:
+                error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Match for candidate %s failed after %d attempt(s): %s", index, attempt, error)
+            return MatchOutcome(index, candidate.candidate_id, attempt, error=error)
+
+
+async def iter_match_batch(
+    job_description: str,
+    candidates: Sequence[BatchCandidate],
+    *,
+    rerank_top_m: Optional[int] = None,
+    **options: Any,
+) -> AsyncIterator[MatchOutcome]:
+    """Fan out over all candidates and yield outcomes in completion order.
+
+    With ``rerank_top_m`` (default ``MATCH_BATCH_RERANK_TOP_M``; ``0`` disables it) a larger
+    batch is first scored by the cross-encoder and only the best ``rerank_top_m`` candidates
+    are sent to the LLM; the rest are yielded first as ``skipped``.
+
+    Concurrency is capped by the shared LLM semaphore. If the consumer stops early (e.g. a
+    streaming client disconnects) the remaining calls are cancelled.
+    """
+
+    top_m = settings.match_batch_rerank_top_m if rerank_top_m is None else rerank_top_m
+    selected = list(range(len(candidates)))
+    scores: Optional[List[float]] = None
+    if top_m > 0 and len(candidates) > top_m:
+        profiles = [candidate.candidate_profile for candidate in candidates]
+        scores = await run_milvus(score_profiles, job_description, profiles)
+        selected = sorted(selected, key=lambda index: scores[index], reverse=True)[:top_m]
+        chosen = set(selected)
+        for index, candidate in enumerate(candidates):
+            if index not in chosen:
+                yield MatchOutcome(index, candidate.candidate_id, 0, rerank_score=scores[index], skipped=True)
+
+    tasks = [
+        asyncio.ensure_future(analyze_candidate(index, candidates[index], job_description, **options))
+        for index in selected
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            outcome = await next_done
+            if scores is not None:
+                outcome.rerank_score = scores[outcome.index]
+            yield outcome
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def rank_candidates(
+    job_description: str,
+    candidates: Sequence[BatchCandidate],
+    **options: Any,
+) -> List[MatchOutcome]:
+    """Score every candidate concurrently and return the outcomes in input order."""
+
+    outcomes = [outcome async for outcome in iter_match_batch(job_description, candidates, **options)]
+    return sorted(outcomes, key=lambda outcome: outcome.index)
+
+
+def ranking(outcomes: Sequence[MatchOutcome]) -> List[int]:
+    """Indices of the successful outcomes, best ``match_score`` first."""
+
+    def score(outcome: MatchOutcome) -> float:
+        try:
+            return float(outcome.result.get("match_score", 0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    scored = [outcome for outcome in outcomes if outcome.ok and isinstance(outcome.result, dict)]
+    return [outcome.index for outcome in sorted(scored, key=score, reverse=True)]
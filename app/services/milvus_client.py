@@ -1,17 +1,87 @@
-from typing import Optional
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, TypeVar
 
-from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, connections, utility
+from pymilvus import (
+    Collection,
+    CollectionSchema,
+    DataType,
+    FieldSchema,
+    MilvusException,
+    connections,
+    utility,
+)
+from pymilvus.exceptions import (
+    ConnectError,
+    ConnectionNotExistException,
+    MilvusUnavailableException,
+    ParamError,
+)
 
 from app.core.config import settings
+from app.services.index_profiles import LIVE_SCHEMA_TTL_SECONDS, forget_index_profile, vector_index_params
+from app.services.vector_store import (
+    VectorCollection,
+    close_local_collections,
+    get_vector_backend,
+    open_local_collection,
+)
+from app.services.vector_storage import (
+    EMBEDDING_DIM,
+    STORAGE_TYPES,
+    collection_storage,
+    get_storage,
+)
 
+logger = logging.getLogger(__name__)
 
-FIELDS = [
-    FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-    FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384),
-    FieldSchema(name="text_chunk", dtype=DataType.VARCHAR, max_length=settings.text_chunk_max_length),
-    FieldSchema(name="candidate_name", dtype=DataType.VARCHAR, max_length=256),
-    FieldSchema(name="skills", dtype=DataType.JSON),
-]
+T = TypeVar("T")
+
+# The connection itself is broken; any other MilvusException is about the request.
+CONNECTION_ERRORS = (ConnectError, ConnectionNotExistException, MilvusUnavailableException)
+
+
+# v1: float32 embeddings and chunk text; v2: skills and years_experience;
+# v3: the embedding field type follows EMBEDDING_STORAGE (float32/float16/bfloat16/binary).
+SCHEMA_VERSION = 3
+
+
+def build_fields(storage: Optional[str] = None) -> List[FieldSchema]:
+    """Collection fields for the current schema version with ``storage`` embeddings."""
+
+    return [
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+        FieldSchema(name="embedding", dtype=STORAGE_TYPES[get_storage(storage)], dim=EMBEDDING_DIM),
+        FieldSchema(name="text_chunk", dtype=DataType.VARCHAR, max_length=settings.text_chunk_max_length),
+        FieldSchema(name="candidate_name", dtype=DataType.VARCHAR, max_length=256),
+        FieldSchema(name="skills", dtype=DataType.JSON),
+        FieldSchema(name="years_experience", dtype=DataType.INT32),
+    ]
+
+
+def schema_description(storage: Optional[str] = None) -> str:
+    return f"Resume embeddings (schema v{SCHEMA_VERSION}, {get_storage(storage)} vectors)"
+
+
+FIELDS = build_fields()
+
+# Scalar indexes that let filtered searches skip non-matching rows instead of post-filtering.
+SCALAR_INDEXES = {
+    "candidate_name": {"index_type": "INVERTED"},
+    "years_experience": {"index_type": "STL_SORT"},
+    "skills": {
+        "index_type": "INVERTED",
+        "params": {"json_path": "skills", "json_cast_type": "array_varchar"},
+    },
+}
+
+# Collection handles are created, indexed and loaded once per alias, then reused by every request.
+_collections: Dict[str, VectorCollection] = {}
+# When each cached Milvus handle's schema was last read (pymilvus caches it on the handle).
+_schema_checked_at: Dict[str, float] = {}
+_connected_aliases: set = set()
+_lock = threading.RLock()
 
 
 def _build_tls_kwargs() -> dict:
@@ -27,7 +97,7 @@ def _build_tls_kwargs() -> dict:
     return tls_kwargs
 
 
-def connect_milvus(alias: str = "default") -> None:
+def _connect(alias: str) -> None:
     tls_kwargs = _build_tls_kwargs()
     if settings.milvus_uri:
         connections.connect(
@@ -45,42 +115,231 @@ def connect_milvus(alias: str = "default") -> None:
     )
 
 
-def get_or_create_collection(alias: str = "default") -> Collection:
+def connect_milvus(alias: str = "default") -> None:
+    """Connect ``alias`` once, retrying with exponential backoff while Milvus is unreachable."""
+
+    with _lock:
+        if alias in _connected_aliases and connections.has_connection(alias):
+            return
+
+        attempts = max(settings.milvus_connect_retries, 0) + 1
+        for attempt in range(attempts):
+            try:
+                _connect(alias)
+                break
+            except MilvusException:
+                if attempt == attempts - 1:
+                    raise
+                delay = settings.milvus_connect_backoff_seconds * (2**attempt)
+                logger.warning(
+                    "Milvus connection attempt %d/%d failed; retrying in %.1fs",
+                    attempt + 1,
+                    attempts,
+                    delay,
+                )
+                time.sleep(delay)
+        _connected_aliases.add(alias)
+
+
+def has_field(collection: Collection, name: str) -> bool:
+    """Whether the schema has ``name``; collections created before a field was added lack it."""
+
+    schema = getattr(collection, "schema", None)
+    return schema is not None and any(item.name == name for item in schema.fields)
+
+
+def ensure_scalar_indexes(collection: Collection) -> None:
+    """Create any missing scalar/JSON-path indexes; servers without support only log a warning."""
+
+    if not settings.milvus_scalar_indexes:
+        return
+    indexed = {index.field_name for index in collection.indexes}
+    for field_name, index_params in SCALAR_INDEXES.items():
+        if field_name in indexed or not has_field(collection, field_name):
+            continue
+        try:
+            collection.create_index(
+                field_name=field_name,
+                index_params=index_params,
+                index_name=f"{field_name}_idx",
+            )
+        except MilvusException as exc:
+            logger.warning(
+                "Could not create %s index on %s: %s", index_params["index_type"], field_name, exc
+            )
+
+
+def get_or_create_collection(alias: str = "default") -> VectorCollection:
+    """Return the cached collection handle for ``alias``, creating and loading it if needed.
+
+    With ``VECTOR_BACKEND=local`` this is an in-process :class:`LocalCollection` with the same
+    API, and no Milvus server is contacted.
+    """
+
+    with _lock:
+        collection = _collections.get(alias)
+        if collection is None:
+            collection = _open_collection(alias)
+            _collections[alias] = collection
+            _schema_checked_at[alias] = time.monotonic()
+        elif time.monotonic() - _schema_checked_at.get(alias, 0.0) >= LIVE_SCHEMA_TTL_SECONDS:
+            collection = _recheck_schema(alias, collection)
+        return collection
+
+
+def _recheck_schema(alias: str, collection: VectorCollection) -> VectorCollection:
+    """Swap in a handle with the live schema, e.g. after an alias moved to a rebuilt collection.
+
+    Inserts and searches convert vectors to the handle's embedding storage, so a handle still
+    describing the old collection would send float32 vectors to a float16 field.
+    """
+
+    _schema_checked_at[alias] = time.monotonic()
+    if get_vector_backend() == "local":
+        return collection
+    try:
+        fresh = Collection(name=settings.milvus_collection, using=alias)
+    except MilvusException as exc:
+        logger.warning("Could not re-read the schema of %s: %s", settings.milvus_collection, exc)
+        return collection
+    if collection_storage(fresh) != collection_storage(collection):
+        logger.info(
+            "Collection %s now stores %s embeddings; using the new schema",
+            settings.milvus_collection,
+            collection_storage(fresh),
+        )
+        forget_index_profile(settings.milvus_collection)
+    _collections[alias] = fresh
+    return fresh
+
+
+def _open_collection(alias: str) -> VectorCollection:
+    if get_vector_backend() == "local":
+        # The local store keeps float32 vectors; EMBEDDING_STORAGE applies to Milvus only.
+        schema = CollectionSchema(fields=build_fields("float32"), description=schema_description("float32"))
+        return open_local_collection(settings.milvus_collection, schema)
+
     connect_milvus(alias=alias)
 
     if not utility.has_collection(settings.milvus_collection, using=alias):
-        schema = CollectionSchema(fields=FIELDS, description="Resume embeddings")
+        schema = CollectionSchema(fields=build_fields(), description=schema_description())
         collection = Collection(
             name=settings.milvus_collection,
             schema=schema,
             using=alias,
         )
-        collection.create_index(
-            field_name="embedding",
-            index_params={
-                "index_type": "HNSW",
-                "metric_type": "COSINE",
-                "params": {"M": 48, "efConstruction": 200},
-            },
-        )
+        collection.create_index(field_name="embedding", index_params=vector_index_params())
+        ensure_scalar_indexes(collection)
         collection.load()
         return collection
 
     collection = Collection(name=settings.milvus_collection, using=alias)
-    if not collection.has_index():
+    storage = collection_storage(collection)
+    if storage != get_storage():
+        logger.warning(
+            "Collection %s stores %s embeddings but EMBEDDING_STORAGE is %s; it keeps its "
+            "storage until converted with scripts/rebuild_index.py --storage",
+            settings.milvus_collection,
+            storage,
+            get_storage(),
+        )
+    if not any(index.field_name == "embedding" for index in collection.indexes):
         collection.create_index(
-            field_name="embedding",
-            index_params={
-                "index_type": "HNSW",
-                "metric_type": "COSINE",
-                "params": {"M": 48, "efConstruction": 200},
-            },
+            field_name="embedding", index_params=vector_index_params(storage=storage)
+        )
+    if not has_field(collection, "years_experience"):
+        logger.warning(
+            "Collection %s predates the years_experience field; years filters are unavailable "
+            "until it is recreated",
+            settings.milvus_collection,
         )
+    ensure_scalar_indexes(collection)
     collection.load()
     return collection
 
 
-def get_collection(alias: str = "default") -> Optional[Collection]:
-    if not utility.has_collection(settings.milvus_collection, using=alias):
-        return None
-    return Collection(name=settings.milvus_collection, using=alias)
+def get_collection(alias: str = "default") -> Optional[VectorCollection]:
+    with _lock:
+        collection = _collections.get(alias)
+        if collection is not None:
+            return collection
+        if get_vector_backend() == "local":
+            return get_or_create_collection(alias)
+        connect_milvus(alias=alias)
+        if not utility.has_collection(settings.milvus_collection, using=alias):
+            return None
+        return get_or_create_collection(alias)
+
+
+def refresh_collection(alias: str = "default") -> VectorCollection:
+    """Drop the cached handle and re-check the collection, its index and load state."""
+
+    with _lock:
+        _collections.pop(alias, None)
+        _schema_checked_at.pop(alias, None)
+        forget_index_profile(settings.milvus_collection)
+        return get_or_create_collection(alias)
+
+
+def reset_connection(alias: str = "default") -> None:
+    """Forget the cached handle and connection of ``alias``; the next use reconnects."""
+
+    with _lock:
+        _collections.pop(alias, None)
+        _schema_checked_at.pop(alias, None)
+        _connected_aliases.discard(alias)
+        try:
+            connections.disconnect(alias)
+        except MilvusException:  # pragma: no cover - best effort, the connection is already broken
+            logger.warning("Failed to disconnect Milvus alias %s", alias)
+
+
+def call_with_reconnect(
+    operation: Callable[[VectorCollection], T],
+    collection: VectorCollection,
+    *,
+    shared: bool = True,
+    retry: bool = True,
+    alias: str = "default",
+) -> T:
+    """Run ``operation(collection)``, reconnecting ``alias`` if its connection broke.
+
+    For the ``shared`` (cached) handle a connection error drops the handle and the
+    connection, so they are reopened through :func:`connect_milvus`'s backoff. With ``retry``
+    (searches) the operation runs once more on the new handle; otherwise (inserts, which may
+    have reached the server) the error is raised and the next call reconnects. Other Milvus
+    errors (a bad filter expression or search parameter) are raised unchanged and leave the
+    connection alone.
+    """
+
+    try:
+        return operation(collection)
+    except CONNECTION_ERRORS as exc:
+        if not shared or get_vector_backend() == "local":
+            raise
+        logger.warning("Milvus call on alias %s failed; reconnecting: %s", alias, exc)
+        reset_connection(alias)
+        if not retry:
+            raise
+        return operation(get_or_create_collection(alias))
+
+
+def is_request_error(exc: MilvusException) -> bool:
+    """Whether Milvus rejected the request itself, e.g. an invalid expression or parameter."""
+
+    return isinstance(exc, ParamError) or getattr(exc, "is_input_error", False)
+
+
+def is_milvus_ready(alias: str = "default") -> bool:
+    return alias in _collections
+
+
+def close_milvus(alias: Optional[str] = None) -> None:
+    with _lock:
+        aliases = [alias] if alias else list(_connected_aliases)
+        for name in aliases:
+            reset_connection(name)
+        if alias is None:
+            _collections.clear()
+            _schema_checked_at.clear()
+            close_local_collections()
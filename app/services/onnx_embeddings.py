@@ -0,0 +1,184 @@
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+# Imports only numpy here: onnxruntime and tokenizers are loaded with the model, and torch /
+# sentence-transformers only by ``export_onnx_model``, so an ONNX worker never imports torch.
+
+logger = logging.getLogger(__name__)
+
+ONNX_QUANTIZATIONS = {"fp32": "model.onnx", "int8": "model.int8.onnx"}
+CONFIG_FILE = "embedding_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def onnx_model_dir(model_name: str, root: Optional[str] = None) -> Path:
+    return Path(root or settings.embedding_onnx_dir) / model_name.replace("/", "--")
+
+
+def _quantization(quantization: Optional[str]) -> str:
+    quantization = (quantization or settings.embedding_onnx_quantization).lower()
+    if quantization not in ONNX_QUANTIZATIONS:
+        raise ValueError(f"Unknown ONNX quantization {quantization!r}; expected one of {sorted(ONNX_QUANTIZATIONS)}")
+    return quantization
+
+
+def pool_embeddings(hidden: np.ndarray, attention_mask: np.ndarray, mode: str = "mean") -> np.ndarray:
+    """Pool token states ``(batch, tokens, dim)`` into sentence vectors like SentenceTransformers."""
+
+    if mode == "cls":
+        return hidden[:, 0]
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def export_onnx_model(
+    model_name: Optional[str] = None,
+    output_dir: Optional[Union[str, Path]] = None,
+    quantize: bool = True,
+    opset: int = 17,
+) -> Path:
+    """Export a SentenceTransformer's encoder to ONNX (plus a dynamic int8 copy).
+
+    Needs torch and sentence-transformers; run once per model (``scripts/export_onnx_embeddings.py``).
+    """
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    name = model_name or settings.embedding_model_name
+    target = Path(output_dir) if output_dir else onnx_model_dir(name)
+    target.mkdir(parents=True, exist_ok=True)
+    source = SentenceTransformer(name, device="cpu")
+    source.eval()
+    pooling = next((module for module in source if isinstance(module, Pooling)), None)
+    pooling_config = pooling.get_config_dict() if pooling is not None else {}
+    # sentence-transformers < 6 stores one boolean per pooling mode.
+    pooling_mode = pooling_config.get("pooling_mode") or ("cls" if pooling_config.get("pooling_mode_cls_token") else "mean")
+    if pooling_mode not in ("mean", "cls"):
+        raise ValueError(f"Unsupported pooling mode {pooling_mode!r} for ONNX export")
+    dimension = getattr(source, "get_embedding_dimension", source.get_sentence_embedding_dimension)()
+    tokenizer = source.tokenizer
+    tokenizer.save_pretrained(str(target))
+    config = {
+        "model_name": name,
+        "dimension": dimension,
+        "max_seq_length": source.max_seq_length,
+        "pooling": pooling_mode,
+        "normalize": any(isinstance(module, Normalize) for module in source),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    (target / CONFIG_FILE).write_text(json.dumps(config, indent=2))
+
+    class _Encoder(torch.nn.Module):
+        # Token states only; pooling and normalization run in numpy at inference time.
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.encoder(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+    sample = tokenizer(["export sample"], return_tensors="pt", return_token_type_ids=True)
+    inputs = ["input_ids", "attention_mask", "token_type_ids"]
+    fp32_path = target / ONNX_QUANTIZATIONS["fp32"]
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(source[0].auto_model).eval(),
+            tuple(sample[key] for key in inputs),
+            str(fp32_path),
+            input_names=inputs,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{key: {0: "batch", 1: "tokens"} for key in inputs}, "last_hidden_state": {0: "batch", 1: "tokens"}},
+            opset_version=opset,
+            dynamo=False,
+        )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32_path), str(target / ONNX_QUANTIZATIONS["int8"]), weight_type=QuantType.QInt8)
+    logger.info("Exported %s to ONNX in %s", name, target)
+    return target
+
+
+class OnnxEmbeddingModel:
+    """A CPU ONNX Runtime encoder with the ``encode`` API the app uses from SentenceTransformer."""
+
+    def __init__(self, model_dir: Union[str, Path], quantization: Optional[str] = None, threads: Optional[int] = None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        self.quantization = _quantization(quantization)
+        self.config = json.loads((model_dir / CONFIG_FILE).read_text())
+        self.max_seq_length = int(self.config["max_seq_length"])
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        threads = settings.embedding_onnx_threads if threads is None else threads
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / ONNX_QUANTIZATIONS[self.quantization]), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {item.name for item in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.config["dimension"])
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([item.attention_mask for item in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([item.ids for item in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([item.type_ids for item in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {key: value for key, value in feeds.items() if key in self._inputs})[0]
+        return pool_embeddings(hidden, attention_mask, self.config["pooling"])
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        **_: object,
+    ) -> np.ndarray:
+        """Embed ``sentences`` into float32 rows; batches are length-sorted to limit padding."""
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda index: -len(texts[index]))
+        for offset in range(0, len(order), max(batch_size, 1)):
+            indices = order[offset : offset + batch_size]
+            vectors[indices] = self._encode_batch([texts[index] for index in indices])
+        if normalize_embeddings or self.config.get("normalize"):
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+
+def load_onnx_model(model_name: Optional[str] = None) -> OnnxEmbeddingModel:
+    """Load the exported model for ``model_name``, exporting it first when it is missing."""
+
+    name = model_name or settings.embedding_model_name
+    model_dir = onnx_model_dir(name)
+    quantization = _quantization(None)
+    if not (model_dir / ONNX_QUANTIZATIONS[quantization]).exists():
+        logger.warning("No ONNX export of %s in %s; exporting it now (imports torch once)", name, model_dir)
+        export_onnx_model(name, model_dir, quantize=quantization == "int8")
+    return OnnxEmbeddingModel(model_dir, quantization)
@@ -0,0 +1,313 @@
+import asyncio
+import io
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services.chunking import iter_chunks
+from app.services.concurrency import run_pdf
+
+# Kept free of model/Milvus imports so PDF worker processes start quickly; the PDF libraries
+# themselves are imported lazily by the backend that needs them.
+
+logger = logging.getLogger(__name__)
+
+PdfSource = Union[str, bytes, BinaryIO]
+
+
+class PdfExtractionTimeoutError(TimeoutError):
+    """Text extraction of one document exceeded ``PDF_EXTRACT_TIMEOUT_SECONDS``."""
+
+
+def _binary_stream(source: PdfSource) -> BinaryIO:
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return open(source, "rb")
+    source.seek(0)
+    return source
+
+
+class PdfExtractor(ABC):
+    """One PDF text backend: counts pages and yields the text of a page range."""
+
+    name = ""
+
+    @abstractmethod
+    def page_count(self, source: PdfSource) -> int:
+        """Number of pages in ``source``."""
+
+    @abstractmethod
+    def iter_pages(self, source: PdfSource, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Yield the text of pages ``[start, stop)`` in order."""
+
+
+class PdfiumExtractor(PdfExtractor):
+    """pypdfium2 (native PDFium): the fastest backend by a wide margin."""
+
+    name = "pypdfium2"
+
+    def _open(self, source: PdfSource):
+        import pypdfium2
+
+        if not isinstance(source, (str, bytes)):
+            source.seek(0)
+            source = source.read()
+        return pypdfium2.PdfDocument(source)
+
+    def page_count(self, source: PdfSource) -> int:
+        document = self._open(source)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    def iter_pages(self, source: PdfSource, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        document = self._open(source)
+        try:
+            for index in range(start, len(document) if stop is None else min(stop, len(document))):
+                page = document[index]
+                text_page = page.get_textpage()
+                try:
+                    yield text_page.get_text_range().replace("\r\n", "\n")
+                finally:
+                    text_page.close()
+                    page.close()
+        finally:
+            document.close()
+
+
+class PdfminerExtractor(PdfExtractor):
+    """pdfminer.six: pure Python, but with better layout analysis than PyPDF2."""
+
+    name = "pdfminer"
+
+    def page_count(self, source: PdfSource) -> int:
+        from pdfminer.pdfpage import PDFPage
+
+        stream = _binary_stream(source)
+        try:
+            return sum(1 for _ in PDFPage.get_pages(stream))
+        finally:
+            if isinstance(source, str):
+                stream.close()
+
+    def iter_pages(self, source: PdfSource, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        stream = _binary_stream(source)
+        manager = PDFResourceManager()
+        try:
+            for index, page in enumerate(PDFPage.get_pages(stream)):
+                if index < start:
+                    continue
+                if stop is not None and index >= stop:
+                    break
+                output = io.StringIO()
+                device = TextConverter(manager, output, laparams=LAParams())
+                PDFPageInterpreter(manager, device).process_page(page)
+                device.close()
+                yield output.getvalue().rstrip("\x0c")
+        finally:
+            if isinstance(source, str):
+                stream.close()
+
+
+class PyPDF2Extractor(PdfExtractor):
+    """PyPDF2: always installed, slowest; the last step of every fallback chain."""
+
+    name = "pypdf2"
+
+    def _reader(self, source: PdfSource):
+        from PyPDF2 import PdfReader
+
+        return PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+    def page_count(self, source: PdfSource) -> int:
+        return len(self._reader(source).pages)
+
+    def iter_pages(self, source: PdfSource, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        pages = self._reader(source).pages
+        for index in range(start, len(pages) if stop is None else min(stop, len(pages))):
+            yield pages[index].extract_text() or ""
+
+
+PDF_EXTRACTORS: Dict[str, PdfExtractor] = {
+    extractor.name: extractor for extractor in (PdfiumExtractor(), PdfminerExtractor(), PyPDF2Extractor())
+}
+FALLBACK_EXTRACTOR = "pypdf2"
+
+
+def extractor_chain(name: Optional[str] = None) -> List[PdfExtractor]:
+    """Backends to try in order: the configured one (``auto``: fastest first), then PyPDF2."""
+
+    name = (name or settings.pdf_extractor).lower()
+    if name == "auto":
+        return list(PDF_EXTRACTORS.values())
+    if name not in PDF_EXTRACTORS:
+        raise ValueError(f"Unknown PDF extractor {name!r}; expected auto or one of {sorted(PDF_EXTRACTORS)}")
+    chain = [PDF_EXTRACTORS[name]]
+    if name != FALLBACK_EXTRACTOR:
+        chain.append(PDF_EXTRACTORS[FALLBACK_EXTRACTOR])
+    return chain
+
+
+def _with_fallback(action, name: Optional[str] = None):
+    error: Optional[Exception] = None
+    for extractor in extractor_chain(name):
+        try:
+            return action(extractor)
+        except PdfExtractionTimeoutError:
+            raise
+        except ImportError:
+            continue
+        except Exception as exc:
+            logger.warning("PDF extractor %s failed (%s); trying the next one", extractor.name, exc)
+            error = exc
+    raise error or RuntimeError("No PDF extractor is available")
+
+
+def pdf_page_count(source: PdfSource, extractor: Optional[str] = None) -> int:
+    return _with_fallback(lambda backend: backend.page_count(source), extractor)
+
+
+def iter_page_range(
+    source: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    deadline: Optional[float] = None,
+    extractor: Optional[str] = None,
+) -> Iterator[str]:
+    """Lazily yield the text of pages ``[start, stop)``, one page at a time.
+
+    A backend that fails is replaced by the next one in the extractor chain, which resumes at
+    the page that failed. ``deadline`` (a ``time.time()`` value, so it works across worker
+    processes) is checked between pages.
+    """
+
+    position = start
+    error: Optional[Exception] = None
+    for backend in extractor_chain(extractor):
+        try:
+            for text in backend.iter_pages(source, position, stop):
+                if deadline is not None and time.time() > deadline:
+                    raise PdfExtractionTimeoutError("PDF text extraction timed out")
+                position += 1
+                yield text
+            return
+        except PdfExtractionTimeoutError:
+            raise
+        except ImportError:
+            continue
+        except Exception as exc:
+            logger.warning("PDF extractor %s failed (%s); trying the next one", backend.name, exc)
+            error = exc
+    raise error or RuntimeError("No PDF extractor is available")
+
+
+def extract_page_range(
+    source: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    deadline: Optional[float] = None,
+    extractor: Optional[str] = None,
+) -> List[str]:
+    """Text of pages ``[start, stop)`` as a list, for ranges extracted on separate workers."""
+
+    return list(iter_page_range(source, start, stop, deadline, extractor))
+
+
+def _deadline() -> Optional[float]:
+    timeout = settings.pdf_extract_timeout_seconds
+    return time.time() + timeout if timeout and timeout > 0 else None
+
+
+def iter_pdf_pages(source: PdfSource, deadline: Optional[float] = None) -> Iterator[str]:
+    return iter_page_range(source, deadline=_deadline() if deadline is None else deadline)
+
+
+def extract_text_from_pdf(source: PdfSource) -> str:
+    return "\n".join(iter_pdf_pages(source)).strip()
+
+
+def extract_chunks_from_pdf(source: PdfSource, deadline: Optional[float] = None) -> List[str]:
+    """Chunk each page as it is extracted, without building the full document string."""
+
+    return list(iter_chunks(iter_pdf_pages(source, deadline)))
+
+
+def chunk_pages(pages: List[str]) -> List[str]:
+    return list(iter_chunks(pages))
+
+
+def page_ranges(page_count: int, workers: int, min_pages: int) -> List[Tuple[int, int]]:
+    """Split a document into up to ``workers`` contiguous page ranges.
+
+    Documents shorter than ``min_pages`` stay whole; each range has at least half of
+    ``min_pages`` pages so the per-task overhead (shipping the PDF to a worker) pays off.
+    """
+
+    if workers <= 1 or page_count < max(min_pages, 2):
+        return [(0, page_count)]
+    parts = max(1, min(workers, page_count // max(min_pages // 2, 1)))
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for part in range(parts):
+        stop = start + size + (1 if part < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+async def _gather_until(deadline: Optional[float], *tasks):
+    # Workers stop at the next page boundary once the deadline passes; the grace period
+    # covers a single slow page.
+    timeout = None if deadline is None else max(deadline - time.time(), 0) + 1.0
+    try:
+        return await asyncio.wait_for(asyncio.gather(*tasks), timeout)
+    except asyncio.TimeoutError:
+        raise PdfExtractionTimeoutError("PDF text extraction timed out") from None
+
+
+async def extract_pdf_pages(source: bytes) -> List[str]:
+    """Extract page texts on the PDF worker pool, splitting long documents across workers.
+
+    Raises :class:`PdfExtractionTimeoutError` after ``PDF_EXTRACT_TIMEOUT_SECONDS``.
+    """
+
+    deadline = _deadline()
+    workers = max(settings.pdf_max_workers, 1)
+    if workers == 1:
+        tasks = [run_pdf(extract_page_range, source, 0, None, deadline)]
+    else:
+        page_count = await run_pdf(pdf_page_count, source)
+        tasks = [
+            run_pdf(extract_page_range, source, start, stop, deadline)
+            for start, stop in page_ranges(page_count, workers, settings.pdf_parallel_min_pages)
+        ]
+    parts = await _gather_until(deadline, *tasks)
+    return [page for part in parts for page in part]
+
+
+async def extract_pdf_text(source: bytes) -> str:
+    return "\n".join(await extract_pdf_pages(source)).strip()
+
+
+async def extract_pdf_chunks(source: bytes) -> List[str]:
+    """Chunks of an uploaded PDF, built on the PDF worker pool.
+
+    With a single worker, pages stream into the chunker as they are extracted. Otherwise the
+    page ranges are extracted in parallel and then chunked in one more pool task, since a
+    chunk can span pages.
+    """
+
+    if max(settings.pdf_max_workers, 1) == 1:
+        deadline = _deadline()
+        (chunks,) = await _gather_until(deadline, run_pdf(extract_chunks_from_pdf, source, deadline))
+        return chunks
+    return await run_pdf(chunk_pages, await extract_pdf_pages(source))
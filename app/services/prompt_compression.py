@@ -0,0 +1,113 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.chunking import chunk_text
+from app.services.embeddings import encode_texts
+from app.services.vector_storage import cosine_scores
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SEPARATOR = "\n[...]\n"
+# OpenAI's rule of thumb for English text, used only when no tokenizer can be loaded.
+CHARS_PER_TOKEN = 4
+
+_encodings: Dict[str, Any] = {}
+_encoding_lock = threading.Lock()
+
+
+def _encoding() -> Any:
+    """The tiktoken encoding for ``LLM_MODEL`` (or ``PROMPT_TOKENIZER``), or None if unavailable."""
+
+    name = settings.prompt_tokenizer or settings.llm_model
+    with _encoding_lock:
+        if name in _encodings:
+            return _encodings[name]
+        encoding = None
+        try:
+            import tiktoken
+
+            try:
+                encoding = tiktoken.encoding_for_model(name)
+            except KeyError:
+                encoding = tiktoken.get_encoding(settings.prompt_tokenizer or "o200k_base")
+        except ImportError:
+            logger.warning("tiktoken is not installed; prompt token counts are estimated")
+        except Exception as exc:  # the BPE file is downloaded on first use
+            logger.warning("Could not load tokenizer for %s (%s); prompt token counts are estimated", name, exc)
+        _encodings[name] = encoding
+        return encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text`` with the LLM's tokenizer (an estimate without tiktoken)."""
+
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class CompressedProfile:
+    text: str
+    original_tokens: int
+    tokens: int
+    chunks_kept: int
+    chunks_total: int
+    budget: int
+
+    @property
+    def compressed(self) -> bool:
+        return self.chunks_kept < self.chunks_total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "compressed": self.compressed,
+            "budget": self.budget,
+            "original_profile_tokens": self.original_tokens,
+            "profile_tokens": self.tokens,
+            "saved_tokens": self.original_tokens - self.tokens,
+            "chunks_kept": self.chunks_kept,
+            "chunks_total": self.chunks_total,
+        }
+
+
+def compress_profile(
+    candidate_profile: str,
+    job_description: str,
+    *,
+    budget: Optional[int] = None,
+    model: Optional[Any] = None,
+) -> CompressedProfile:
+    """Keep the profile chunks most relevant to the job description within a token budget.
+
+    Profiles within ``PROMPT_PROFILE_TOKEN_BUDGET`` (or with the budget at ``0``) are sent
+    unchanged. Longer ones are cut into ``PROMPT_COMPRESSION_CHUNK_SIZE``-word chunks with
+    ``chunk_text`` and embedded with the job description. Chunks are then taken by cosine
+    similarity while they fit; the best one is always kept. The kept chunks are joined in
+    their original order.
+    """
+
+    profile = candidate_profile.strip()
+    budget = settings.prompt_profile_token_budget if budget is None else budget
+    original_tokens = count_tokens(profile)
+    if budget <= 0 or original_tokens <= budget:
+        return CompressedProfile(profile, original_tokens, original_tokens, 1, 1, budget)
+
+    chunks = chunk_text(profile, chunk_size=settings.prompt_compression_chunk_size, overlap=0)
+    vectors = encode_texts([job_description.strip()] + chunks, model=model)
+    scores = cosine_scores(vectors[0], vectors[1:])
+    separator_tokens = count_tokens(CHUNK_SEPARATOR)
+
+    kept: List[int] = []
+    used = 0
+    for index in sorted(range(len(chunks)), key=lambda item: -scores[item]):
+        cost = count_tokens(chunks[index]) + (separator_tokens if kept else 0)
+        if used + cost <= budget or not kept:
+            kept.append(index)
+            used += cost
+    text = CHUNK_SEPARATOR.join(chunks[index] for index in sorted(kept))
+    return CompressedProfile(text, original_tokens, count_tokens(text), len(kept), len(chunks), budget)
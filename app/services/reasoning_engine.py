@@ -1,9 +1,14 @@
+import asyncio
 import json
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from app.core.config import settings
+from app.services.json_stream import IncrementalJSONObjectParser
+from app.services.llm_cache import get_llm_cache, prompt_fingerprint
+from app.services.prompt_compression import CompressedProfile, compress_profile
 
 SYSTEM_INSTRUCTION = "Provide transparent reasoning and follow JSON instructions precisely."
 
@@ -19,6 +24,114 @@ PROMPT_TEMPLATE = (
     "Return the response in strictly valid JSON format."
 )
 
+LLM_TEMPERATURE = 0.2
+
+_client_lock = threading.Lock()
+_async_openai_client: Optional[AsyncOpenAI] = None
+_async_gemini_client: Optional[Any] = None
+
+
+def _build_prompt(candidate_profile: str, job_description: str) -> str:
+    return PROMPT_TEMPLATE.format(
+        job_description=job_description.strip(),
+        candidate_profile=candidate_profile.strip(),
+    )
+
+
+def _provider_usage(completion: Any) -> Dict[str, Optional[int]]:
+    """Token counts reported by OpenAI (``usage``) or Gemini (``usage_metadata``), else None."""
+
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+        }
+    metadata = getattr(completion, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", None),
+        "completion_tokens": getattr(metadata, "candidates_token_count", None),
+        "total_tokens": getattr(metadata, "total_token_count", None),
+    }
+
+
+def _with_usage(result: Any, compressed: CompressedProfile, provider: Dict[str, Any]) -> Any:
+    """Attach per-call ``usage`` metadata; an empty ``provider`` means the cache answered."""
+
+    if not isinstance(result, dict):
+        return result
+    cached = not provider
+    return {
+        **result,
+        "usage": {
+            "prompt_tokens": 0 if cached else provider.get("prompt_tokens"),
+            "completion_tokens": 0 if cached else provider.get("completion_tokens"),
+            "total_tokens": 0 if cached else provider.get("total_tokens"),
+            "cached": cached,
+            "compression": compressed.stats(),
+        },
+    }
+
+
+def _openai_messages(prompt: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_INSTRUCTION,
+        },
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _gemini_config() -> Any:
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
+        response_mime_type="application/json",
+    )
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return a process-wide AsyncOpenAI client so its HTTP connection pool is reused."""
+
+    global _async_openai_client
+    with _client_lock:
+        if _async_openai_client is None:
+            # No SDK retries: analyze_candidate's jittered retries are the only retry layer,
+            # and each attempt stays a single upstream call within its timeout.
+            _async_openai_client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
+        return _async_openai_client
+
+
+def get_async_gemini_client() -> Any:
+    """Return a process-wide async Gemini client (``genai.Client(...).aio``)."""
+
+    global _async_gemini_client
+    if not settings.gemini_api_key:
+        raise ValueError("GEMINI_API_KEY is required when llm_provider is gemini.")
+    with _client_lock:
+        if _async_gemini_client is None:
+            from google import genai
+
+            _async_gemini_client = genai.Client(api_key=settings.gemini_api_key).aio
+        return _async_gemini_client
+
+
+def _match_fingerprint(candidate_profile: str, job_description: str, model: Optional[str]) -> str:
+    provider = settings.llm_provider.lower()
+    gemini = provider == "gemini"
+    return prompt_fingerprint(
+        provider=provider,
+        model=model or (settings.gemini_model if gemini else settings.llm_model),
+        temperature=None if gemini else LLM_TEMPERATURE,
+        system_instruction=SYSTEM_INSTRUCTION,
+        prompt_template=PROMPT_TEMPLATE,
+        candidate_profile=candidate_profile,
+        job_description=job_description,
+    )
+
 
 def analyze_match(
     candidate_profile: str,
@@ -27,19 +140,42 @@ def analyze_match(
     client: Optional[OpenAI] = None,
     model: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Call the LLM to generate a match analysis with chain-of-thought output."""
+    """Call the LLM to generate a match analysis with chain-of-thought output.
 
-    prompt = PROMPT_TEMPLATE.format(
-        job_description=job_description.strip(),
-        candidate_profile=candidate_profile.strip(),
-    )
+    Long profiles are first compressed to ``PROMPT_PROFILE_TOKEN_BUDGET`` tokens. The result
+    carries ``usage``: the provider's token counts (0 when served from the cache) and the
+    compression stats. Responses from the shared clients are cached by the fingerprint of
+    the prompt actually sent; an explicit ``client`` always reaches the provider.
+    """
+
+    compressed = compress_profile(candidate_profile, job_description)
+    provider: Dict[str, Any] = {}
+    cache = get_llm_cache() if client is None else None
+    if cache is None:
+        result = _complete_match(compressed.text, job_description, client=client, model=model, usage=provider)
+    else:
+        result = cache.get_or_compute(
+            _match_fingerprint(compressed.text, job_description, model),
+            lambda: _complete_match(compressed.text, job_description, model=model, usage=provider),
+        )
+    return _with_usage(result, compressed, provider)
+
+
+def _complete_match(
+    candidate_profile: str,
+    job_description: str,
+    *,
+    client: Optional[OpenAI] = None,
+    model: Optional[str] = None,
+    usage: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    prompt = _build_prompt(candidate_profile, job_description)
 
     if settings.llm_provider.lower() == "gemini":
         if not settings.gemini_api_key:
             raise ValueError("GEMINI_API_KEY is required when llm_provider is gemini.")
 
         from google import genai
-        from google.genai import types
 
         llm_client = genai.Client(api_key=settings.gemini_api_key)
         model_name = model or settings.gemini_model
@@ -47,11 +183,10 @@ def analyze_match(
         completion = llm_client.models.generate_content(
             model=model_name,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_INSTRUCTION,
-                response_mime_type="application/json",
-            ),
+            config=_gemini_config(),
         )
+        if usage is not None:
+            usage.update(_provider_usage(completion))
         content = completion.text or "{}"
         return _parse_json_content(content)
 
@@ -60,21 +195,165 @@ def analyze_match(
 
     completion = llm_client.chat.completions.create(
         model=model_name,
-        temperature=0.2,
+        temperature=LLM_TEMPERATURE,
+        response_format={"type": "json_object"},
+        messages=_openai_messages(prompt),
+    )
+    if usage is not None:
+        usage.update(_provider_usage(completion))
+
+    content = completion.choices[0].message.content or "{}"
+    return _parse_json_content(content)
+
+
+async def analyze_match_async(
+    candidate_profile: str,
+    job_description: str,
+    *,
+    client: Optional[AsyncOpenAI] = None,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Async variant of :func:`analyze_match` using shared, pooled async LLM clients."""
+
+    # Compression embeds chunks, so it runs off the event loop.
+    compressed = await asyncio.to_thread(compress_profile, candidate_profile, job_description)
+    provider: Dict[str, Any] = {}
+    cache = get_llm_cache() if client is None else None
+    if cache is None:
+        result = await _complete_match_async(
+            compressed.text, job_description, client=client, model=model, usage=provider
+        )
+    else:
+        result = await cache.get_or_compute_async(
+            _match_fingerprint(compressed.text, job_description, model),
+            lambda: _complete_match_async(compressed.text, job_description, model=model, usage=provider),
+        )
+    return _with_usage(result, compressed, provider)
+
+
+async def _complete_match_async(
+    candidate_profile: str,
+    job_description: str,
+    *,
+    client: Optional[AsyncOpenAI] = None,
+    model: Optional[str] = None,
+    usage: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    prompt = _build_prompt(candidate_profile, job_description)
+
+    if settings.llm_provider.lower() == "gemini":
+        llm_client = get_async_gemini_client()
+        completion = await llm_client.models.generate_content(
+            model=model or settings.gemini_model,
+            contents=prompt,
+            config=_gemini_config(),
+        )
+        if usage is not None:
+            usage.update(_provider_usage(completion))
+        content = completion.text or "{}"
+        return _parse_json_content(content)
+
+    llm_client = client or get_async_openai_client()
+    completion = await llm_client.chat.completions.create(
+        model=model or settings.llm_model,
+        temperature=LLM_TEMPERATURE,
         response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": SYSTEM_INSTRUCTION,
-            },
-            {"role": "user", "content": prompt},
-        ],
+        messages=_openai_messages(prompt),
     )
+    if usage is not None:
+        usage.update(_provider_usage(completion))
 
     content = completion.choices[0].message.content or "{}"
     return _parse_json_content(content)
 
 
+async def stream_match_completion(
+    candidate_profile: str,
+    job_description: str,
+    *,
+    client: Optional[AsyncOpenAI] = None,
+    model: Optional[str] = None,
+    usage: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """Yield the raw completion text as the provider streams it.
+
+    ``usage`` is filled with the provider's token counts, which arrive with the last chunk.
+    """
+
+    prompt = _build_prompt(candidate_profile, job_description)
+    if usage is not None:
+        usage.update(_provider_usage(None))
+
+    if settings.llm_provider.lower() == "gemini":
+        llm_client = get_async_gemini_client()
+        stream = await llm_client.models.generate_content_stream(
+            model=model or settings.gemini_model,
+            contents=prompt,
+            config=_gemini_config(),
+        )
+        async for chunk in stream:
+            if usage is not None and getattr(chunk, "usage_metadata", None) is not None:
+                usage.update(_provider_usage(chunk))
+            if chunk.text:
+                yield chunk.text
+        return
+
+    llm_client = client or get_async_openai_client()
+    stream = await llm_client.chat.completions.create(
+        model=model or settings.llm_model,
+        temperature=LLM_TEMPERATURE,
+        response_format={"type": "json_object"},
+        messages=_openai_messages(prompt),
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        if usage is not None and getattr(chunk, "usage", None) is not None:
+            usage.update(_provider_usage(chunk))
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def stream_match_analysis(
+    candidate_profile: str,
+    job_description: str,
+    *,
+    client: Optional[AsyncOpenAI] = None,
+    model: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Stream a match analysis as ``(event, data)`` pairs.
+
+    ``token`` events carry raw completion text, ``field`` events carry each top-level field
+    (``match_score``, ``green_flags``, ...) as soon as it is complete, and a final ``result``
+    event carries the whole payload parsed by :func:`_parse_json_content`, plus ``usage``.
+    Cached analyses are replayed as fields plus the result without calling the provider.
+    """
+
+    compressed = await asyncio.to_thread(compress_profile, candidate_profile, job_description)
+    cache = get_llm_cache() if client is None else None
+    fingerprint = _match_fingerprint(compressed.text, job_description, model) if cache else None
+    cached = cache.get(fingerprint) if cache else None
+    if cached is not None:
+        for name, value in cached.items():
+            yield "field", {"name": name, "value": value}
+        yield "result", _with_usage(cached, compressed, {})
+        return
+
+    provider: Dict[str, Any] = {}
+    parser = IncrementalJSONObjectParser()
+    async for text in stream_match_completion(
+        compressed.text, job_description, client=client, model=model, usage=provider
+    ):
+        yield "token", {"text": text}
+        for name, value in parser.feed(text):
+            yield "field", {"name": name, "value": value}
+
+    result = _parse_json_content(parser.text)
+    if cache is not None:
+        cache.put(fingerprint, result)
+    yield "result", _with_usage(result, compressed, provider)
+
+
 def _parse_json_content(content: str) -> Dict[str, Any]:
     content = content.strip()
     if not content:
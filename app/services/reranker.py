@@ -0,0 +1,125 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.chunking import chunk_text
+
+# sentence-transformers (torch) is imported when the reranker is first used, not at startup.
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_reranker(model_name: Optional[str] = None) -> Any:
+    """Return the process-wide cross-encoder, loading it on first use."""
+
+    name = model_name or settings.reranker_model_name
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(name, max_length=settings.reranker_max_length, device="cpu")
+            _models[name] = model
+            logger.info("Loaded reranker %s", name)
+        return model
+
+
+def reset_reranker_registry() -> None:
+    with _lock:
+        _models.clear()
+
+
+def score_pairs(query: str, texts: Sequence[str], *, model: Optional[Any] = None) -> List[float]:
+    """Cross-encoder relevance of each text to ``query`` (raw logits; higher is better).
+
+    All pairs go through ``predict`` in ``RERANKER_BATCH_SIZE`` batches.
+    """
+
+    if not texts:
+        return []
+    model = model or get_reranker()
+    scores = model.predict(
+        [(query, text) for text in texts],
+        batch_size=settings.reranker_batch_size,
+        show_progress_bar=False,
+    )
+    return [float(score) for score in scores]
+
+
+def rerank_hits(
+    query: str, hits: Sequence[Dict[str, Any]], top_m: int, *, model: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """Rescore chunk hits by cross-encoder and keep the best ``top_m``.
+
+    ``score`` becomes the cross-encoder score; the retrieval score is kept as ``retrieval_score``.
+    """
+
+    scores = score_pairs(query, [hit["text_chunk"] for hit in hits], model=model)
+    reranked = [{**hit, "retrieval_score": hit["score"], "score": score} for hit, score in zip(hits, scores)]
+    reranked.sort(key=lambda hit: hit["score"], reverse=True)
+    return reranked[:top_m]
+
+
+def rerank_candidates(
+    query: str,
+    candidates: Sequence[Dict[str, Any]],
+    *,
+    chunks_per_candidate: Optional[int] = None,
+    model: Optional[Any] = None,
+) -> List[Dict[str, Any]]:
+    """Rerank grouped candidates (``group_hits`` output) by their best supporting chunk.
+
+    Each candidate's first ``chunks_per_candidate`` chunks are scored in one batched pass;
+    the candidate's ``score`` becomes its best chunk's cross-encoder score.
+    """
+
+    per_candidate = max(chunks_per_candidate or settings.rerank_chunks_per_candidate, 1)
+    texts: List[str] = []
+    for candidate in candidates:
+        texts.extend(chunk["text"] for chunk in candidate["chunks"][:per_candidate])
+    scores = iter(score_pairs(query, texts, model=model))
+
+    reranked = []
+    for candidate in candidates:
+        chunks = [
+            {**chunk, "retrieval_score": chunk["score"], "score": next(scores)}
+            for chunk in candidate["chunks"][:per_candidate]
+        ]
+        chunks.sort(key=lambda chunk: chunk["score"], reverse=True)
+        reranked.append(
+            {
+                **candidate,
+                "retrieval_score": candidate["score"],
+                "score": chunks[0]["score"] if chunks else float("-inf"),
+                "chunks": chunks,
+            }
+        )
+    reranked.sort(key=lambda candidate: candidate["score"], reverse=True)
+    return reranked
+
+
+def score_profiles(
+    query: str,
+    profiles: Sequence[str],
+    *,
+    chunks_per_candidate: Optional[int] = None,
+    model: Optional[Any] = None,
+) -> List[float]:
+    """Score free-text candidate profiles by their best-matching chunk.
+
+    Long profiles are cut into chunks (cross-encoders truncate at ``RERANKER_MAX_LENGTH``
+    tokens) and only the first ``chunks_per_candidate`` are scored.
+    """
+
+    per_candidate = max(chunks_per_candidate or settings.rerank_chunks_per_candidate, 1)
+    spans, texts = [], []
+    for profile in profiles:
+        chunks = chunk_text(profile)[:per_candidate] or [profile]
+        spans.append((len(texts), len(texts) + len(chunks)))
+        texts.extend(chunks)
+    scores = score_pairs(query, texts, model=model)
+    return [max(scores[start:stop]) for start, stop in spans]
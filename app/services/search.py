@@ -1,38 +1,295 @@
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from pymilvus import Collection
-from sentence_transformers import SentenceTransformer
 
 from app.core.config import settings
-from app.services.milvus_client import get_collection, get_or_create_collection
+from app.services.dedup_cache import get_dedup_cache, hash_text
+from app.services.embeddings import embedding_model_key, encode_texts
+from app.services.index_profiles import search_params
+from app.services.lexical_index import ensure_lexical_index, lexical_index_for
+from app.services.milvus_client import call_with_reconnect, get_collection, get_or_create_collection
+from app.services.reranker import rerank_hits
+from app.services.search_filters import SearchFilters
+from app.services.search_cache import (
+    cache_query_vector,
+    collection_version,
+    get_cached_query_vector,
+    normalize_query_text,
+    search_results,
+)
+from app.services.vector_storage import collection_storage, cosine_scores, from_storage, to_storage
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+SEARCH_MODES = ("vector", "hybrid")
+# Milvus rejects larger topk values.
+MAX_SEARCH_LIMIT = 16384
+
+
+def embed_query(
+    text: str, *, model: Optional["SentenceTransformer"] = None
+) -> Tuple[Any, Optional[str]]:
+    """Embed a job description and return ``(vector, fingerprint)``.
+
+    With the shared default model, repeats of the same (whitespace-normalized) text are
+    served from an LRU. An explicit ``model`` is always called and has no fingerprint.
+    """
+
+    if model is not None:
+        return encode_texts([text], model=model)[0], None
+    cached = get_cached_query_vector(text)
+    if cached is None:
+        cached = cache_query_vector(text, encode_texts([normalize_query_text(text)])[0])
+    return cached
+
+
+def embed_queries(
+    texts: Sequence[str], *, model: Optional["SentenceTransformer"] = None
+) -> List[Tuple[Any, Optional[str]]]:
+    """Batch form of :func:`embed_query`: every uncached text is encoded in one call."""
+
+    if model is not None:
+        return [(vector, None) for vector in encode_texts(list(texts), model=model)]
+    entries: List[Optional[Tuple[Any, Optional[str]]]] = [get_cached_query_vector(text) for text in texts]
+    missing = [position for position, entry in enumerate(entries) if entry is None]
+    if missing:
+        vectors = encode_texts([normalize_query_text(texts[position]) for position in missing])
+        for position, vector in zip(missing, vectors):
+            entries[position] = cache_query_vector(texts[position], vector)
+    return entries
 
 
 def search_candidates(
     job_description_text: str,
     top_k: int = 5,
     *,
+    mode: Optional[str] = None,
+    filters: Optional[SearchFilters] = None,
+    params: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+    rerank: bool = False,
     collection: Optional[Collection] = None,
-    model: Optional[SentenceTransformer] = None,
+    model: Optional["SentenceTransformer"] = None,
 ) -> List[Tuple[str, float]]:
+    """Return the top matching chunks as ``("candidate: chunk", score)`` pairs.
+
+    ``mode="vector"`` scores by cosine similarity. ``mode="hybrid"`` also runs BM25 over
+    the lexical index and fuses both rankings with reciprocal rank fusion, so the score is
+    an RRF score. ``filters`` are pushed down into the Milvus search expression (and applied
+    to BM25 hits), so only matching rows are ranked. ``params`` (e.g. ``{"ef": 256}``) and
+    ``recall`` (``fast``/``balanced``/``high``) tune the index search knob. With ``rerank`` the
+    top ``RERANK_TOP_K`` retrieved chunks are rescored by the cross-encoder and the score is
+    the cross-encoder's. Results for the shared collection and
+    model are cached per (query vector, top_k, mode, filter, collection version) for
+    ``SEARCH_RESULT_CACHE_TTL_SECONDS``; any ingest invalidates them.
+    """
+
+    mode = mode or settings.search_mode
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of {SEARCH_MODES}")
+    shared_collection = collection is None
     collection = collection or get_collection() or get_or_create_collection()
-    model = model or SentenceTransformer(settings.embedding_model_name)
 
-    query_embedding = model.encode([job_description_text], show_progress_bar=False)[0]
+    expr = filters.to_expr() if filters else ""
+    query_embedding, fingerprint = embed_query(job_description_text, model=model)
+    cache_key = None
+    if shared_collection and fingerprint is not None:
+        cache_key = (
+            settings.milvus_collection,
+            collection_version(),
+            fingerprint,
+            top_k,
+            mode,
+            expr,
+            tuple(sorted((params or {}).items())),
+            recall,
+            rerank,
+        )
+        cached = search_results.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+    depth = max(settings.rerank_top_k, top_k) if rerank else top_k
+    vector_fallback = False
+
+    def retrieve(handle: Collection) -> List[Dict[str, Any]]:
+        nonlocal vector_fallback
+        index = ensure_lexical_index(handle) if mode == "hybrid" else None
+        if index is None:
+            # The BM25 index is still being built; serve vector hits without caching them.
+            vector_fallback = mode == "hybrid" and lexical_index_for(handle) is not None
+            return search_chunk_hits(
+                query_embedding, depth, handle, expr=expr, params=params, recall=recall, model=model
+            )
+        pool = max(settings.hybrid_candidate_pool, depth)
+        # Milvus works on the dense query while BM25 runs here; RRF needs both lists.
+        wait_dense = start_chunk_search(
+            query_embedding, pool, handle, expr=expr, params=params, recall=recall, model=model
+        )
+        lexical_hits = index.search(
+            job_description_text, pool, predicate=filters.matches if filters else None
+        )
+        return reciprocal_rank_fusion([wait_dense(), lexical_hits])[:depth]
+
+    hits = call_with_reconnect(retrieve, collection, shared=shared_collection)
+    if rerank:
+        hits = rerank_hits(job_description_text, hits, top_k)
+
+    matches = [(f"{hit['candidate_name']}: {hit['text_chunk']}", hit["score"]) for hit in hits]
+
+    if cache_key is not None and not vector_fallback:
+        search_results.put(cache_key, matches)
+    return matches
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Dict[str, Any]]], k: int = settings.hybrid_rrf_k
+) -> List[Dict[str, Any]]:
+    """Fuse ranked hit lists: each chunk scores ``sum(1 / (k + rank))`` over the lists."""
+
+    fused: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = (hit["candidate_name"], hit["text_chunk"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**hit, "score": 0.0}
+            elif not entry["skills"] and hit["skills"]:
+                entry["skills"] = hit["skills"]
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)
+
 
-    search_params = {"metric_type": "COSINE", "params": {"ef": 64}}
-    results = collection.search(
-        data=[query_embedding],
+def rescore_hits(
+    query_embedding: Any,
+    hits: List[Dict[str, Any]],
+    stored_vectors: Sequence[Any],
+    storage: str,
+    *,
+    model: Optional["SentenceTransformer"] = None,
+) -> List[Dict[str, Any]]:
+    """Re-rank coarse hits from compact vectors by exact float32 cosine similarity.
+
+    Full-precision chunk vectors come from the dedup cache when it holds them (shared model
+    only); otherwise float16/bfloat16 hits use their decoded stored vectors and binary hits
+    re-encode their chunk text.
+    """
+
+    if not hits:
+        return hits
+    vectors: List[Any] = [None] * len(hits)
+    cache = get_dedup_cache() if model is None else None
+    if cache is not None:
+        hashes = [hash_text(hit["text_chunk"] or "") for hit in hits]
+        cached = cache.get_embeddings(embedding_model_key(), hashes)
+        vectors = [cached.get(digest) for digest in hashes]
+    missing = [position for position, vector in enumerate(vectors) if vector is None]
+    if storage != "binary":
+        for position in missing:
+            vectors[position] = from_storage(stored_vectors[position], storage)
+    elif missing:
+        encoded = encode_texts([hits[position]["text_chunk"] or "" for position in missing], model=model)
+        for position, vector in zip(missing, encoded):
+            vectors[position] = vector
+
+    scores = cosine_scores(query_embedding, vectors)
+    rescored = [{**hit, "score": float(score)} for hit, score in zip(hits, scores)]
+    return sorted(rescored, key=lambda hit: hit["score"], reverse=True)
+
+
+def start_chunk_search(
+    query_embedding: Any,
+    limit: int,
+    collection: Collection,
+    *,
+    expr: str = "",
+    params: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+    model: Optional["SentenceTransformer"] = None,
+) -> Callable[[], List[Dict[str, Any]]]:
+    """Issue the vector search without waiting; call the returned function for the hits.
+
+    A non-empty ``expr`` is evaluated by Milvus before the ANN search (pre-filtering), using
+    the scalar and JSON-path indexes. On collections storing compact (float16, bfloat16 or
+    binary) vectors, ``EMBEDDING_RESCORE_FACTOR`` times ``limit`` hits are fetched and
+    re-ranked in full precision by :func:`rescore_hits`; binary hits are always rescored.
+    """
+
+    wait = start_chunk_search_many(
+        [query_embedding], limit, collection, expr=expr, params=params, recall=recall, model=model
+    )
+    return lambda: wait()[0]
+
+
+def start_chunk_search_many(
+    query_embeddings: Sequence[Any],
+    limit: int,
+    collection: Collection,
+    *,
+    expr: str = "",
+    params: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+    model: Optional["SentenceTransformer"] = None,
+) -> Callable[[], List[List[Dict[str, Any]]]]:
+    """:func:`start_chunk_search` for several query vectors in one ``collection.search``.
+
+    The returned function gives one hit list per query, in query order.
+    """
+
+    storage = collection_storage(collection)
+    factor = max(settings.embedding_rescore_factor, 1)
+    rescore = storage == "binary" or (storage != "float32" and factor > 1)
+    fetch = min(limit * factor, MAX_SEARCH_LIMIT) if rescore else limit
+    output_fields = ["text_chunk", "candidate_name", "skills"]
+    if rescore and storage != "binary":
+        output_fields.append("embedding")
+
+    pending = collection.search(
+        data=to_storage(list(query_embeddings), storage),
         anns_field="embedding",
-        param=search_params,
-        limit=top_k,
-        output_fields=["text_chunk", "candidate_name", "skills"],
+        param=search_params(collection, fetch, overrides=params, recall=recall),
+        limit=fetch,
+        expr=expr or None,
+        output_fields=output_fields,
+        consistency_level=settings.milvus_search_consistency_level,
+        _async=True,
     )
 
-    matches: List[Tuple[str, float]] = []
-    for hit in results[0]:
-        candidate_label = hit.entity.get("candidate_name") or "Unknown"
-        text_chunk = hit.entity.get("text_chunk")
-        score = float(hit.distance)
-        matches.append((f"{candidate_label}: {text_chunk}", score))
+    def wait() -> List[List[Dict[str, Any]]]:
+        results = pending.result() if hasattr(pending, "result") else pending
+        per_query = []
+        for query_embedding, result in zip(query_embeddings, results):
+            hits = [
+                {
+                    "candidate_name": hit.entity.get("candidate_name") or "Unknown",
+                    "text_chunk": hit.entity.get("text_chunk"),
+                    "skills": hit.entity.get("skills") or [],
+                    "score": float(hit.distance),
+                }
+                for hit in result
+            ]
+            if rescore:
+                stored = [hit.entity.get("embedding") for hit in result]
+                hits = rescore_hits(query_embedding, hits, stored, storage, model=model)[:limit]
+            per_query.append(hits)
+        return per_query
 
-    return matches
+    return wait
+
+
+def search_chunk_hits(
+    query_embedding: Any,
+    limit: int,
+    collection: Collection,
+    *,
+    expr: str = "",
+    params: Optional[Dict[str, Any]] = None,
+    recall: Optional[str] = None,
+    model: Optional["SentenceTransformer"] = None,
+) -> List[Dict[str, Any]]:
+    """Run the vector search and return hits as dicts, best first."""
+
+    return start_chunk_search(
+        query_embedding, limit, collection, expr=expr, params=params, recall=recall, model=model
+    )()
@@ -0,0 +1,58 @@
+import hashlib
+import threading
+from array import array
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.caches import LRUCache, TTLCache
+
+
+def normalize_query_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def vector_fingerprint(vector: Sequence[float]) -> str:
+    return hashlib.sha1(array("f", [float(value) for value in vector]).tobytes()).hexdigest()
+
+
+query_vectors = LRUCache(settings.query_embedding_cache_size)
+search_results = TTLCache(settings.search_result_cache_size, settings.search_result_cache_ttl_seconds)
+
+_version_lock = threading.Lock()
+_collection_version = 0
+
+
+def collection_version() -> int:
+    return _collection_version
+
+
+def bump_collection_version() -> int:
+    """Record a write to the collection; cached search results from older versions are dropped.
+
+    The version is per process, so other API workers see the write once their TTL expires.
+    """
+
+    global _collection_version
+    with _version_lock:
+        _collection_version += 1
+        version = _collection_version
+    search_results.clear()
+    return version
+
+
+def get_cached_query_vector(text: str) -> Optional[Tuple[Any, str]]:
+    return query_vectors.get(normalize_query_text(text))
+
+
+def cache_query_vector(text: str, vector: Any) -> Tuple[Any, str]:
+    entry = (vector, vector_fingerprint(vector))
+    query_vectors.put(normalize_query_text(text), entry)
+    return entry
+
+
+def search_cache_stats() -> Dict[str, Any]:
+    return {
+        "collection_version": _collection_version,
+        "query_vectors": query_vectors.stats(),
+        "search_results": search_results.stats(),
+    }
@@ -0,0 +1,103 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def _as_list(values: Any, name: str) -> List[Any]:
+    if isinstance(values, str):
+        return [values]
+    if not isinstance(values, (list, tuple)):
+        raise ValueError(f"{name} must be a string or a list of strings")
+    return list(values)
+
+
+def _normalize_skills(skills: Sequence[str], name: str = "skills") -> List[str]:
+    skills = _as_list(skills, name)
+    if not all(isinstance(skill, str) for skill in skills):
+        raise ValueError(f"{name} must be a string or a list of strings")
+    return [skill.strip().lower() for skill in skills if skill and skill.strip()]
+
+
+def _normalize_names(names: Sequence[str]) -> List[str]:
+    names = _as_list(names, "candidate_names")
+    if any(isinstance(name, bool) or not isinstance(name, (str, int)) for name in names):
+        raise ValueError("candidate_names must be a string or a list of strings")
+    return [str(name) for name in names]
+
+
+def _normalize_years(value: Any, name: str) -> Optional[int]:
+    """Whole years as an int, so Milvus and the BM25 predicate compare the same value."""
+
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a whole number of years")
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        years = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number of years") from None
+    if isinstance(value, float) and value != years:
+        raise ValueError(f"{name} must be a whole number of years")
+    return years
+
+
+@dataclass
+class SearchFilters:
+    """Structured search filters, compiled to a Milvus boolean expression.
+
+    Every value is quoted with ``json.dumps`` so user input cannot change the expression.
+    The same filters are applied in Python to lexical (BM25) hits via :meth:`matches`.
+    """
+
+    skills_all: List[str] = field(default_factory=list)
+    skills_any: List[str] = field(default_factory=list)
+    min_years: Optional[int] = None
+    max_years: Optional[int] = None
+    candidate_names: List[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.skills_all = _normalize_skills(self.skills_all, "skills_all")
+        self.skills_any = _normalize_skills(self.skills_any, "skills_any")
+        self.min_years = _normalize_years(self.min_years, "min_years")
+        self.max_years = _normalize_years(self.max_years, "max_years")
+        self.candidate_names = _normalize_names(self.candidate_names)
+
+    @classmethod
+    def from_dict(cls, payload: Optional[Dict[str, Any]]) -> Optional["SearchFilters"]:
+        if not payload:
+            return None
+        unknown = set(payload) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {sorted(unknown)}")
+        filters = cls(**payload)
+        return filters if filters.to_expr() else None
+
+    def to_expr(self) -> str:
+        clauses = []
+        if self.skills_all:
+            clauses.append(f"json_contains_all(skills, {json.dumps(self.skills_all)})")
+        if self.skills_any:
+            clauses.append(f"json_contains_any(skills, {json.dumps(self.skills_any)})")
+        if self.min_years is not None:
+            clauses.append(f"years_experience >= {self.min_years}")
+        if self.max_years is not None:
+            clauses.append(f"years_experience <= {self.max_years}")
+        if self.candidate_names:
+            clauses.append(f"candidate_name in {json.dumps(list(self.candidate_names))}")
+        return " and ".join(clauses)
+
+    def matches(self, candidate_name: str, skills: Sequence[str], years_experience: int) -> bool:
+        skill_set = set(skills)
+        if self.skills_all and not skill_set.issuperset(self.skills_all):
+            return False
+        if self.skills_any and skill_set.isdisjoint(self.skills_any):
+            return False
+        if self.min_years is not None and years_experience < self.min_years:
+            return False
+        if self.max_years is not None and years_experience > self.max_years:
+            return False
+        if self.candidate_names and candidate_name not in self.candidate_names:
+            return False
+        return True
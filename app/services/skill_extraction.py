@@ -0,0 +1,228 @@
+import json
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.core.config import settings
+
+# Canonical skill -> every surface form to match. Matching is case-insensitive and on word boundaries.
+# Extend or replace it with a JSON file of the same shape via SKILLS_TAXONOMY_PATH.
+DEFAULT_TAXONOMY: Dict[str, List[str]] = {
+    "python": ["python"],
+    "java": ["java"],
+    "javascript": ["javascript", "js", "ecmascript"],
+    "typescript": ["typescript"],
+    "go": ["golang", "go lang"],
+    "rust": ["rust"],
+    "c++": ["c++", "cpp"],
+    "c#": ["c#", "csharp", ".net", "dotnet"],
+    "ruby": ["ruby"],
+    "php": ["php"],
+    "scala": ["scala"],
+    "kotlin": ["kotlin"],
+    "swift": ["swift"],
+    "sql": ["sql"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "spring": ["spring boot", "spring framework"],
+    "rails": ["rails", "ruby on rails"],
+    "node.js": ["node.js", "nodejs"],
+    "react": ["react", "react.js", "reactjs"],
+    "angular": ["angular", "angularjs"],
+    "vue": ["vue", "vue.js", "vuejs"],
+    "graphql": ["graphql"],
+    "rest api": ["rest apis", "restful"],
+    "grpc": ["grpc"],
+    "postgresql": ["postgresql", "postgres"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"],
+    "elasticsearch": ["elasticsearch", "elastic search", "opensearch"],
+    "cassandra": ["cassandra"],
+    "dynamodb": ["dynamodb"],
+    "snowflake": ["snowflake"],
+    "kafka": ["kafka"],
+    "rabbitmq": ["rabbitmq"],
+    "spark": ["spark", "pyspark", "apache spark"],
+    "airflow": ["airflow"],
+    "dbt": ["dbt"],
+    "hadoop": ["hadoop"],
+    "aws": ["aws", "amazon web services"],
+    "gcp": ["gcp", "google cloud", "google cloud platform"],
+    "azure": ["azure"],
+    "docker": ["docker"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"],
+    "ansible": ["ansible"],
+    "ci/cd": ["ci/cd", "cicd", "continuous integration"],
+    "jenkins": ["jenkins"],
+    "github actions": ["github actions"],
+    "linux": ["linux"],
+    "git": ["git"],
+    "machine learning": ["machine learning", "ml"],
+    "deep learning": ["deep learning"],
+    "nlp": ["nlp", "natural language processing"],
+    "computer vision": ["computer vision"],
+    "pytorch": ["pytorch"],
+    "tensorflow": ["tensorflow"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "llm": ["llm", "llms", "large language models"],
+    "milvus": ["milvus"],
+    "microservices": ["microservices", "microservice"],
+    "agile": ["agile", "scrum"],
+}
+
+_YEARS_PATTERN = re.compile(
+    r"(\d{1,2})(?:\.\d+)?\s*\+?\s*(?:years?|yrs?)(?:\s+of)?(?:\s+\w+){0,3}?\s+experience",
+    re.IGNORECASE,
+)
+_RANGE_PATTERN = re.compile(
+    r"\b((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now|today)\b",
+    re.IGNORECASE,
+)
+# Years are capped so a stray number cannot produce an absurd value.
+_MAX_YEARS = 50
+UNKNOWN_YEARS = -1
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in "+#"
+
+
+class AhoCorasickMatcher:
+    """Multi-pattern matcher: one pass over the text finds every taxonomy term.
+
+    The goto/fail automaton is built once per taxonomy; matches are kept only when they sit
+    on word boundaries, so "java" does not fire inside "javascript".
+    """
+
+    def __init__(self, patterns: Mapping[str, str]):
+        # Node 0 is the root; each node has transitions, a fail link and (length, value) outputs.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        for pattern, value in patterns.items():
+            self._insert(pattern.lower(), value)
+        self._build_fail_links()
+
+    def _insert(self, pattern: str, value: str) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), value))
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[str]:
+        """Return matched values in order of first occurrence, without duplicates."""
+
+        lowered = text.lower()
+        found: Dict[str, None] = {}
+        node = 0
+        for end, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._output[node]:
+                start = end - length + 1
+                if start > 0 and _is_word_char(lowered[start - 1]) and _is_word_char(lowered[start]):
+                    continue
+                if end + 1 < len(lowered) and _is_word_char(lowered[end + 1]) and _is_word_char(char):
+                    continue
+                found.setdefault(value, None)
+        return list(found)
+
+
+def extract_years_experience(text: str, today: Optional[date] = None) -> int:
+    """Estimate years of experience, or ``UNKNOWN_YEARS`` when the text gives no signal.
+
+    An explicit "N years of experience" wins; otherwise the span from the earliest to the
+    latest year range (e.g. "2016 - Present") is used.
+    """
+
+    explicit = [int(match.group(1)) for match in _YEARS_PATTERN.finditer(text)]
+    explicit = [years for years in explicit if years <= _MAX_YEARS]
+    if explicit:
+        return max(explicit)
+
+    current_year = (today or date.today()).year
+    starts, ends = [], []
+    for start, end in _RANGE_PATTERN.findall(text):
+        start_year = int(start)
+        end_year = int(end) if end.isdigit() else current_year
+        if start_year <= end_year <= current_year:
+            starts.append(start_year)
+            ends.append(end_year)
+    if not starts:
+        return UNKNOWN_YEARS
+    return min(max(ends) - min(starts), _MAX_YEARS)
+
+
+@dataclass
+class CandidateProfile:
+    skills: List[str] = field(default_factory=list)
+    years_experience: int = UNKNOWN_YEARS
+
+
+def load_taxonomy(path: Optional[str] = None) -> Dict[str, List[str]]:
+    if not path:
+        return DEFAULT_TAXONOMY
+    with open(path, "r", encoding="utf-8") as handle:
+        return {str(skill).lower(): list(aliases) for skill, aliases in json.load(handle).items()}
+
+
+def build_matcher(taxonomy: Mapping[str, Iterable[str]]) -> AhoCorasickMatcher:
+    # The surface forms are exhaustive: "go" is matched only as "golang"/"go lang".
+    patterns: Dict[str, str] = {}
+    for skill, aliases in taxonomy.items():
+        for alias in list(aliases) or [skill]:
+            patterns[alias.lower()] = skill
+    return AhoCorasickMatcher(patterns)
+
+
+_matcher: Optional[AhoCorasickMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher() -> AhoCorasickMatcher:
+    """Return the process-wide matcher for ``SKILLS_TAXONOMY_PATH`` (or the built-in taxonomy)."""
+
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = build_matcher(load_taxonomy(settings.skills_taxonomy_path))
+        return _matcher
+
+
+def extract_profile(text: str) -> CandidateProfile:
+    """Extract canonical skills and years of experience from resume text."""
+
+    if not settings.skill_extraction_enabled:
+        return CandidateProfile()
+    return CandidateProfile(
+        skills=get_skill_matcher().find(text),
+        years_experience=extract_years_experience(text),
+    )
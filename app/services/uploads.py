@@ -0,0 +1,64 @@
+import re
+from typing import Any, BinaryIO, Optional
+
+from app.core.config import settings
+
+READ_BLOCK_BYTES = 1 << 20
+_MAX_NAME_LENGTH = 255
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f]")
+
+
+class UploadTooLargeError(ValueError):
+    """An uploaded file is bigger than ``UPLOAD_MAX_BYTES``."""
+
+    def __init__(self, max_bytes: int, name: Optional[str] = None):
+        subject = f"{name} is" if name else "Upload is"
+        super().__init__(f"{subject} larger than the {max_bytes}-byte limit")
+        self.max_bytes = max_bytes
+
+
+def upload_filename(filename: Optional[str], default: str = "upload.pdf") -> str:
+    """The client-supplied name reduced to a bare file name.
+
+    Directory parts (``/`` or ``\\``) and control characters are dropped. The result only
+    names the candidate and is never used as a filesystem path.
+    """
+
+    name = _CONTROL_CHARS.sub("", (filename or "").replace("\\", "/").rsplit("/", 1)[-1]).strip()
+    if not name or name in (".", ".."):
+        return default
+    return name[:_MAX_NAME_LENGTH]
+
+
+def _limit(max_bytes: Optional[int]) -> int:
+    return settings.upload_max_bytes if max_bytes is None else max_bytes
+
+
+def read_limited(stream: BinaryIO, max_bytes: Optional[int] = None, name: Optional[str] = None) -> bytes:
+    """Read a whole (spooled) upload stream, failing as soon as it exceeds the size cap."""
+
+    limit = _limit(max_bytes)
+    data = stream.read(limit + 1)
+    if len(data) > limit:
+        raise UploadTooLargeError(limit, name)
+    return data
+
+
+async def read_upload(upload: Any, max_bytes: Optional[int] = None) -> bytes:
+    """Read a FastAPI ``UploadFile`` block by block into memory, enforcing the size cap.
+
+    Nothing is written to disk by the app; the PDF is parsed straight from these bytes.
+    """
+
+    limit = _limit(max_bytes)
+    blocks = []
+    size = 0
+    while True:
+        block = await upload.read(READ_BLOCK_BYTES)
+        if not block:
+            break
+        size += len(block)
+        if size > limit:
+            raise UploadTooLargeError(limit, upload_filename(upload.filename))
+        blocks.append(block)
+    return b"".join(blocks)
@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pymilvus import Collection, DataType
+
+from app.core.config import settings
+
+EMBEDDING_DIM = 384
+
+# EMBEDDING_STORAGE value -> Milvus vector type of the ``embedding`` field.
+STORAGE_TYPES: Dict[str, DataType] = {
+    "float32": DataType.FLOAT_VECTOR,
+    "float16": DataType.FLOAT16_VECTOR,
+    "bfloat16": DataType.BFLOAT16_VECTOR,
+    # One sign bit per dimension, searched by Hamming distance; always rescored.
+    "binary": DataType.BINARY_VECTOR,
+}
+_TYPE_TO_STORAGE = {dtype: storage for storage, dtype in STORAGE_TYPES.items()}
+
+
+def get_storage(name: Optional[str] = None) -> str:
+    name = (name or settings.embedding_storage).lower()
+    if name not in STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage {name!r}; expected one of {sorted(STORAGE_TYPES)}")
+    return name
+
+
+def bytes_per_vector(storage: str, dim: int = EMBEDDING_DIM) -> int:
+    """Raw size of one stored vector, before index overhead."""
+
+    if storage == "binary":
+        return (dim + 7) // 8
+    return dim * (4 if storage == "float32" else 2)
+
+
+def collection_storage(collection: Collection) -> str:
+    """Storage type of ``collection``'s ``embedding`` field (``float32`` when unknown)."""
+
+    schema = getattr(collection, "schema", None)
+    for item in getattr(schema, "fields", None) or []:
+        if item.name == "embedding":
+            return _TYPE_TO_STORAGE.get(getattr(item, "dtype", None), "float32")
+    return "float32"
+
+
+def _bfloat16_bits(matrix: np.ndarray) -> np.ndarray:
+    # Round to nearest even on the upper 16 bits of each float32.
+    bits = matrix.view(np.uint32)
+    rounded = bits + np.uint32(0x7FFF) + ((bits >> np.uint32(16)) & np.uint32(1))
+    return (rounded >> np.uint32(16)).astype(np.uint16)
+
+
+def to_storage(vectors: Sequence[Sequence[float]], storage: str) -> List[Any]:
+    """Convert float vectors to the values Milvus expects for ``storage``.
+
+    ``float16`` rows are ``float16`` arrays; ``bfloat16`` and ``binary`` rows are bytes
+    (NumPy has no bfloat16 dtype).
+    """
+
+    if storage == "float32":
+        return list(vectors)
+    if not len(vectors):
+        return []
+    matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    if storage == "float16":
+        return list(matrix.astype(np.float16))
+    if storage == "bfloat16":
+        return [row.tobytes() for row in _bfloat16_bits(matrix)]
+    if storage == "binary":
+        return [row.tobytes() for row in np.packbits(matrix > 0, axis=1)]
+    raise ValueError(f"Unknown embedding storage {storage!r}")
+
+
+def from_storage(value: Any, storage: str) -> np.ndarray:
+    """Decode one stored (or search-returned) vector back to float32.
+
+    Binary codes cannot be decoded; rescoring takes those vectors from elsewhere.
+    """
+
+    if storage == "binary":
+        raise ValueError("binary vectors keep only signs and cannot be decoded")
+    if isinstance(value, list) and value and isinstance(value[0], (bytes, bytearray)):
+        value = b"".join(value)
+    if isinstance(value, (bytes, bytearray)):
+        if storage == "bfloat16":
+            bits = np.frombuffer(value, dtype=np.uint16).astype(np.uint32) << np.uint32(16)
+            return bits.view(np.float32)
+        return np.frombuffer(value, dtype=np.float16 if storage == "float16" else np.float32).astype(
+            np.float32
+        )
+    return np.asarray(value, dtype=np.float32)
+
+
+def cosine_scores(query: Sequence[float], vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """Cosine similarity of ``query`` against each row, computed in float32."""
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    query_vector = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+    return (matrix @ query_vector) / np.maximum(norms, 1e-12)
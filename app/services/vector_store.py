@@ -0,0 +1,514 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from pymilvus import CollectionSchema, DataType
+
+from app.core.config import settings
+from app.services.index_profiles import INDEX_PROFILES
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKENDS = ("milvus", "local")
+LOCAL_INDEX_TYPES = ("flat", "hnsw")
+
+RowPredicate = Callable[[Dict[str, Any]], bool]
+
+
+class VectorCollection(Protocol):
+    """The part of the pymilvus ``Collection`` API the app relies on.
+
+    ``milvus_client`` hands out either a real ``Collection`` or a :class:`LocalCollection`;
+    both satisfy this protocol, and so do the stubs in the tests.
+    """
+
+    name: str
+    schema: CollectionSchema
+
+    def insert(self, data: Any, fields: Optional[Sequence[str]] = None) -> Any: ...
+
+    def delete(self, expr: str) -> Any: ...
+
+    def search(self, data: Any, anns_field: str, param: Dict[str, Any], limit: int, **kwargs: Any) -> Any: ...
+
+    def query_iterator(self, batch_size: int = 1000, expr: str = "", output_fields: Optional[List[str]] = None) -> Any: ...
+
+    def flush(self) -> None: ...
+
+
+# -- Filter expressions -------------------------------------------------------------------
+#
+# The subset of Milvus boolean expressions the app generates (``SearchFilters.to_expr`` and
+# candidate deletes): comparisons, ``in`` / ``not in``, ``json_contains``/``_all``/``_any``,
+# ``and``/``or``/``not`` and parentheses. Literals are JSON.
+
+_TOKEN = re.compile(r"\s*(==|!=|>=|<=|>|<|\(|\)|,|&&|\|\||[A-Za-z_][A-Za-z0-9_]*)")
+_COMPARATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    ">=": lambda left, right: left >= right,
+    "<=": lambda left, right: left <= right,
+    ">": lambda left, right: left > right,
+    "<": lambda left, right: left < right,
+}
+_JSON_FUNCTIONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "json_contains": lambda values, item: item in values,
+    "json_contains_all": lambda values, items: all(item in values for item in items),
+    "json_contains_any": lambda values, items: any(item in values for item in items),
+}
+
+
+class _ExprParser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _peek(self) -> Optional[str]:
+        match = _TOKEN.match(self.text, self.pos)
+        return match.group(1) if match else None
+
+    def _take(self, expected: Optional[str] = None) -> str:
+        match = _TOKEN.match(self.text, self.pos)
+        if match is None or (expected is not None and match.group(1).lower() != expected):
+            raise ValueError(f"Expected {expected or 'a token'} at {self.pos} in {self.text!r}")
+        self.pos = match.end()
+        return match.group(1)
+
+    def _literal(self) -> Any:
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+        try:
+            value, self.pos = self._decoder.raw_decode(self.text, self.pos)
+        except json.JSONDecodeError:
+            raise ValueError(f"Expected a JSON literal at {self.pos} in {self.text!r}") from None
+        return value
+
+    def parse(self) -> RowPredicate:
+        predicate = self._or()
+        if self.text[self.pos :].strip():
+            raise ValueError(f"Unexpected input at {self.pos} in {self.text!r}")
+        return predicate
+
+    def _or(self) -> RowPredicate:
+        parts = [self._and()]
+        while (self._peek() or "").lower() in ("or", "||"):
+            self._take()
+            parts.append(self._and())
+        return parts[0] if len(parts) == 1 else (lambda row: any(part(row) for part in parts))
+
+    def _and(self) -> RowPredicate:
+        parts = [self._unary()]
+        while (self._peek() or "").lower() in ("and", "&&"):
+            self._take()
+            parts.append(self._unary())
+        return parts[0] if len(parts) == 1 else (lambda row: all(part(row) for part in parts))
+
+    def _unary(self) -> RowPredicate:
+        token = self._peek()
+        if token == "(":
+            self._take("(")
+            inner = self._or()
+            self._take(")")
+            return inner
+        if token and token.lower() == "not":
+            self._take()
+            operand = self._unary()
+            return lambda row: not operand(row)
+        return self._clause()
+
+    def _clause(self) -> RowPredicate:
+        name = self._take()
+        if name.lower() in _JSON_FUNCTIONS:
+            function = _JSON_FUNCTIONS[name.lower()]
+            self._take("(")
+            field_name = self._take()
+            self._take(",")
+            argument = self._literal()
+            self._take(")")
+            return lambda row: function(row.get(field_name) or [], argument)
+
+        operator = self._take()
+        if operator.lower() == "not":
+            self._take("in")
+            values = self._literal()
+            return lambda row: row.get(name) not in values
+        if operator.lower() == "in":
+            values = self._literal()
+            return lambda row: row.get(name) in values
+        if operator not in _COMPARATORS:
+            raise ValueError(f"Unsupported operator {operator!r} in {self.text!r}")
+        compare, value = _COMPARATORS[operator], self._literal()
+
+        def predicate(row: Dict[str, Any]) -> bool:
+            field_value = row.get(name)
+            try:
+                return field_value is not None and compare(field_value, value)
+            except TypeError:
+                return False
+
+        return predicate
+
+
+@lru_cache(maxsize=256)
+def compile_expr(expr: str) -> RowPredicate:
+    """Compile a Milvus filter expression into a predicate over row dicts."""
+
+    if not expr or not expr.strip():
+        return lambda row: True
+    return _ExprParser(expr).parse()
+
+
+# -- Local collection ---------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    id INTEGER PRIMARY KEY,
+    fields TEXT NOT NULL
+);
+"""
+_INITIAL_CAPACITY = 1024
+
+
+class LocalHit:
+    __slots__ = ("id", "distance", "entity")
+
+    def __init__(self, row_id: int, distance: float, entity: Dict[str, Any]):
+        self.id = row_id
+        self.distance = distance
+        self.entity = entity
+
+
+class _LocalQueryIterator:
+    def __init__(self, batches: Iterable[List[Dict[str, Any]]]):
+        self._batches = iter(batches)
+
+    def next(self) -> List[Dict[str, Any]]:
+        return next(self._batches, [])
+
+    def close(self) -> None:
+        self._batches = iter(())
+
+
+class LocalCollection:
+    """In-process stand-in for a pymilvus ``Collection`` (``VECTOR_BACKEND=local``).
+
+    Vectors are kept L2-normalized in a float32 NumPy array, memory-mapped from
+    ``<path>/<name>/vectors.f32`` when ``path`` is set; scalar fields live in SQLite next to
+    it (in memory without a path). Search is exact cosine over the live rows that match the
+    filter expression, or HNSW (hnswlib, optional) once ``index_type="hnsw"`` and the rows to
+    search reach ``hnsw_min_rows``. Inserts and deletes are visible to the next search, as
+    with Milvus session consistency; ``flush`` forces the vectors to disk.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        schema: CollectionSchema,
+        *,
+        path: Optional[str] = None,
+        index_type: str = "flat",
+        hnsw_min_rows: int = 20_000,
+    ):
+        if index_type not in LOCAL_INDEX_TYPES:
+            raise ValueError(f"Unknown local index {index_type!r}; expected one of {LOCAL_INDEX_TYPES}")
+        vector_fields = [item for item in schema.fields if item.dtype == DataType.FLOAT_VECTOR]
+        if len(vector_fields) != 1:
+            raise ValueError("LocalCollection needs exactly one FLOAT_VECTOR field")
+        self.name = name
+        self.schema = schema
+        self.vector_field = vector_fields[0].name
+        self.dim = int(vector_fields[0].params["dim"])
+        self.index_type = index_type
+        self.hnsw_min_rows = max(hnsw_min_rows, 1)
+        self._insert_fields = [item.name for item in schema.fields if not item.auto_id]
+        self._lock = threading.RLock()
+        self._hnsw: Any = None
+
+        self._vector_path: Optional[Path] = None
+        if path:
+            directory = Path(path) / name
+            directory.mkdir(parents=True, exist_ok=True)
+            self._vector_path = directory / "vectors.f32"
+            self._conn = sqlite3.connect(str(directory / "rows.sqlite3"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        else:
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+        self._rows: List[Optional[Dict[str, Any]]] = []
+        for row_id, fields in self._conn.execute("SELECT id, fields FROM rows ORDER BY id"):
+            self._rows.extend([None] * (row_id - len(self._rows)))
+            self._rows.append(json.loads(fields))
+        self._vectors = self._open_vectors(max(len(self._rows), _INITIAL_CAPACITY))
+        self._alive = np.array([row is not None for row in self._rows], dtype=bool)
+
+    # Milvus index/load lifecycle: nothing to do in process.
+    def create_index(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def drop_index(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def load(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def release(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    @property
+    def indexes(self) -> List[Any]:
+        index_type = "HNSW" if self.index_type == "hnsw" else "FLAT"
+        return [
+            SimpleNamespace(
+                field_name=self.vector_field,
+                index_name=f"{self.vector_field}_idx",
+                params={"index_type": index_type, "metric_type": "COSINE"},
+            )
+        ]
+
+    @property
+    def num_entities(self) -> int:
+        with self._lock:
+            return int(self._alive.sum())
+
+    def _open_vectors(self, capacity: int) -> np.ndarray:
+        if self._vector_path is None:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        existing = self._vector_path.stat().st_size // row_bytes if self._vector_path.exists() else 0
+        capacity = max(capacity, existing)
+        with open(self._vector_path, "ab") as handle:
+            handle.truncate(capacity * row_bytes)
+        return np.memmap(self._vector_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        if self._vector_path is None:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[: len(self._rows)] = self._vectors[: len(self._rows)]
+            self._vectors = grown
+        else:
+            self._vectors.flush()
+            self._vectors = self._open_vectors(capacity)
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+
+    def _columns(self, data: Any, fields: Optional[Sequence[str]]) -> Tuple[List[str], List[List[Any]]]:
+        if data and isinstance(data[0], dict):
+            names = list(fields or self._insert_fields)
+            return names, [[row.get(name) for row in data] for name in names]
+        names = list(fields or self._insert_fields[: len(data)])
+        if len(names) != len(data):
+            raise ValueError(f"Got {len(data)} columns for fields {names}")
+        return names, [list(column) for column in data]
+
+    def insert(self, data: Any, fields: Optional[Sequence[str]] = None) -> Any:
+        names, columns = self._columns(data, fields)
+        if self.vector_field not in names:
+            raise ValueError(f"Insert is missing the {self.vector_field!r} field")
+        vectors = np.asarray(columns[names.index(self.vector_field)], dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        scalar_names = [name for name in self._insert_fields if name != self.vector_field]
+        rows = [
+            {name: (columns[names.index(name)][offset] if name in names else None) for name in scalar_names}
+            for offset in range(len(vectors))
+        ]
+
+        with self._lock:
+            start = len(self._rows)
+            ids = list(range(start, start + len(rows)))
+            self._ensure_capacity(start + len(rows))
+            self._vectors[start : start + len(rows)] = vectors
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO rows (id, fields) VALUES (?, ?)",
+                    [(row_id, json.dumps(row)) for row_id, row in zip(ids, rows)],
+                )
+            self._rows.extend(rows)
+            self._alive = np.concatenate([self._alive, np.ones(len(rows), dtype=bool)])
+            if self._hnsw is not None and rows:
+                self._hnsw.add_items(vectors, ids)
+        return SimpleNamespace(primary_keys=ids, insert_count=len(ids))
+
+    def _mask(self, expr: Optional[str], with_ids: bool = False) -> np.ndarray:
+        if not expr:
+            return self._alive.copy()
+        predicate = compile_expr(expr)
+        rows: Iterable[Any] = self._rows
+        if with_ids:
+            # The primary key is not stored in the row fields; deletes by id need it.
+            rows = ({**row, "id": row_id} if row is not None else None for row_id, row in enumerate(self._rows))
+        return np.fromiter(
+            (alive and predicate(row) for alive, row in zip(self._alive, rows)),
+            dtype=bool,
+            count=len(self._rows),
+        )
+
+    def delete(self, expr: str) -> Any:
+        with self._lock:
+            ids = np.flatnonzero(self._mask(expr, with_ids=True)).tolist()
+            with self._conn:
+                self._conn.executemany("DELETE FROM rows WHERE id = ?", [(row_id,) for row_id in ids])
+            for row_id in ids:
+                self._rows[row_id] = None
+                self._alive[row_id] = False
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(row_id)
+        return SimpleNamespace(delete_count=len(ids))
+
+    def _entity(self, row_id: int, output_fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+        row = self._rows[row_id] or {}
+        entity: Dict[str, Any] = {"id": row_id}
+        for name in output_fields or ():
+            if name == self.vector_field:
+                entity[name] = self._vectors[row_id].tolist()
+            elif name != "id":
+                entity[name] = row.get(name)
+        return entity
+
+    def _hnsw_index(self) -> Any:
+        if self._hnsw is None:
+            try:
+                import hnswlib
+            except ImportError:  # pragma: no cover - hnswlib is optional
+                logger.warning("hnswlib is not installed; local search stays exact (flat)")
+                self.index_type = "flat"
+                return None
+            build = INDEX_PROFILES["hnsw"].build_params
+            index = hnswlib.Index(space="cosine", dim=self.dim)
+            index.init_index(
+                max_elements=len(self._vectors), ef_construction=build["efConstruction"], M=build["M"]
+            )
+            live = np.flatnonzero(self._alive)
+            if len(live):
+                index.add_items(self._vectors[live], live)
+            self._hnsw = index
+        return self._hnsw
+
+    def _knn(self, query: np.ndarray, limit: int, mask: np.ndarray, ef: int) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = np.flatnonzero(mask)
+        if self.index_type == "hnsw" and len(candidates) >= self.hnsw_min_rows:
+            index = self._hnsw_index()
+            if index is not None:
+                index.set_ef(max(ef, limit))
+                row_filter = None if mask.all() else (lambda label: bool(mask[label]))
+                try:
+                    labels, distances = index.knn_query(query, k=min(limit, len(candidates)), filter=row_filter)
+                    return labels[0].astype(np.int64), 1.0 - distances[0]
+                except RuntimeError:
+                    # A very selective filter can leave HNSW short of k results; scan instead.
+                    pass
+        scores = self._vectors[candidates] @ query
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return candidates[top], scores[top]
+
+    def search(
+        self,
+        data: Any,
+        anns_field: Optional[str] = None,
+        param: Optional[Dict[str, Any]] = None,
+        limit: int = 10,
+        expr: Optional[str] = None,
+        output_fields: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ) -> List[List[LocalHit]]:
+        """Cosine search like ``Collection.search``; ``_async`` and consistency are ignored
+        because results are computed synchronously and always see every prior write."""
+
+        ef = int(((param or {}).get("params") or {}).get("ef", INDEX_PROFILES["hnsw"].search_default))
+        with self._lock:
+            mask = self._mask(expr)
+            results = []
+            for query in data:
+                query_vector = np.asarray(query, dtype=np.float32)
+                query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+                ids, scores = self._knn(query_vector, limit, mask, ef) if mask.any() else ([], [])
+                results.append(
+                    [
+                        LocalHit(int(row_id), float(score), self._entity(int(row_id), output_fields))
+                        for row_id, score in zip(ids, scores)
+                    ]
+                )
+        return results
+
+    def query_iterator(
+        self, batch_size: int = 1000, expr: str = "", output_fields: Optional[List[str]] = None
+    ) -> _LocalQueryIterator:
+        with self._lock:
+            ids = np.flatnonzero(self._mask(expr)).tolist()
+
+        def batches() -> Iterable[List[Dict[str, Any]]]:
+            for offset in range(0, len(ids), batch_size):
+                with self._lock:
+                    batch = [
+                        self._entity(row_id, output_fields)
+                        for row_id in ids[offset : offset + batch_size]
+                        if self._rows[row_id] is not None
+                    ]
+                if batch:
+                    yield batch
+
+        return _LocalQueryIterator(batches())
+
+    def flush(self, *args: Any, **kwargs: Any) -> None:
+        with self._lock:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+_local_collections: Dict[str, LocalCollection] = {}
+_local_lock = threading.Lock()
+
+
+def get_vector_backend() -> str:
+    backend = settings.vector_backend.lower()
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown vector backend {backend!r}; expected one of {VECTOR_BACKENDS}")
+    return backend
+
+
+def open_local_collection(name: str, schema: CollectionSchema) -> LocalCollection:
+    """Return the process-wide local collection ``name``, opening it on first use."""
+
+    with _local_lock:
+        collection = _local_collections.get(name)
+        if collection is None:
+            collection = LocalCollection(
+                name,
+                schema,
+                path=settings.local_vector_store_path,
+                index_type=settings.local_vector_index.lower(),
+                hnsw_min_rows=settings.local_hnsw_min_rows,
+            )
+            _local_collections[name] = collection
+        return collection
+
+
+def close_local_collections() -> None:
+    with _local_lock:
+        collections = list(_local_collections.values())
+        _local_collections.clear()
+    for collection in collections:
+        collection.close()
@@ -1,53 +1,30 @@
-from pymilvus import connections, utility
+from pymilvus import utility
 
 from app.core.config import settings
-from app.services.milvus_client import FIELDS
+from app.services.index_profiles import get_index_profile
+from app.services.milvus_client import close_milvus, connect_milvus, get_or_create_collection
+from app.services.vector_store import get_vector_backend
 
 
 if __name__ == "__main__":
-    tls_kwargs = {}
-    if settings.milvus_ca_pem_path:
-        tls_kwargs["ca_pem_path"] = settings.milvus_ca_pem_path
-    if settings.milvus_server_pem_path:
-        tls_kwargs["server_pem_path"] = settings.milvus_server_pem_path
-    if settings.milvus_server_name:
-        tls_kwargs["server_name"] = settings.milvus_server_name
-    if settings.milvus_tls_insecure:
-        tls_kwargs["secure"] = True
-
-    if settings.milvus_uri:
-        connections.connect(
-            alias="default",
-            uri=settings.milvus_uri,
-            token=settings.milvus_token,
-            **tls_kwargs,
-        )
-    else:
-        connections.connect(
-            alias="default",
-            host=settings.milvus_host,
-            port=settings.milvus_port,
-            **tls_kwargs,
+    if get_vector_backend() == "local":
+        collection = get_or_create_collection()
+        print(
+            f"Local collection '{collection.name}' ready with {collection.num_entities} rows "
+            f"({settings.local_vector_store_path or 'in memory'})."
         )
+        close_milvus()
+        raise SystemExit(0)
+
+    connect_milvus()
 
     if utility.has_collection(settings.milvus_collection):
         print(f"Collection '{settings.milvus_collection}' already exists.")
     else:
-        from pymilvus import Collection, CollectionSchema
-
-        schema = CollectionSchema(fields=FIELDS, description="Resume embeddings")
-        collection = Collection(
-            name=settings.milvus_collection,
-            schema=schema,
-            using="default",
-        )
-        collection.create_index(
-            field_name="embedding",
-            index_params={
-                "index_type": "HNSW",
-                "metric_type": "COSINE",
-                "params": {"M": 48, "efConstruction": 200},
-            },
+        # Same code path as the API: schema, vector index from MILVUS_INDEX_PROFILE, scalar indexes.
+        get_or_create_collection()
+        print(
+            f"Collection '{settings.milvus_collection}' created and indexed "
+            f"({get_index_profile().index_type})."
         )
-        collection.load()
-        print(f"Collection '{settings.milvus_collection}' created and indexed.")
+    close_milvus()
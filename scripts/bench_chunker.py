@@ -0,0 +1,89 @@
+"""Micro-benchmark the streaming chunker against the previous quadratic implementation.
+
+Builds a synthetic resume-like document of N pages and times both chunkers with the
+default CHUNK_SIZE / CHUNK_OVERLAP / TEXT_CHUNK_MAX_LENGTH settings.
+
+Usage: python scripts/bench_chunker.py --pages 100 --words-per-page 600
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.chunking import iter_chunks  # noqa: E402
+
+WORDS = (
+    "Python Django Flask FastAPI Kubernetes Terraform AWS GCP PostgreSQL Redis Kafka "
+    "designed built led migrated scaled microservices pipelines observability latency "
+    "reduced improved mentored engineers customers platform infrastructure résumé"
+).split()
+
+
+def legacy_chunk_text(text: str, chunk_size: int, overlap: int, max_length: int) -> list:
+    tokens = text.split()
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        end = min(start + chunk_size, len(tokens))
+        chunk = " ".join(tokens[start:end])
+        if max_length > 0 and len(chunk.encode("utf-8")) > max_length:
+            while end > start and len(chunk.encode("utf-8")) > max_length:
+                end -= 1
+                chunk = " ".join(tokens[start:end])
+            if end == start:
+                chunk = tokens[start].encode("utf-8")[:max_length].decode("utf-8", errors="ignore")
+                if chunk:
+                    chunks.append(chunk)
+                start += 1
+                continue
+        if chunk:
+            chunks.append(chunk)
+        next_start = end - overlap if overlap > 0 else end
+        start = end if next_start <= start else next_start
+    return chunks
+
+
+def _time(label: str, func, repeat: int) -> list:
+    best = float("inf")
+    result = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<20} {best * 1000:9.1f} ms  ({len(result)} chunks)")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--words-per-page", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [
+        "\n".join(
+            " ".join(rng.choice(WORDS) for _ in range(12))
+            for _ in range(args.words_per_page // 12)
+        )
+        for _ in range(args.pages)
+    ]
+    text = "\n".join(pages)
+    params = (settings.chunk_size, settings.chunk_overlap, settings.text_chunk_max_length)
+    print(f"{args.pages} pages, {len(text.split())} tokens, chunk_size/overlap/max_length={params}")
+
+    legacy = _time("legacy chunk_text", lambda: legacy_chunk_text(text, *params), args.repeat)
+    streamed = _time("iter_chunks (text)", lambda: list(iter_chunks(text, *params, "tokens")), args.repeat)
+    _time("iter_chunks (pages)", lambda: list(iter_chunks(pages, *params, "tokens")), args.repeat)
+    _time("iter_chunks section", lambda: list(iter_chunks(pages, *params, "section")), args.repeat)
+    assert legacy == streamed, "streaming chunker diverged from the legacy output"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare the PyTorch and ONNX Runtime (fp32 / int8) embedding backends on CPU.
+
+For each backend: batch throughput (texts/s), single-query latency (p50/p95), and parity
+with the PyTorch vectors (mean / min cosine). Every backend must produce the
+``EMBEDDING_DIM``-wide vectors the Milvus schema expects. Missing ONNX exports are created
+first (see ``scripts/export_onnx_embeddings.py``).
+
+Usage: python scripts/bench_embedding_backends.py --texts 512 --batch-size 32 --queries 200 --threads 0
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.onnx_embeddings import (  # noqa: E402
+    ONNX_QUANTIZATIONS,
+    OnnxEmbeddingModel,
+    export_onnx_model,
+    onnx_model_dir,
+)
+from app.services.vector_storage import EMBEDDING_DIM  # noqa: E402
+
+SKILLS = "Python Django FastAPI Kubernetes Terraform AWS PostgreSQL Kafka Redis React TypeScript Spark".split()
+TEMPLATES = (
+    "Senior backend engineer with {n} years of {a} and {b} experience.",
+    "Led the migration of a monolith to {a} microservices, cutting p95 latency by {n}0%.",
+    "Built {a} data pipelines on {b}; mentored {n} engineers and owned on-call for the platform team.",
+)
+
+
+def _texts(count: int, rng: random.Random) -> list:
+    return [
+        rng.choice(TEMPLATES).format(n=rng.randint(2, 12), a=rng.choice(SKILLS), b=rng.choice(SKILLS))
+        for _ in range(count)
+    ]
+
+
+def _bench(label: str, model, texts, queries, batch_size: int, reference):
+    model.encode(texts[:batch_size], batch_size=batch_size, show_progress_bar=False)
+    started = time.perf_counter()
+    vectors = np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32)
+    throughput = len(texts) / (time.perf_counter() - started)
+    if vectors.shape[1] != EMBEDDING_DIM:
+        raise SystemExit(f"{label} produced {vectors.shape[1]}-dim vectors; the Milvus schema expects {EMBEDDING_DIM}")
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        model.encode([query], show_progress_bar=False)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+    parity = "-"
+    if reference is not None:
+        cosine = (vectors * reference).sum(axis=1)
+        parity = f"{cosine.mean():.5f} / {cosine.min():.5f}"
+    print(
+        f"{label:<10} {throughput:>10.1f} {statistics.median(latencies) * 1000:>8.2f} {p95 * 1000:>8.2f}  {parity}"
+    )
+    return vectors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.embedding_model_name)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=settings.embedding_onnx_threads, help="ONNX intra-op threads, 0 = all cores")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts, queries = _texts(args.texts, rng), _texts(args.queries, rng)
+
+    from sentence_transformers import SentenceTransformer
+
+    print(f"{'backend':<10} {'texts/s':>10} {'p50 ms':>8} {'p95 ms':>8}  cosine vs torch (mean / min)")
+    reference = _bench("torch", SentenceTransformer(args.model, device="cpu"), texts, queries, args.batch_size, None)
+
+    model_dir = onnx_model_dir(args.model)
+    if not all((model_dir / name).exists() for name in ONNX_QUANTIZATIONS.values()):
+        export_onnx_model(args.model, model_dir)
+    for quantization in ONNX_QUANTIZATIONS:
+        model = OnnxEmbeddingModel(model_dir, quantization, threads=args.threads)
+        _bench(f"onnx-{quantization}", model, texts, queries, args.batch_size, reference)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare one-at-a-time encoding against the shared micro-batcher under concurrency.
+
+Usage: python scripts/bench_embedding_batching.py --requests 512 --concurrency 32
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.embedding_batcher import EmbeddingBatcher  # noqa: E402
+from app.services.embeddings import get_embedding_model  # noqa: E402
+
+QUERY = "Backend engineer with {n} years of Python, Django, Kubernetes and AWS experience."
+
+
+def _run(label: str, encode_one, requests: int, concurrency: int) -> None:
+    queries = [QUERY.format(n=i % 15) for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(encode_one, queries))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} {requests / elapsed:10.1f} req/s  ({elapsed:.2f}s total)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=settings.embedding_batch_max_size)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.embedding_batch_max_wait_ms)
+    args = parser.parse_args()
+
+    model = get_embedding_model()
+    model.encode(["warm-up"], show_progress_bar=False)
+
+    _run(
+        "one-at-a-time",
+        lambda text: model.encode([text], show_progress_bar=False)[0],
+        args.requests,
+        args.concurrency,
+    )
+
+    batcher = EmbeddingBatcher(
+        lambda: model,
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_queue_depth=args.requests,
+    )
+    try:
+        _run("micro-batched", lambda text: batcher.encode([text])[0], args.requests, args.concurrency)
+        print(f"batches run: {batcher.batches_run}, mean batch: {batcher.texts_encoded / max(batcher.batches_run, 1):.1f}")
+    finally:
+        batcher.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare ingest rate and segment count for each flush policy against a live Milvus.
+
+Each policy writes the same synthetic documents into a scratch collection, which is dropped
+afterwards. Vectors are random, so no embedding model is needed.
+
+Usage: python scripts/bench_flush_policy.py --docs 2000 --chunks-per-doc 8
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pymilvus import Collection, CollectionSchema, utility  # noqa: E402
+
+from app.services.flush_policy import FLUSH_POLICIES, FlushPolicy  # noqa: E402
+from app.services.ingestion import insert_chunk_rows  # noqa: E402
+from app.services.milvus_client import FIELDS, connect_milvus  # noqa: E402
+
+
+def _random_vector(dim: int) -> list:
+    vector = [random.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(value * value for value in vector) ** 0.5
+    return [value / norm for value in vector]
+
+
+def _bench(policy_name: str, args: argparse.Namespace) -> None:
+    name = f"bench_flush_{policy_name}"
+    if utility.has_collection(name):
+        utility.drop_collection(name)
+    collection = Collection(name=name, schema=CollectionSchema(fields=FIELDS))
+    collection.create_index(
+        field_name="embedding",
+        index_params={"index_type": "HNSW", "metric_type": "COSINE", "params": {"M": 48, "efConstruction": 200}},
+    )
+    collection.load()
+
+    policy = FlushPolicy(policy_name, every_rows=args.every_rows, interval_seconds=args.interval)
+    chunk = "experienced backend engineer " * 10
+    started = time.perf_counter()
+    for doc in range(args.docs):
+        rows = args.chunks_per_doc
+        insert_chunk_rows(
+            collection,
+            [_random_vector(384) for _ in range(rows)],
+            [chunk for _ in range(rows)],
+            [f"candidate-{doc}" for _ in range(rows)],
+        )
+        policy.record_insert(collection, rows)
+    elapsed = time.perf_counter() - started
+    policy.close()
+
+    segments = utility.get_query_segment_info(name)
+    total_rows = args.docs * args.chunks_per_doc
+    print(
+        f"{policy_name:<11} {args.docs / elapsed:8.1f} docs/s {total_rows / elapsed:9.1f} rows/s "
+        f"flushes={policy.flush_count:<5} loaded segments={len(segments)}"
+    )
+    utility.drop_collection(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--chunks-per-doc", type=int, default=8)
+    parser.add_argument("--every-rows", type=int, default=10_000)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--policies", nargs="*", default=list(FLUSH_POLICIES))
+    args = parser.parse_args()
+
+    connect_milvus()
+    for policy_name in args.policies:
+        _bench(policy_name, args)
+
+
+if __name__ == "__main__":
+    main()
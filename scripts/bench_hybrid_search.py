@@ -0,0 +1,125 @@
+"""Compare recall and latency of vector, BM25 and hybrid (RRF) retrieval offline.
+
+Builds a synthetic corpus of resume chunks that mention hard skills, embeds it with the
+configured embedding model and searches it in memory (brute-force cosine stands in for
+Milvus), so no database is needed. A chunk is relevant to a query when it mentions the
+query's skill.
+
+Usage: python scripts/bench_hybrid_search.py --candidates 500 --queries 100 --top-k 10
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.embeddings import encode_texts  # noqa: E402
+from app.services.lexical_index import BM25Index  # noqa: E402
+from app.services.search import reciprocal_rank_fusion  # noqa: E402
+
+SKILLS = [
+    "Kubernetes", "Django", "Flask", "Terraform", "PostgreSQL", "Kafka", "React", "Spark",
+    "Airflow", "GraphQL", "Rust", "Golang", "Redis", "Elasticsearch", "PyTorch", "Snowflake",
+]
+FILLER = [
+    "Led a team delivering customer-facing features on a tight schedule.",
+    "Improved reliability of backend services and mentored junior engineers.",
+    "Worked closely with product managers to define requirements.",
+    "Owned on-call rotations and reduced incident response times.",
+    "Designed data pipelines and internal tooling for analytics teams.",
+]
+
+
+def _corpus(candidates: int, chunks_per_candidate: int, rng: random.Random):
+    chunks, names = [], []
+    for candidate in range(candidates):
+        for _ in range(chunks_per_candidate):
+            text = " ".join(rng.sample(FILLER, 2))
+            if rng.random() < 0.4:
+                text += f" Hands-on experience with {rng.choice(SKILLS)}."
+            chunks.append(text)
+            names.append(f"candidate-{candidate}")
+    return chunks, names
+
+
+def _dense_hits(matrix, chunks, names, query_vector, limit):
+    scores = matrix @ query_vector
+    top = np.argsort(-scores)[:limit]
+    return [
+        {"candidate_name": names[i], "text_chunk": chunks[i], "skills": [], "score": float(scores[i])}
+        for i in top.tolist()
+    ]
+
+
+def _recall(hits, skill, relevant_total, top_k):
+    found = sum(1 for hit in hits[:top_k] if skill.lower() in hit["text_chunk"].lower())
+    return found / min(relevant_total, top_k) if relevant_total else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--chunks-per-candidate", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--pool", type=int, default=settings.hybrid_candidate_pool)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    chunks, names = _corpus(args.candidates, args.chunks_per_candidate, rng)
+    print(f"Embedding {len(chunks)} chunks with {settings.embedding_model_name} ...")
+    matrix = np.asarray(encode_texts(chunks), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    index = BM25Index()
+    started = time.perf_counter()
+    index.add(chunks, names)
+    print(f"BM25 index: {len(index)} chunks in {time.perf_counter() - started:.3f}s")
+
+    recalls = {"vector": [], "bm25": [], "hybrid": []}
+    latencies = {"vector": [], "bm25": [], "hybrid": []}
+    for _ in range(args.queries):
+        skill = rng.choice(SKILLS)
+        query = f"Looking for a backend engineer with strong {skill} experience"
+        relevant_total = sum(1 for chunk in chunks if skill.lower() in chunk.lower())
+        vector = np.asarray(encode_texts([query])[0], dtype=np.float32)
+        vector /= np.linalg.norm(vector)
+
+        started = time.perf_counter()
+        dense = _dense_hits(matrix, chunks, names, vector, args.pool)
+        latencies["vector"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        lexical = index.search(query, args.pool)
+        latencies["bm25"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        fused = reciprocal_rank_fusion([dense, lexical])
+        fusion_seconds = time.perf_counter() - started
+        latencies["hybrid"].append(latencies["vector"][-1] + latencies["bm25"][-1] + fusion_seconds)
+
+        recalls["vector"].append(_recall(dense, skill, relevant_total, args.top_k))
+        recalls["bm25"].append(_recall(lexical, skill, relevant_total, args.top_k))
+        recalls["hybrid"].append(_recall(fused, skill, relevant_total, args.top_k))
+
+    print(f"{'mode':<7} recall@{args.top_k:<4} p50 ms  p95 ms")
+    for mode in ("vector", "bm25", "hybrid"):
+        samples = sorted(latencies[mode])
+        p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+        print(
+            f"{mode:<7} {statistics.mean(recalls[mode]):<10.3f} "
+            f"{statistics.median(samples) * 1000:6.2f}  {p95 * 1000:6.2f}"
+        )
+    print("Query embedding time is excluded; the vector column is in-memory brute force, not Milvus.")
+
+
+if __name__ == "__main__":
+    main()
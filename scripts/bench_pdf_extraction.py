@@ -0,0 +1,123 @@
+"""Benchmark PDF text extraction backends on a corpus of synthetic resume PDFs.
+
+Builds text PDFs in memory (Helvetica, resume-like lines), then reports pages per second
+for every installed backend (pypdfium2, pdfminer, pypdf2) parsing serially, and for the
+page-range split across a process pool that the API uses for long documents.
+
+Usage: python scripts/bench_pdf_extraction.py --docs 20 --pages 12 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.pdf_extraction import (  # noqa: E402
+    PDF_EXTRACTORS,
+    extract_page_range,
+    page_ranges,
+    pdf_page_count,
+)
+
+WORDS = (
+    "Python Django Kubernetes Terraform AWS PostgreSQL Kafka Redis designed built led "
+    "migrated scaled microservices pipelines observability latency reduced improved "
+    "mentored engineers customers platform infrastructure 2016 2021 Present"
+).split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_text_pdf(pages: List[List[str]]) -> bytes:
+    """A minimal valid PDF with one text line per entry on each page."""
+
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    next_id = 4
+    for lines in pages:
+        stream = ("BT /F1 10 Tf 12 TL 40 760 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET").encode("latin-1")
+        objects[next_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[next_id + 1] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {next_id} 0 R >>"
+        ).encode()
+        kids.append(next_id + 1)
+        next_id += 2
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n"
+    xref = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    out += b"".join(b"%010d 00000 n \n" % offsets[object_id] for object_id in range(1, size))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    return bytes(out)
+
+
+def _corpus(docs: int, pages: int, lines: int, rng: random.Random) -> List[bytes]:
+    return [
+        build_text_pdf([[" ".join(rng.choices(WORDS, k=12)) for _ in range(lines)] for _ in range(pages)])
+        for _ in range(docs)
+    ]
+
+
+def _available(name: str, sample: bytes) -> bool:
+    try:
+        PDF_EXTRACTORS[name].page_count(sample)
+    except ImportError:
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--lines", type=int, default=55, help="text lines per page")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--min-pages", type=int, default=4, help="split documents with at least this many pages")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = _corpus(args.docs, args.pages, args.lines, random.Random(args.seed))
+    total_pages = args.docs * args.pages
+    print(f"{len(corpus)} PDFs x {args.pages} pages, {sum(map(len, corpus)) / 2**20:.1f} MB")
+    print(f"{'backend':<10} {'mode':<9} {'pages/s':>9} {'chars/page':>11}")
+
+    context = multiprocessing.get_context("forkserver")
+    for name in PDF_EXTRACTORS:
+        if not _available(name, corpus[0]):
+            print(f"{name:<10} skipped (not installed)")
+            continue
+        started = time.perf_counter()
+        texts = [extract_page_range(document, extractor=name) for document in corpus]
+        serial = time.perf_counter() - started
+        chars = sum(len(page) for pages in texts for page in pages) / total_pages
+        print(f"{name:<10} {'serial':<9} {total_pages / serial:>9.0f} {chars:>11.0f}")
+
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+            executor.submit(pdf_page_count, corpus[0], name).result()  # start the workers
+            started = time.perf_counter()
+            for document in corpus:
+                ranges = page_ranges(args.pages, args.workers, args.min_pages)
+                futures = [executor.submit(extract_page_range, document, start, stop, None, name) for start, stop in ranges]
+                [future.result() for future in futures]
+            parallel = time.perf_counter() - started
+        print(f"{name:<10} {'pages x' + str(args.workers):<9} {total_pages / parallel:>9.0f}")
+    print("Parallel mode parses one document at a time, split into page ranges, like /ingest.")
+
+
+if __name__ == "__main__":
+    main()
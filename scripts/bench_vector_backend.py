@@ -0,0 +1,124 @@
+"""Benchmark the local vector store against Milvus on the same synthetic corpus.
+
+Inserts ``--vectors`` clustered unit vectors into each backend through the collection API
+the app uses, then reports insert rate, search latency and recall@k against exact cosine.
+``local-flat`` is exact by construction; ``local-hnsw`` needs hnswlib; ``--milvus`` adds a
+temporary collection on the configured server, indexed with ``MILVUS_INDEX_PROFILE``.
+
+Usage: python scripts/bench_vector_backend.py --vectors 50000 --queries 200 --top-k 10 [--milvus]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pymilvus import Collection, CollectionSchema, utility  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.index_profiles import search_params, vector_index_params  # noqa: E402
+from app.services.milvus_client import build_fields, connect_milvus  # noqa: E402
+from app.services.vector_storage import EMBEDDING_DIM  # noqa: E402
+from app.services.vector_store import LocalCollection  # noqa: E402
+
+FIELD_NAMES = ["embedding", "text_chunk", "candidate_name", "skills", "years_experience"]
+
+
+def _corpus(count: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, EMBEDDING_DIM))
+    vectors = centers[rng.integers(0, clusters, size=count)] + 0.6 * rng.standard_normal((count, EMBEDDING_DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _milvus_collection(schema: CollectionSchema) -> Collection:
+    connect_milvus()
+    name = f"bench_backend_{int(time.time())}"
+    collection = Collection(name=name, schema=schema)
+    collection.create_index(field_name="embedding", index_params=vector_index_params(storage="float32"))
+    collection.load()
+    return collection
+
+
+def _run(label: str, collection, corpus: np.ndarray, queries: np.ndarray, exact, args) -> None:
+    started = time.perf_counter()
+    for offset in range(0, len(corpus), args.batch_rows):
+        batch = corpus[offset : offset + args.batch_rows]
+        collection.insert(
+            [
+                list(batch),
+                [f"chunk {offset + i}" for i in range(len(batch))],
+                [f"candidate-{(offset + i) // 5}" for i in range(len(batch))],
+                [[] for _ in batch],
+                [-1 for _ in batch],
+            ],
+            fields=FIELD_NAMES,
+        )
+    collection.flush()
+    insert_seconds = time.perf_counter() - started
+
+    params = search_params(collection, args.top_k)
+    latencies, recalls = [], []
+    for query, truth in zip(queries, exact):
+        started = time.perf_counter()
+        hits = collection.search(
+            data=[query.tolist()],
+            anns_field="embedding",
+            param=params,
+            limit=args.top_k,
+            output_fields=["text_chunk"],
+            consistency_level="Strong",
+        )[0]
+        latencies.append(time.perf_counter() - started)
+        found = {int(hit.entity.get("text_chunk").split()[1]) for hit in hits}
+        recalls.append(len(found & set(truth.tolist())) / args.top_k)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<12} {len(corpus) / insert_seconds:>10.0f} {statistics.median(latencies) * 1000:>8.2f} "
+        f"{p95 * 1000:>8.2f} {statistics.mean(recalls):>9.3f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--batch-rows", type=int, default=settings.bulk_insert_batch_rows)
+    parser.add_argument("--milvus", action="store_true", help="also benchmark the configured Milvus")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = _corpus(args.vectors + args.queries, args.clusters, rng)
+    corpus, queries = vectors[: args.vectors], vectors[args.vectors :]
+    exact = [np.argsort(-(corpus @ query))[: args.top_k] for query in queries]
+    schema = CollectionSchema(fields=build_fields("float32"))
+
+    print(f"{'backend':<12} {'insert/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(args.top_k):>9}")
+    _run("local-flat", LocalCollection("bench_flat", schema), corpus, queries, exact, args)
+    try:
+        import hnswlib  # noqa: F401
+    except ImportError:
+        print("local-hnsw   skipped (pip install hnswlib)")
+    else:
+        collection = LocalCollection("bench_hnsw", schema, index_type="hnsw", hnsw_min_rows=1)
+        _run("local-hnsw", collection, corpus, queries, exact, args)
+    if args.milvus:
+        collection = _milvus_collection(schema)
+        try:
+            _run("milvus", collection, corpus, queries, exact, args)
+        finally:
+            utility.drop_collection(collection.name)
+    print("Local HNSW builds its graph on the first search, which is included in that query's latency.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Compare recall@k and memory of the embedding storage modes offline.
+
+Each mode stores the corpus the way Milvus would (via app.services.vector_storage), ranks it
+by brute force on the compact vectors (cosine for float16/bfloat16, Hamming for binary), and
+then rescores the top ``k * rescore-factor`` hits with the float32 vectors, as the search path
+does. Recall is measured against exact float32 cosine top-k. Vectors are synthetic clustered
+unit vectors by default; ``--embed`` uses the configured embedding model on generated text.
+
+Usage: python scripts/bench_vector_storage.py --vectors 20000 --queries 200 --top-k 10
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.vector_storage import (  # noqa: E402
+    EMBEDDING_DIM,
+    STORAGE_TYPES,
+    bytes_per_vector,
+    from_storage,
+    to_storage,
+)
+
+# Bits set in each byte value, for Hamming distances on packed codes.
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _synthetic(count: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, EMBEDDING_DIM))
+    assignments = rng.integers(0, clusters, size=count)
+    return _normalize(centers[assignments] + 0.6 * rng.standard_normal((count, EMBEDDING_DIM))).astype(
+        np.float32
+    )
+
+
+def _embedded(count: int, rng: np.random.Generator) -> np.ndarray:
+    from app.services.embeddings import encode_texts
+
+    words = (
+        "python kafka kubernetes react terraform spark django airflow postgres golang rust "
+        "backend frontend data platform team lead mentored migrated designed scaled latency"
+    ).split()
+    texts = [" ".join(rng.choice(words, size=12)) for _ in range(count)]
+    return _normalize(np.asarray(encode_texts(texts), dtype=np.float32)).astype(np.float32)
+
+
+def _coarse_scorer(storage: str, corpus: np.ndarray):
+    stored = to_storage(corpus, storage)
+    if storage == "binary":
+        codes = np.frombuffer(b"".join(stored), dtype=np.uint8).reshape(len(corpus), -1)
+
+        def score(query: np.ndarray) -> np.ndarray:
+            query_code = np.frombuffer(to_storage([query], storage)[0], dtype=np.uint8)
+            return -_POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1)
+
+        return score
+
+    decoded = _normalize(np.stack([from_storage(value, storage) for value in stored]))
+    return lambda query: decoded @ query
+
+
+def _recall(found: np.ndarray, exact: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(exact.tolist())) / len(exact)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--rescore-factor", type=int, default=settings.embedding_rescore_factor)
+    parser.add_argument("--embed", action="store_true", help="embed generated text instead")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.embed:
+        print(f"Embedding {args.vectors + args.queries} texts with {settings.embedding_model_name} ...")
+        vectors = _embedded(args.vectors + args.queries, rng)
+    else:
+        vectors = _synthetic(args.vectors + args.queries, args.clusters, rng)
+    corpus, queries = vectors[: args.vectors], vectors[args.vectors :]
+    exact = [np.argsort(-(corpus @ query))[: args.top_k] for query in queries]
+    pool = args.top_k * max(args.rescore_factor, 1)
+
+    print(
+        f"{'storage':<9} {'bytes/vec':>9} {'MB':>8} {'recall@' + str(args.top_k):>10} "
+        f"{'rescored':>9} {'p50 ms':>7}"
+    )
+    for storage in STORAGE_TYPES:
+        scorer = _coarse_scorer(storage, corpus)
+        coarse_recalls, rescored_recalls, latencies = [], [], []
+        for query, truth in zip(queries, exact):
+            started = time.perf_counter()
+            scores = scorer(query)
+            candidates = np.argpartition(-scores, pool)[:pool]
+            candidates = candidates[np.argsort(-scores[candidates])]
+            rescored = candidates[np.argsort(-(corpus[candidates] @ query))][: args.top_k]
+            latencies.append(time.perf_counter() - started)
+            coarse_recalls.append(_recall(candidates[: args.top_k], truth))
+            rescored_recalls.append(_recall(rescored, truth))
+        size = bytes_per_vector(storage)
+        print(
+            f"{storage:<9} {size:>9} {size * args.vectors / 2**20:>8.1f} "
+            f"{statistics.mean(coarse_recalls):>10.3f} {statistics.mean(rescored_recalls):>9.3f} "
+            f"{statistics.median(latencies) * 1000:>7.2f}"
+        )
+    print(
+        f"MB is raw vector data for {args.vectors} vectors, excluding index overhead; "
+        f"rescoring reranks the top {pool} coarse hits in float32."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Bulk-ingest historical resumes from a directory, a .zip archive or a single PDF.
+
+Usage: python scripts/bulk_ingest.py ./resumes --workers 8 --batch-rows 2000
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.bulk_ingestion import BulkIngestReport, bulk_ingest, discover_pdf_sources  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Directory (searched recursively), .zip archive or PDF file.")
+    parser.add_argument("--workers", type=int, default=max(multiprocessing.cpu_count() - 1, 1))
+    parser.add_argument("--batch-rows", type=int, default=settings.bulk_insert_batch_rows)
+    parser.add_argument("--report", help="Write the final JSON report to this file.")
+    args = parser.parse_args()
+
+    sources = discover_pdf_sources(args.path)
+    started = time.perf_counter()
+
+    def progress(report: BulkIngestReport, source: str) -> None:
+        elapsed = time.perf_counter() - started
+        print(
+            f"[{report.files_processed}/{report.files_total}] {source} "
+            f"chunks={report.chunks_inserted} failures={len(report.failures)} "
+            f"({report.files_processed / max(elapsed, 1e-9):.1f} files/s)",
+            flush=True,
+        )
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("forkserver")
+    ) as executor:
+        report = bulk_ingest(
+            sources,
+            executor=executor,
+            insert_batch_rows=args.batch_rows,
+            max_in_flight=args.workers * 2,
+            progress=progress,
+        )
+
+    summary = json.dumps(report.to_dict(), indent=2)
+    if args.report:
+        Path(args.report).write_text(summary)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
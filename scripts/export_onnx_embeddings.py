@@ -0,0 +1,32 @@
+"""Export the embedding model to ONNX (fp32 plus a dynamic int8 copy) for EMBEDDING_BACKEND=onnx.
+
+Run once per model at build or deploy time, where torch is available. The app then loads
+``<EMBEDDING_ONNX_DIR>/<model name>/`` with ONNX Runtime and never imports torch.
+
+Usage: python scripts/export_onnx_embeddings.py [--model sentence-transformers/all-MiniLM-L6-v2] [--no-quantize]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.onnx_embeddings import export_onnx_model, onnx_model_dir  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.embedding_model_name)
+    parser.add_argument("--output", default=None, help="defaults to EMBEDDING_ONNX_DIR/<model>")
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8 copy")
+    args = parser.parse_args()
+
+    target = export_onnx_model(args.model, args.output or onnx_model_dir(args.model), quantize=not args.no_quantize)
+    for path in sorted(target.iterdir()):
+        print(f"{path}  {path.stat().st_size / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
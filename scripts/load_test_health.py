@@ -0,0 +1,96 @@
+"""Measure /health latency while /api/match is saturated.
+
+Against a running server:
+    python scripts/load_test_health.py --base-url http://127.0.0.1:8000 --match-concurrency 64
+
+In-process with a stubbed LLM that sleeps instead of calling the provider:
+    python scripts/load_test_health.py --stub-llm-delay 2.0
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+MATCH_PAYLOAD = {
+    "candidate_profile": "Senior Python engineer, 6 years of Flask and PostgreSQL, some Kubernetes.",
+    "job_description": "Backend engineer with Django, PostgreSQL and Kubernetes experience.",
+}
+
+
+def _summary(label: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+    print(
+        f"{label:<22} p50={statistics.median(ordered) * 1000:7.1f}ms "
+        f"p95={p95 * 1000:7.1f}ms max={ordered[-1] * 1000:7.1f}ms (n={len(ordered)})"
+    )
+
+
+async def _probe_health(client: httpx.AsyncClient, samples: int, interval: float) -> List[float]:
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def _saturate_match(client: httpx.AsyncClient, stop: asyncio.Event) -> int:
+    completed = 0
+    while not stop.is_set():
+        await client.post("/api/match", json=MATCH_PAYLOAD)
+        completed += 1
+    return completed
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+    else:
+        from app import main
+
+        async def stub_analyze_match(candidate_profile: str, job_description: str) -> dict:
+            await asyncio.sleep(args.stub_llm_delay)
+            return {"match_score": 50}
+
+        main.analyze_match_async = stub_analyze_match
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=120
+        )
+
+    async with client:
+        _summary("/health idle", await _probe_health(client, args.samples, args.interval))
+
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(_saturate_match(client, stop)) for _ in range(args.match_concurrency)
+        ]
+        await asyncio.sleep(0.2)
+        _summary("/health under load", await _probe_health(client, args.samples, args.interval))
+        stop.set()
+        completed = sum(await asyncio.gather(*workers))
+        print(f"/api/match completed during run: {completed}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app.")
+    parser.add_argument("--match-concurrency", type=int, default=32)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--stub-llm-delay", type=float, default=1.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
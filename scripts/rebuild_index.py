@@ -0,0 +1,206 @@
+"""Rebuild the collection's vector index with another index profile.
+
+Two modes:
+
+* ``--mode shadow`` (default, online): copy every row into a new collection built with the
+  target profile, wait for its index, load it, and point ``--alias`` at it. Searches keep
+  hitting the old collection until the alias switches, so there is no downtime; pause
+  ingestion during the copy, since rows written meanwhile are not copied. Run the API with
+  ``MILVUS_COLLECTION`` set to that alias; API workers pick up the new index type and
+  embedding storage within a minute. Milvus does not allow an alias named like a
+  collection, so when the alias is the source collection's own name (the first run against
+  the default ``resumes`` collection), the source is first renamed to ``<name>_original``.
+  Requests by that name fail for the moment between the rename and the alias creation.
+* ``--mode in-place``: release the collection, drop and rebuild its vector index, and load it
+  again. Simple, but searches fail until the load finishes.
+
+``--storage`` (shadow mode) also converts the embedding field to another storage type, e.g.
+float32 -> float16, creating the copy with the current schema version. Binary vectors cannot
+be converted back to floats.
+
+Usage:
+  python scripts/rebuild_index.py --profile ivf_sq8 --alias resumes
+  python scripts/rebuild_index.py --profile hnsw --storage float16 --alias resumes
+  python scripts/rebuild_index.py --profile diskann --mode in-place
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from typing import Optional  # noqa: E402
+
+from pymilvus import Collection, CollectionSchema, utility  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.index_profiles import (  # noqa: E402
+    INDEX_PROFILES,
+    VECTOR_FIELD,
+    get_index_profile,
+    vector_index_params,
+)
+from app.services.milvus_client import (  # noqa: E402
+    build_fields,
+    connect_milvus,
+    ensure_scalar_indexes,
+    schema_description,
+)
+from app.services.skill_extraction import UNKNOWN_YEARS  # noqa: E402
+from app.services.vector_storage import (  # noqa: E402
+    STORAGE_TYPES,
+    collection_storage,
+    from_storage,
+    to_storage,
+)
+
+# Values for fields an older source collection predates.
+FIELD_DEFAULTS = {"skills": [], "years_experience": UNKNOWN_YEARS}
+
+
+def _vector_index_name(collection: Collection) -> str:
+    for index in collection.indexes:
+        if index.field_name == VECTOR_FIELD:
+            return index.index_name
+    return ""
+
+
+def rebuild_in_place(collection: Collection, profile_name: str) -> None:
+    index_params = vector_index_params(
+        get_index_profile(profile_name), storage=collection_storage(collection)
+    )
+    print(f"Releasing {collection.name}; rebuilding its vector index as {index_params['index_type']}")
+    collection.release()
+    index_name = _vector_index_name(collection)
+    if index_name:
+        collection.drop_index(index_name=index_name)
+    collection.create_index(field_name=VECTOR_FIELD, index_params=index_params)
+    utility.wait_for_index_building_complete(collection.name)
+    collection.load()
+
+
+def _convert_embeddings(rows, source_storage: str, target_storage: str) -> None:
+    vectors = [from_storage(row[VECTOR_FIELD], source_storage) for row in rows]
+    for row, value in zip(rows, to_storage(vectors, target_storage)):
+        row[VECTOR_FIELD] = value
+
+
+def rebuild_shadow(
+    source: Collection,
+    profile_name: str,
+    alias: str,
+    batch_size: int,
+    storage: Optional[str] = None,
+) -> str:
+    profile = get_index_profile(profile_name)
+    source_storage = collection_storage(source)
+    target_storage = storage or source_storage
+    if source_storage == "binary" and target_storage != "binary":
+        raise SystemExit("Binary embeddings cannot be converted back to floats; re-ingest instead")
+    convert = target_storage != source_storage
+
+    target_name = f"{source.name}_{profile.name}_{int(time.time())}"
+    if convert:
+        schema = CollectionSchema(
+            fields=build_fields(target_storage), description=schema_description(target_storage)
+        )
+    else:
+        schema = CollectionSchema(fields=source.schema.fields, description=source.schema.description)
+    fields = [field for field in schema.fields if not field.auto_id]
+    target = Collection(name=target_name, schema=schema)
+    target.create_index(
+        field_name=VECTOR_FIELD, index_params=vector_index_params(profile, storage=target_storage)
+    )
+    ensure_scalar_indexes(target)
+    source_fields = {field.name for field in source.schema.fields}
+
+    print(
+        f"Copying {source.num_entities} rows from {source.name} ({source_storage}) "
+        f"into {target_name} ({target_storage})"
+    )
+    iterator = source.query_iterator(
+        batch_size=batch_size,
+        expr="",
+        output_fields=[field.name for field in fields if field.name in source_fields],
+    )
+    copied = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            if convert:
+                _convert_embeddings(batch, source_storage, target_storage)
+            target.insert(
+                [[row.get(field.name, FIELD_DEFAULTS.get(field.name)) for row in batch] for field in fields]
+            )
+            copied += len(batch)
+            print(f"  {copied} rows ({copied / (time.perf_counter() - started):.0f} rows/s)")
+    finally:
+        iterator.close()
+    target.flush()
+    utility.wait_for_index_building_complete(target_name)
+    target.load()
+
+    if alias:
+        previous = point_alias(alias, source.name, target_name)
+        print(f"Alias {alias} now points at {target_name}; drop {previous} once traffic moved")
+    else:
+        print(f"Built {target_name}; point MILVUS_COLLECTION (or an alias) at it to switch")
+    return target_name
+
+
+def point_alias(alias: str, source_name: str, target_name: str) -> str:
+    """Point ``alias`` at ``target_name`` and return the source collection's current name.
+
+    A source collection named ``alias`` is renamed to ``<alias>_original`` first, since an
+    alias cannot share a collection's name.
+    """
+
+    if alias in utility.list_collections():
+        if alias != source_name:
+            raise SystemExit(f"{alias} is the name of another collection; pick a different alias")
+        source_name = f"{alias}_original"
+        if utility.has_collection(source_name):
+            raise SystemExit(f"Cannot move {alias} out of the way: {source_name} already exists")
+        utility.rename_collection(alias, source_name)
+        print(f"Renamed collection {alias} to {source_name} so {alias} can become an alias")
+        utility.create_alias(target_name, alias)
+    elif alias in utility.list_aliases(source_name):
+        utility.alter_alias(target_name, alias)
+    else:
+        utility.create_alias(target_name, alias)
+    return source_name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", required=True, choices=sorted(INDEX_PROFILES))
+    parser.add_argument("--mode", choices=("shadow", "in-place"), default="shadow")
+    parser.add_argument("--collection", default=settings.milvus_collection)
+    parser.add_argument(
+        "--alias", default="", help="alias to switch to the rebuilt collection (shadow mode)"
+    )
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument(
+        "--storage",
+        choices=sorted(STORAGE_TYPES),
+        help="convert the embeddings to this storage type (shadow mode)",
+    )
+    args = parser.parse_args()
+
+    connect_milvus()
+    source = Collection(name=args.collection)
+    if args.mode == "in-place":
+        if args.storage:
+            parser.error("--storage needs --mode shadow")
+        rebuild_in_place(source, args.profile)
+    else:
+        rebuild_shadow(source, args.profile, args.alias, args.batch_size, args.storage)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import time
+
+import httpx
+import openai
+
+from app import main
+from app.services import ingest_queue, match_batch, reasoning_engine
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+
+def test_health_stays_responsive_while_match_is_saturated(monkeypatch):
+    async def slow_analyze_match(candidate_profile, job_description):
+        await asyncio.sleep(0.5)
+        return {"match_score": 50}
+
+    monkeypatch.setattr(main, "analyze_match_async", slow_analyze_match)
+
+    async def scenario():
+        async with _client() as client:
+            matches = [
+                asyncio.create_task(
+                    client.post(
+                        "/api/match",
+                        json={"candidate_profile": "Python", "job_description": "Django"},
+                    )
+                )
+                for _ in range(20)
+            ]
+            await asyncio.sleep(0.05)
+
+            latencies = []
+            for _ in range(5):
+                started = time.perf_counter()
+                response = await client.get("/health")
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+            responses = await asyncio.gather(*matches)
+            return latencies, responses
+
+    latencies, responses = asyncio.run(scenario())
+
+    assert all(response.json() == {"match_score": 50} for response in responses)
+    assert max(latencies) < 0.25
+
+
+def _rate_limited() -> openai.RateLimitError:
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_match_batch_fans_out_with_retries_and_partial_results(monkeypatch):
+    calls = {}
+
+    async def flaky_analyze_match(candidate_profile, job_description):
+        calls[candidate_profile] = calls.get(candidate_profile, 0) + 1
+        await asyncio.sleep(0.2)
+        if candidate_profile == "flaky" and calls[candidate_profile] == 1:
+            raise _rate_limited()
+        if candidate_profile == "broken":
+            raise ValueError("LLM response was empty.")
+        return {"match_score": len(candidate_profile)}
+
+    monkeypatch.setattr(match_batch, "analyze_match_async", flaky_analyze_match)
+    monkeypatch.setattr(match_batch.settings, "llm_retry_backoff_seconds", 0.01)
+    profiles = ["flaky", "broken"] + [f"candidate-{'x' * i}" for i in range(18)]
+
+    async def scenario():
+        async with _client() as client:
+            return await client.post(
+                "/api/match/batch",
+                json={
+                    "job_description": "Django",
+                    "candidates": [{"candidate_profile": profile} for profile in profiles],
+                },
+            )
+
+    started = time.perf_counter()
+    response = asyncio.run(scenario())
+    elapsed = time.perf_counter() - started
+
+    body = response.json()
+    assert response.status_code == 200
+    assert [item["index"] for item in body["results"]] == list(range(len(profiles)))
+    assert body["results"][0]["status"] == "ok" and body["results"][0]["attempts"] == 2
+    assert body["results"][1]["status"] == "error" and body["results"][1]["attempts"] == 1
+    assert (body["succeeded"], body["failed"]) == (19, 1)
+    assert body["ranking"][0] == len(profiles) - 1
+    # Twenty 200 ms calls run concurrently, not back to back.
+    assert elapsed < 1.5
+
+
+def test_match_batch_treats_leaked_cancellation_as_a_retryable_failure(monkeypatch):
+    calls = {}
+
+    async def analyze_match(candidate_profile, job_description):
+        calls[candidate_profile] = calls.get(candidate_profile, 0) + 1
+        # e.g. the shared LLM cache call this request joined was cancelled by its leader's timeout
+        if candidate_profile == "always" or calls[candidate_profile] == 1:
+            raise asyncio.CancelledError()
+        return {"match_score": 50}
+
+    monkeypatch.setattr(match_batch, "analyze_match_async", analyze_match)
+    monkeypatch.setattr(match_batch.settings, "llm_retry_backoff_seconds", 0.01)
+    monkeypatch.setattr(match_batch.settings, "llm_max_attempts", 2)
+
+    async def scenario():
+        async with _client() as client:
+            return await client.post(
+                "/api/match/batch",
+                json={"job_description": "Django", "candidates": [{"candidate_profile": "once"}, {"candidate_profile": "always"}]},
+            )
+
+    body = asyncio.run(scenario()).json()
+    assert [(item["status"], item["attempts"]) for item in body["results"]] == [("ok", 2), ("error", 2)]
+    assert body["results"][1]["error"] == "cancelled upstream"
+
+    # The SDK does not retry underneath the app's own attempts.
+    monkeypatch.setattr(reasoning_engine, "_async_openai_client", None)
+    monkeypatch.setattr(reasoning_engine.settings, "openai_api_key", "sk-test")
+    assert reasoning_engine.get_async_openai_client().max_retries == 0
+
+
+def test_match_batch_streams_ndjson_in_completion_order(monkeypatch):
+    async def analyze_match(candidate_profile, job_description):
+        await asyncio.sleep(float(candidate_profile))
+        return {"match_score": 1}
+
+    monkeypatch.setattr(match_batch, "analyze_match_async", analyze_match)
+
+    async def scenario():
+        async with _client() as client:
+            return await client.post(
+                "/api/match/batch",
+                json={
+                    "job_description": "Django",
+                    "candidates": [{"candidate_profile": "0.2"}, {"candidate_profile": "0.01"}],
+                    "stream": True,
+                },
+            )
+
+    response = asyncio.run(scenario())
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [line["index"] for line in lines] == [1, 0]
+
+
+def test_match_streams_server_sent_events(monkeypatch):
+    async def stream_match_analysis(candidate_profile, job_description):
+        yield "field", {"name": "match_score", "value": 77}
+        yield "result", {"match_score": 77}
+
+    monkeypatch.setattr(main, "stream_match_analysis", stream_match_analysis)
+
+    async def scenario():
+        async with _client() as client:
+            return await client.post(
+                "/api/match?stream=true",
+                json={"candidate_profile": "Python", "job_description": "Django"},
+            )
+
+    response = asyncio.run(scenario())
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'event: field\ndata: {"name": "match_score", "value": 77}\n\n'
+        'event: result\ndata: {"match_score": 77}\n\n'
+    )
+
+
+def test_ingest_parses_uploads_in_memory_and_caps_their_size(monkeypatch):
+    parsed, ingested = [], []
+
+    async def extract_chunks(content):
+        parsed.append(content)
+        return ["chunk one", "chunk two"]
+
+    def ingest_chunks(candidate_name, text_chunks, *, file_hash):
+        ingested.append((candidate_name, text_chunks, file_hash))
+        return text_chunks
+
+    monkeypatch.setattr(main, "extract_pdf_chunks", extract_chunks)
+    monkeypatch.setattr(main, "find_ingested_document", lambda file_hash: None)
+    monkeypatch.setattr(main, "ingest_chunks", ingest_chunks)
+    monkeypatch.setattr(main.settings, "upload_max_bytes", 16)
+
+    async def scenario():
+        async with _client() as client:
+            ok = await client.post(
+                "/ingest", files={"file": ("../../etc/Jane Doe.pdf", b"%PDF-1.4 tiny", "application/pdf")}
+            )
+            too_large = await client.post(
+                "/ingest", files={"file": ("big.pdf", b"%PDF-1.4 " + b"x" * 32, "application/pdf")}
+            )
+            return ok, too_large
+
+    ok, too_large = asyncio.run(scenario())
+
+    assert ok.status_code == 200 and ok.json() == {"chunks": 2}
+    assert parsed == [b"%PDF-1.4 tiny"]
+    assert ingested[0][:2] == ("Jane Doe", ["chunk one", "chunk two"])
+    assert too_large.status_code == 413
+    assert len(parsed) == 1
+
+
+def test_background_ingest_returns_a_job_and_reports_its_status(monkeypatch, tmp_path):
+    queue = ingest_queue.IngestQueue(str(tmp_path / "queue.sqlite3"))
+    monkeypatch.setattr(main, "get_ingest_queue", lambda: queue)
+    monkeypatch.setattr(main, "extract_pdf_chunks", lambda content: (_ for _ in ()).throw(AssertionError))
+
+    async def scenario():
+        async with _client() as client:
+            disabled = await client.post(
+                "/ingest?background=true", files={"file": ("Jane Doe.pdf", b"%PDF-1.4 tiny", "application/pdf")}
+            )
+            assert disabled.status_code == 422
+            monkeypatch.setattr(main.settings, "ingest_background", True)
+            queued = await client.post("/ingest", files={"file": ("Jane Doe.pdf", b"%PDF-1.4 tiny", "application/pdf")})
+            job_id = queued.json()["job_id"]
+            before = await client.get(f"/ingest/jobs/{job_id}")
+            ingest_queue.work_once(queue, "worker:1", lambda queue, job: len(job.payload))
+            after = await client.get(queued.json()["status_url"])
+            missing = await client.get("/ingest/jobs/unknown")
+            return queued, before, after, missing
+
+    queued, before, after, missing = asyncio.run(scenario())
+    queue.close()
+
+    assert queued.status_code == 202 and queued.json()["status"] == "queued"
+    assert before.json()["status"] == "queued" and before.json()["candidate_name"] == "Jane Doe"
+    body = after.json()
+    assert (body["status"], body["stage"], body["attempts"], body["chunks"]) == ("succeeded", "done", 1, 13)
+    assert missing.status_code == 404
+
+
+def test_match_batch_prefilters_with_the_reranker(monkeypatch):
+    from app.services import reranker
+
+    scored = []
+
+    class LengthCrossEncoder:
+        def predict(self, pairs, batch_size=32, show_progress_bar=False):
+            scored.extend(text for _, text in pairs)
+            return [len(text) for _, text in pairs]
+
+    async def analyze_match(candidate_profile, job_description):
+        return {"match_score": 10}
+
+    monkeypatch.setattr(reranker, "get_reranker", lambda: LengthCrossEncoder())
+    monkeypatch.setattr(match_batch, "analyze_match_async", analyze_match)
+    profiles = ["a" * length for length in (3, 9, 1, 7, 5)]
+
+    async def scenario():
+        async with _client() as client:
+            return await client.post(
+                "/api/match/batch",
+                json={
+                    "job_description": "Django",
+                    "candidates": [{"candidate_profile": profile} for profile in profiles],
+                    "rerank_top_m": 2,
+                },
+            )
+
+    body = asyncio.run(scenario()).json()
+    assert sorted(scored) == sorted(profiles)
+    assert [item["status"] for item in body["results"]] == ["skipped", "ok", "skipped", "ok", "skipped"]
+    assert body["results"][0]["rerank_score"] == 3 and body["results"][0]["attempts"] == 0
+    assert (body["succeeded"], body["failed"], body["skipped"]) == (2, 0, 3)
+    assert sorted(body["ranking"]) == [1, 3]
+
+
+def test_search_batch_streams_one_line_per_query(monkeypatch):
+    calls = []
+
+    def fake_batch(job_descriptions, top_n, **options):
+        calls.append({**options, "top_n": top_n})
+        for index, text in enumerate(job_descriptions):
+            yield index, {"candidates": [{"candidate_name": text.upper()}], "total_candidates": 1, "next_cursor": None}
+
+    monkeypatch.setattr(main, "iter_top_candidates_batch", fake_batch)
+
+    async def scenario():
+        async with _client() as client:
+            streamed = await client.post(
+                "/search/batch",
+                json={"job_descriptions": ["go", "rust"], "top_n": 3, "rerank": True, "stream": True},
+            )
+            plain = await client.post("/search/batch", json={"job_descriptions": ["go"]})
+            too_many = await client.post("/search/batch", json={"job_descriptions": ["go"] * 501})
+            return streamed, plain, too_many
+
+    streamed, plain, too_many = asyncio.run(scenario())
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    assert [(line["index"], line["candidates"][0]["candidate_name"]) for line in lines] == [(0, "GO"), (1, "RUST")]
+    assert (calls[0]["top_n"], calls[0]["rerank"]) == (3, True)
+    assert plain.json()["results"][0]["candidates"] == [{"candidate_name": "GO"}]
+    assert too_many.status_code == 422
+
+
+def test_search_rejects_malformed_search_params(monkeypatch):
+    calls = []
+
+    def fake_search(job_description, **options):
+        calls.append(options)
+        return [("Alice: Python", 0.9)]
+
+    monkeypatch.setattr(main, "search_candidates", fake_search)
+
+    async def scenario():
+        async with _client() as client:
+            valid = await client.post("/search", json={"job_description": "python", "search_params": {"ef": 256}})
+            listed = await client.post("/search", json={"job_description": "python", "search_params": ["ef", 256]})
+            nested = await client.post("/search", json={"job_description": "python", "search_params": {"ef": [256]}})
+            return valid, listed, nested
+
+    valid, listed, nested = asyncio.run(scenario())
+    assert valid.json()["results"] == [{"text": "Alice: Python", "score": 0.9}]
+    assert calls[0]["params"] == {"ef": 256}
+    assert (listed.status_code, nested.status_code) == (422, 422)
+    assert len(calls) == 1
+
+
+def test_search_parses_rerank_strictly(monkeypatch):
+    calls = []
+
+    def fake_search(job_description, **options):
+        calls.append(options["rerank"])
+        return []
+
+    monkeypatch.setattr(main, "search_candidates", fake_search)
+
+    async def scenario():
+        async with _client() as client:
+            responses = [
+                await client.post("/search", json={"job_description": "python", "rerank": value})
+                for value in (True, "false", "0", "TRUE", "maybe", 1)
+            ]
+            return [response.status_code for response in responses]
+
+    assert asyncio.run(scenario()) == [200, 200, 200, 200, 422, 422]
+    assert calls == [True, False, False, True]
+
+
+def test_search_maps_rejected_milvus_requests_to_422(monkeypatch):
+    from pymilvus import MilvusException
+
+    def fake_search(job_description, **options):
+        raise MilvusException(message="cannot parse expression", is_input_error=True)
+
+    monkeypatch.setattr(main, "search_candidates", fake_search)
+
+    async def scenario():
+        async with _client() as client:
+            return await client.post("/search", json={"job_description": "python"})
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 422
+    assert response.json()["detail"] == "cannot parse expression"
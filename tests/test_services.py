@@ -1,22 +1,67 @@
+import asyncio
 import json
+import os
+import threading
+import time
+from pathlib import Path
 
 import pytest
 
-from app.services import ingestion, reasoning_engine, search
+from pymilvus import MilvusException
+from pymilvus.exceptions import MilvusUnavailableException
+
+from app.core.config import settings
+from app.services import (
+    bulk_ingestion,
+    candidate_search,
+    chunking,
+    dedup_cache,
+    embedding_batcher,
+    embeddings,
+    flush_policy,
+    index_profiles,
+    ingest_queue,
+    ingestion,
+    json_stream,
+    lexical_index,
+    llm_cache,
+    milvus_client,
+    reasoning_engine,
+    search,
+    search_cache,
+    search_filters,
+    skill_extraction,
+    vector_store,
+)
 
 
 class StubCollection:
     def __init__(self):
         self.inserted = []
         self.flushed = False
+        self.flush_count = 0
+        self.deleted = []
 
     def insert(self, data, fields=None):
         self.inserted.append((data, tuple(fields) if fields else None))
+        names = data[list(fields).index("candidate_name") if fields else 2]
+        self.rows = getattr(self, "rows", [])
+        start = len(self.rows)
+        self.rows.extend({"id": start + offset, "candidate_name": name} for offset, name in enumerate(names))
+
+    def query_iterator(self, batch_size=1000, expr="", output_fields=None):
+        predicate = vector_store.compile_expr(expr)
+        batches = iter([[row for row in getattr(self, "rows", []) if predicate(row)]])
+        return type("Iterator", (), {"next": lambda _: next(batches, []), "close": lambda _: None})()
 
     def flush(self):
         self.flushed = True
+        self.flush_count += 1
+
+    def delete(self, expr):
+        self.deleted.append(expr)
 
-    def search(self, data, anns_field=None, param=None, limit=None, output_fields=None):
+    def search(self, data, anns_field=None, param=None, limit=None, output_fields=None, **kwargs):
         return [[
             StubHit(
                 entity={
@@ -73,6 +118,27 @@ class StubOpenAI:
         self.chat = type("Chat", (), {"completions": StubChat(content)})()
 
 
+class StubAsyncChat:
+    def __init__(self, content):
+        self._content = content
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return self._stream()
+        return StubCompletion(self._content)
+
+    async def _stream(self):
+        # Deltas of a few characters, like provider token streams.
+        for start in range(0, len(self._content), 3):
+            delta = type("Delta", (), {"content": self._content[start : start + 3]})()
+            yield type("Chunk", (), {"choices": [type("Choice", (), {"delta": delta})()]})()
+
+
+class StubAsyncOpenAI:
+    def __init__(self, content):
+        self.chat = type("Chat", (), {"completions": StubAsyncChat(content)})()
+
+
 def test_chunk_text_overlap():
     text = "one two three four five six seven"
     chunks = ingestion.chunk_text(text, chunk_size=3, overlap=1)
@@ -92,6 +158,61 @@ def test_chunk_text_respects_max_length():
     assert " ".join(chunks).split() == text.split()
 
 
+def _reference_chunk_text(text, chunk_size, overlap, max_length):
+    # The original quadratic implementation, kept as an oracle for the streaming chunker.
+    tokens = text.split()
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        end = min(start + chunk_size, len(tokens))
+        chunk = " ".join(tokens[start:end])
+        if max_length > 0 and len(chunk.encode("utf-8")) > max_length:
+            while end > start and len(chunk.encode("utf-8")) > max_length:
+                end -= 1
+                chunk = " ".join(tokens[start:end])
+            if end == start:
+                chunk = tokens[start].encode("utf-8")[:max_length].decode("utf-8", errors="ignore")
+                if chunk:
+                    chunks.append(chunk)
+                start += 1
+                continue
+        if chunk:
+            chunks.append(chunk)
+        next_start = end - overlap if overlap > 0 else end
+        start = end if next_start <= start else next_start
+    return chunks
+
+
+def test_iter_chunks_matches_reference_chunker():
+    import random
+
+    rng = random.Random(7)
+    vocabulary = ["a", "python", "Kubernetes", "ünïcödé", "数据工程", "x" * 40, "naïve\u00a0café"]
+    for _ in range(200):
+        text = "\n".join(
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+            for _ in range(rng.randint(0, 20))
+        )
+        chunk_size = rng.randint(1, 30)
+        overlap = rng.randint(0, 10)
+        max_length = rng.choice([0, 3, 16, 64, 200])
+        assert chunking.chunk_text(text, chunk_size, overlap, max_length, "tokens") == (
+            _reference_chunk_text(text, chunk_size, overlap, max_length)
+        )
+        pages = text.split("\n")
+        assert list(chunking.iter_chunks(pages, chunk_size, overlap, max_length, "tokens")) == (
+            _reference_chunk_text(text, chunk_size, overlap, max_length)
+        )
+
+
+def test_iter_chunks_prefers_section_boundaries():
+    text = "Jane Doe. Backend engineer since 2015\nExperience\nBuilt APIs in Django and Flask\nSkills\nPython AWS"
+    chunks = chunking.chunk_text(text, chunk_size=8, overlap=0, max_length=0, boundary="section")
+
+    assert chunks[0] == "Jane Doe. Backend engineer since 2015"
+    assert chunks[1].startswith("Experience")
+
+
 def test_ingest_resume_inserts_chunks(monkeypatch, tmp_path):
     stub_collection = StubCollection()
     stub_model = StubModel()
@@ -104,7 +225,10 @@ def test_ingest_resume_inserts_chunks(monkeypatch, tmp_path):
     fake_pdf.write_text("placeholder")
 
     chunks = ingestion.ingest_resume(
-        str(fake_pdf), collection=stub_collection, model=stub_model
+        str(fake_pdf),
+        collection=stub_collection,
+        model=stub_model,
+        flush_policy=flush_policy.FlushPolicy("per_insert"),
     )
 
     assert chunks == ["lorem ipsum dolor sit amet"]
@@ -149,4 +273,1316 @@ def test_analyze_match_returns_json(monkeypatch):
         model="fake-model",
     )
 
+    usage = result.pop("usage")
+    assert result == llm_response
+    assert usage["cached"] is False and usage["compression"]["compressed"] is False
+
+
+def test_embedding_registry_loads_model_once(monkeypatch):
+    loaded = []
+
+    def fake_model(name):
+        loaded.append(name)
+        return StubModel()
+
+    embeddings.reset_embedding_registry()
+    monkeypatch.setattr(embeddings, "_load_model", fake_model)
+
+    first = embeddings.get_embedding_model()
+    second = embeddings.get_embedding_model()
+    assert first is second
+    assert len(loaded) == 1
+
+    assert embeddings.is_embedding_model_ready() is False
+    embeddings.warm_up_embedding_model()
+    assert embeddings.is_embedding_model_ready() is True
+    embeddings.reset_embedding_registry()
+
+
+def test_embedding_batcher_coalesces_concurrent_requests():
+    calls = []
+
+    class RecordingModel(StubModel):
+        def encode(self, texts, show_progress_bar=False):
+            calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+    model = RecordingModel()
+    batcher = embedding_batcher.EmbeddingBatcher(
+        lambda: model, max_batch_size=16, max_wait_ms=200, max_queue_depth=16
+    )
+    try:
+        futures = [batcher.submit(["a" * n]) for n in range(1, 5)]
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.stop(timeout=5)
+
+    assert results == [[[1.0]], [[2.0]], [[3.0]], [[4.0]]]
+    assert calls == [["a", "aa", "aaa", "aaaa"]]
+
+
+def test_embedding_batcher_rejects_when_queue_full():
+    batcher = embedding_batcher.EmbeddingBatcher(
+        StubModel, max_batch_size=1, max_wait_ms=0, max_queue_depth=1
+    )
+    # Hold the worker back so the single queue slot stays occupied.
+    batcher.start = lambda: None
+    batcher.submit(["first"])
+
+    with pytest.raises(embedding_batcher.EmbeddingQueueFullError):
+        batcher.submit(["second"])
+
+
+class StubConnections:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.connect_calls = 0
+        self.aliases = set()
+
+    def connect(self, alias, **kwargs):
+        self.connect_calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise MilvusException(message="unavailable")
+        self.aliases.add(alias)
+
+    def has_connection(self, alias):
+        return alias in self.aliases
+
+    def disconnect(self, alias):
+        self.aliases.discard(alias)
+
+
+class StubMilvusCollection:
+    loads = 0
+    indexes = []
+
+    def __init__(self, name, schema=None, using=None):
+        self.name = name
+
+    def has_index(self):
+        return True
+
+    def create_index(self, field_name, index_params, index_name=None):
+        pass
+
+    def load(self):
+        StubMilvusCollection.loads += 1
+
+
+def _patch_milvus(monkeypatch, stub_connections):
+    StubMilvusCollection.loads = 0
+    milvus_client.close_milvus()
+    monkeypatch.setattr(milvus_client, "connections", stub_connections)
+    monkeypatch.setattr(milvus_client, "Collection", StubMilvusCollection)
+    monkeypatch.setattr(
+        milvus_client,
+        "utility",
+        type("Utility", (), {"has_collection": staticmethod(lambda name, using=None: True)}),
+    )
+    monkeypatch.setattr(milvus_client.settings, "milvus_connect_backoff_seconds", 0)
+
+
+def test_get_or_create_collection_reuses_cached_handle(monkeypatch):
+    stub_connections = StubConnections()
+    _patch_milvus(monkeypatch, stub_connections)
+
+    first = milvus_client.get_or_create_collection()
+    second = milvus_client.get_collection()
+
+    assert first is second
+    assert stub_connections.connect_calls == 1
+    assert StubMilvusCollection.loads == 1
+
+    refreshed = milvus_client.refresh_collection()
+    assert refreshed is not first
+    assert StubMilvusCollection.loads == 2
+    milvus_client.close_milvus()
+
+
+def test_cached_collection_picks_up_the_schema_after_an_alias_switch(monkeypatch):
+    from pymilvus import DataType
+
+    from app.services import index_profiles, vector_storage
+
+    class AliasedCollection(StubMilvusCollection):
+        dtype = DataType.FLOAT_VECTOR
+
+        def __init__(self, name, schema=None, using=None):
+            super().__init__(name, schema, using)
+            # Like pymilvus, the handle keeps the schema it described when it was built.
+            field = type("Field", (), {"name": "embedding", "dtype": AliasedCollection.dtype})
+            self.schema = type("Schema", (), {"fields": [field]})
+
+    _patch_milvus(monkeypatch, StubConnections())
+    monkeypatch.setattr(milvus_client, "Collection", AliasedCollection)
+    first = milvus_client.get_or_create_collection()
+    assert vector_storage.collection_storage(first) == "float32"
+
+    # rebuild_index.py --storage float16 --alias moves the alias to a float16 collection.
+    AliasedCollection.dtype = DataType.FLOAT16_VECTOR
+    index_profiles._live_index_types.put(first.name, "HNSW")
+    assert milvus_client.get_or_create_collection() is first  # within the TTL
+    monkeypatch.setattr(milvus_client, "LIVE_SCHEMA_TTL_SECONDS", 0.0)
+    switched = milvus_client.get_or_create_collection()
+    assert vector_storage.collection_storage(switched) == "float16"
+    assert index_profiles._live_index_types.get(first.name) is None
+    assert milvus_client.get_collection() is switched
+    milvus_client.close_milvus()
+
+
+def test_connect_milvus_retries_with_backoff(monkeypatch):
+    stub_connections = StubConnections(failures=2)
+    _patch_milvus(monkeypatch, stub_connections)
+    monkeypatch.setattr(milvus_client.settings, "milvus_connect_retries", 3)
+
+    milvus_client.connect_milvus()
+
+    assert stub_connections.connect_calls == 3
+    milvus_client.close_milvus()
+
+
+def test_milvus_errors_drop_the_cached_handle_and_reconnect(monkeypatch):
+    stub_connections = StubConnections()
+    _patch_milvus(monkeypatch, stub_connections)
+    first = milvus_client.get_or_create_collection()
+    used = []
+
+    def search_once(collection):
+        used.append(collection)
+        if len(used) == 1:
+            raise MilvusUnavailableException(message="connection reset")
+        return ["hit"]
+
+    assert milvus_client.call_with_reconnect(search_once, first) == ["hit"]
+    assert used[1] is not first
+    assert used[1] is milvus_client.get_collection()
+    assert stub_connections.connect_calls == 2
+
+    def failing_insert(collection):
+        raise MilvusUnavailableException(message="connection reset")
+
+    # Inserts are not retried, but the broken handle is still dropped.
+    with pytest.raises(MilvusException):
+        milvus_client.call_with_reconnect(failing_insert, used[1], retry=False)
+    assert not milvus_client.is_milvus_ready()
+    assert stub_connections.connect_calls == 2
+
+    # A request the server rejects is raised as is and keeps the connection.
+    handle = milvus_client.get_or_create_collection()
+    attempts = []
+
+    def invalid_filter(collection):
+        attempts.append(collection)
+        raise MilvusException(message="cannot parse expression", is_input_error=True)
+
+    with pytest.raises(MilvusException):
+        milvus_client.call_with_reconnect(invalid_filter, handle)
+    assert attempts == [handle]
+    assert milvus_client.get_collection() is handle
+    assert stub_connections.connect_calls == 3
+    milvus_client.close_milvus()
+
+
+def test_analyze_match_async_returns_json():
+    llm_response = {"match_score": 64, "green_flags": ["Flask"], "red_flags": []}
+
+    result = asyncio.run(
+        reasoning_engine.analyze_match_async(
+            candidate_profile="Flask developer",
+            job_description="Django developer",
+            client=StubAsyncOpenAI(json.dumps(llm_response)),
+            model="fake-model",
+        )
+    )
+
+    result.pop("usage")
     assert result == llm_response
+
+
+def test_bulk_ingest_batches_inserts_and_reports_failures(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def fake_extract(source):
+        if source == "broken":
+            raise ValueError("not a PDF")
+        return ingestion.chunk_text(source)
+
+    monkeypatch.setattr(bulk_ingestion, "extract_chunks_from_pdf", fake_extract)
+    stub_collection = StubCollection()
+    sources = [
+        ("alice.pdf", lambda: "alpha beta gamma"),
+        ("broken.pdf", lambda: "broken"),
+        ("bob.pdf", lambda: "delta epsilon"),
+        ("carol.pdf", lambda: "zeta eta theta"),
+    ]
+    progress_events = []
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        report = bulk_ingestion.bulk_ingest(
+            sources,
+            collection=stub_collection,
+            model=StubModel(),
+            executor=executor,
+            insert_batch_rows=2,
+            progress=lambda report, name: progress_events.append(name),
+        )
+
+    assert report.files_total == 4
+    assert report.files_succeeded == 3
+    assert report.chunks_inserted == 3
+    assert [failure.source for failure in report.failures] == ["broken.pdf"]
+    assert sorted(progress_events) == sorted(name for name, _ in sources)
+    inserted_names = [name for data, _ in stub_collection.inserted for name in data[2]]
+    assert inserted_names == ["alice", "bob", "carol"]
+    assert len(stub_collection.inserted) == 2
+    assert stub_collection.flush_count == 1
+
+
+def test_flush_policy_rows_defers_flush_until_threshold():
+    stub_collection = StubCollection()
+    policy = flush_policy.FlushPolicy("rows", every_rows=5)
+
+    assert policy.record_insert(stub_collection, 3) is False
+    assert stub_collection.flush_count == 0
+    assert policy.record_insert(stub_collection, 3) is True
+    assert stub_collection.flush_count == 1
+
+    metrics = policy.metrics()
+    assert metrics["rows_inserted"] == 6
+    assert metrics["rows_since_flush"] == 0
+    assert metrics["flush_count"] == 1
+
+
+def test_flush_policy_shutdown_flushes_only_on_close():
+    stub_collection = StubCollection()
+    policy = flush_policy.FlushPolicy("shutdown")
+
+    for _ in range(3):
+        policy.record_insert(stub_collection, 10)
+    assert stub_collection.flush_count == 0
+
+    policy.close()
+    assert stub_collection.flush_count == 1
+
+
+def test_ingest_resume_dedups_files_and_chunk_embeddings(monkeypatch, tmp_path):
+    stub_collection = StubCollection()
+    cache = dedup_cache.DedupCache(":memory:")
+    encoded = []
+
+    def fake_encode(texts, model=None):
+        encoded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(ingestion, "encode_texts", fake_encode)
+    resume = tmp_path / "dana.pdf"
+    policy = flush_policy.FlushPolicy("never")
+
+    def ingest(text):
+        resume.write_text(text)
+        return ingestion.ingest_resume(
+            str(resume),
+            collection=stub_collection,
+            extracted_text=text,
+            flush_policy=policy,
+            dedup_cache=cache,
+        )
+
+    assert ingest("python django aws") == ["python django aws"]
+    assert ingest("python django aws") == ["python django aws"]
+    assert len(stub_collection.inserted) == 1
+    assert encoded == ["python django aws"]
+
+    # A changed resume keeps the previous rows while upserts are off (the default)...
+    monkeypatch.setattr(ingestion, "chunk_text", lambda text: text.split("|"))
+    assert ingest("python django aws|java") == ["python django aws", "java"]
+    assert stub_collection.deleted == []
+
+    # ...and with them on, replaces them by id once the new rows are in; a failed insert
+    # deletes nothing.
+    monkeypatch.setattr(ingestion.settings, "dedup_upsert_by_candidate", True)
+    insert = stub_collection.insert
+    monkeypatch.setattr(stub_collection, "insert", lambda data, fields=None: (_ for _ in ()).throw(MilvusException(message="down")))
+    with pytest.raises(MilvusException):
+        ingest("python django aws|kubernetes")
+    assert stub_collection.deleted == []
+    monkeypatch.setattr(stub_collection, "insert", insert)
+    encoded.clear()
+    assert ingest("python django aws|kubernetes") == ["python django aws", "kubernetes"]
+    assert stub_collection.deleted == ["id in [0, 1, 2]"]
+    assert encoded == []  # both chunk vectors were cached by the failed attempt
+    assert stub_collection.inserted[-1][0][0] == [[17.0], [10.0]]
+
+
+def test_ingest_keeps_every_document_of_a_candidate_without_upserts(monkeypatch, tmp_path):
+    stub_collection = StubCollection()
+    cache = dedup_cache.DedupCache(":memory:")
+    monkeypatch.setattr(ingestion, "encode_texts", lambda texts, model=None: [[0.1] for _ in texts])
+    resume = tmp_path / "alice.pdf"
+
+    def ingest(text):
+        resume.write_text(text)
+        return ingestion.ingest_resume(
+            str(resume),
+            collection=stub_collection,
+            extracted_text=text,
+            flush_policy=flush_policy.FlushPolicy("never"),
+            dedup_cache=cache,
+        )
+
+    # Two different files for the same candidate, then the first one again.
+    ingest("alice python")
+    ingest("alice golang")
+    ingest("alice python")
+
+    assert len(stub_collection.inserted) == 2
+    assert stub_collection.deleted == []
+    assert len(cache.candidate_hashes("alice")) == 2
+
+
+def test_search_candidates_caches_vectors_and_results(monkeypatch):
+    class CountingCollection(StubCollection):
+        searches = 0
+
+        def search(self, *args, **kwargs):
+            CountingCollection.searches += 1
+            return super().search(*args, **kwargs)
+
+    encoded = []
+    search_cache.query_vectors.clear()
+    search_cache.search_results.clear()
+    monkeypatch.setattr(search, "get_collection", lambda: CountingCollection())
+    monkeypatch.setattr(
+        search, "encode_texts", lambda texts, model=None: encoded.extend(texts) or [[0.1, 0.2]]
+    )
+
+    first = search.search_candidates("Backend   engineer", top_k=2)
+    second = search.search_candidates("Backend engineer", top_k=2)
+
+    assert first == second
+    assert encoded == ["Backend engineer"]
+    assert CountingCollection.searches == 1
+
+    # Any write to the collection invalidates cached results but keeps the query vector.
+    search_cache.bump_collection_version()
+    search.search_candidates("Backend engineer", top_k=2)
+    assert CountingCollection.searches == 2
+    assert encoded == ["Backend engineer"]
+
+
+def test_analyze_match_async_coalesces_identical_requests(monkeypatch, tmp_path):
+    calls = []
+
+    async def fake_complete(candidate_profile, job_description, *, client=None, model=None, usage=None):
+        calls.append(candidate_profile)
+        usage.update(prompt_tokens=120, completion_tokens=30, total_tokens=150)
+        await asyncio.sleep(0.01)
+        return {"match_score": 70, "green_flags": [], "red_flags": []}
+
+    cache = llm_cache.LLMResponseCache(8, str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(reasoning_engine, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(reasoning_engine, "_complete_match_async", fake_complete)
+
+    async def run_all():
+        return await asyncio.gather(
+            *(
+                reasoning_engine.analyze_match_async("Flask  developer", "Django developer")
+                for _ in range(5)
+            )
+        )
+
+    results = asyncio.run(run_all())
+    assert len(calls) == 1
+    assert all(result["match_score"] == 70 for result in results)
+    # Only the call that reached the provider spent tokens.
+    assert sorted(result["usage"]["total_tokens"] for result in results) == [0, 0, 0, 0, 150]
+    assert cache.stats()["coalesced"] == 4
+
+    # Whitespace differences share a fingerprint, and entries survive a restart.
+    cache.close()
+    reopened = llm_cache.LLMResponseCache(8, str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(reasoning_engine, "get_llm_cache", lambda: reopened)
+    result = asyncio.run(reasoning_engine.analyze_match_async("Flask developer", "Django developer"))
+    assert result["match_score"] == 70
+    assert len(calls) == 1
+    reopened.close()
+
+
+def test_llm_cache_follower_takes_over_from_a_cancelled_leader():
+    cache = llm_cache.LLMResponseCache(8)
+    calls = []
+
+    async def compute():
+        calls.append(len(calls))
+        await asyncio.sleep(0.2)
+        return {"match_score": 70}
+
+    async def scenario():
+        leader = asyncio.create_task(asyncio.wait_for(cache.get_or_compute_async("fp", compute), 0.05))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(asyncio.wait_for(cache.get_or_compute_async("fp", compute), 2.0))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(scenario())
+    assert isinstance(leader, asyncio.TimeoutError)
+    assert follower == {"match_score": 70}
+    assert calls == [0, 1]
+    assert cache.get("fp") == {"match_score": 70}
+
+
+def test_incremental_json_parser_emits_fields_as_they_complete():
+    payload = '```json\n{"match_score": 82, "chain_of_thought": "Has \\"Flask\\", {not} Django", "green_flags": ["a, b"]}\n```'
+    parser = json_stream.IncrementalJSONObjectParser()
+
+    emitted = []
+    for position, char in enumerate(payload):
+        for name, value in parser.feed(char):
+            emitted.append((name, value, position))
+
+    assert [(name, value) for name, value, _ in emitted] == [
+        ("match_score", 82),
+        ("chain_of_thought", 'Has "Flask", {not} Django'),
+        ("green_flags", ["a, b"]),
+    ]
+    # The score is available long before the payload ends.
+    assert emitted[0][2] < len(payload) // 3
+    assert parser.done
+
+
+def test_stream_match_analysis_yields_fields_then_parsed_result():
+    llm_response = {"match_score": 64, "green_flags": ["Flask"], "red_flags": []}
+
+    async def collect():
+        return [
+            event
+            async for event in reasoning_engine.stream_match_analysis(
+                "Flask developer",
+                "Django developer",
+                client=StubAsyncOpenAI(json.dumps(llm_response)),
+                model="fake-model",
+            )
+        ]
+
+    events = asyncio.run(collect())
+    fields = [data["name"] for event, data in events if event == "field"]
+    tokens = "".join(data["text"] for event, data in events if event == "token")
+
+    assert fields == ["match_score", "green_flags", "red_flags"]
+    assert tokens == json.dumps(llm_response)
+    event, result = events[-1]
+    result.pop("usage")
+    assert (event, result) == ("result", llm_response)
+
+
+def test_search_top_candidates_groups_chunks_and_paginates(monkeypatch):
+    hits = [
+        ("verbose", 0.90), ("verbose", 0.89), ("verbose", 0.88), ("verbose", 0.87),
+        ("steady", 0.89), ("steady", 0.89), ("single", 0.95), ("tail", 0.10),
+    ]
+
+    class ChunkCollection(StubCollection):
+        searches = []
+
+        def search(self, data, anns_field=None, param=None, limit=None, **kwargs):
+            ChunkCollection.searches.append((limit, param["params"]["ef"]))
+            return [[
+                StubHit(
+                    entity={"candidate_name": name, "text_chunk": f"{name} {i}", "skills": []},
+                    distance=score,
+                )
+                for i, (name, score) in enumerate(hits)
+            ]]
+
+    search_cache.search_results.clear()
+    monkeypatch.setattr(search, "encode_texts", lambda texts, model=None: [[0.3, 0.4]])
+    monkeypatch.setattr(candidate_search, "get_collection", lambda: ChunkCollection())
+
+    page = candidate_search.search_top_candidates(
+        "backend", top_n=2, aggregation="max", overfetch=100
+    )
+    assert [item["candidate_name"] for item in page["candidates"]] == ["single", "verbose"]
+    assert page["candidates"][1]["chunk_hits"] == 4
+    assert len(page["candidates"][1]["chunks"]) == 3
+    assert page["total_candidates"] == 4
+    assert ChunkCollection.searches == [(100, 100)]
+
+    second = candidate_search.search_top_candidates(cursor=page["next_cursor"], top_n=2)
+    assert [item["candidate_name"] for item in second["candidates"]] == ["steady", "tail"]
+    assert second["next_cursor"] is None
+    assert len(ChunkCollection.searches) == 1
+
+    assert candidate_search.aggregate_score([0.9, 0.5, 0.4], "mean_top_m", 2, 0.7) == pytest.approx(0.7)
+    assert candidate_search.aggregate_score([0.9, 0.5], "fusion", 2, 0.5) == pytest.approx(0.8)
+
+    with pytest.raises(candidate_search.CursorExpiredError):
+        candidate_search.search_top_candidates(cursor="bm90LWEtdG9rZW46Mg", top_n=2)
+    # A negative offset would slice from the end of the snapshot.
+    token = candidate_search._decode_cursor(page["next_cursor"])[0]
+    with pytest.raises(candidate_search.CursorExpiredError):
+        candidate_search.search_top_candidates(cursor=candidate_search._encode_cursor(token, -2), top_n=2)
+
+
+def test_hybrid_search_fuses_bm25_with_vector_hits(monkeypatch):
+    class NamedCollection(StubCollection):
+        name = settings.milvus_collection
+
+        def query_iterator(self, batch_size=1000, expr=None, output_fields=None):
+            rows = [{"text_chunk": "Ran Kubernetes clusters on AWS", "candidate_name": "Carol"}]
+            batches = iter([rows])
+            return type(
+                "Iterator", (), {"next": lambda _: next(batches, []), "close": lambda _: None}
+            )()
+
+    index = lexical_index.get_lexical_index()
+    index.clear()
+    collection = NamedCollection()
+    monkeypatch.setattr(search, "encode_texts", lambda texts, model=None: [[0.1, 0.2]])
+
+    # First hybrid search rebuilds the index from the collection.
+    results = search.search_candidates(
+        "Kubernetes engineer", top_k=3, mode="hybrid", collection=collection
+    )
+    assert index.ready and len(index) == 1
+    # Each list's top hit gets 1 / (k + 1); the keyword-only chunk now makes the cut.
+    assert dict(results) == {
+        "Alice: Experienced engineer": pytest.approx(1 / 61),
+        "Carol: Ran Kubernetes clusters on AWS": pytest.approx(1 / 61),
+        "Bob: Data scientist": pytest.approx(1 / 62),
+    }
+
+    # Inserts and candidate replacement keep the index in step with the collection.
+    ingestion.insert_chunk_rows(collection, [[0.1]], ["Django and Kubernetes APIs"], ["Dana"])
+    assert [hit["candidate_name"] for hit in index.search("django", 5)] == ["Dana"]
+    ingestion.insert_chunk_rows(collection, [[0.1]], ["Flask services"], ["Dana"], replaced_candidates=["Dana"])
+    assert index.search("django", 5) == []
+    assert [hit["candidate_name"] for hit in index.search("flask", 5)] == ["Dana"]
+
+    vector_only = search.search_candidates("Kubernetes engineer", top_k=3, collection=collection)
+    assert vector_only == [("Alice: Experienced engineer", 0.12), ("Bob: Data scientist", 0.34)]
+    index.clear()
+
+
+def test_lexical_rebuild_leaves_the_index_usable_and_replays_concurrent_inserts():
+    index = lexical_index.get_lexical_index()
+    index.clear()
+    index.add(["Java backend services"], ["Erin"])
+    index.ready = True
+    during = {}
+
+    def search_and_insert():
+        during["hits"] = index.search("java", 5)
+        index.add(["Rust services"], ["Finn"])
+
+    class ScanningCollection(StubCollection):
+        name = settings.milvus_collection
+
+        def query_iterator(self, batch_size=1000, expr=None, output_fields=None):
+            batches = iter([[{"text_chunk": "Ran Kubernetes clusters on AWS", "candidate_name": "Carol"}]])
+
+            def next_batch(_):
+                if "hits" not in during:
+                    # Another request searches and inserts while the scan is running.
+                    worker = threading.Thread(target=search_and_insert)
+                    worker.start()
+                    worker.join(timeout=5)
+                return next(batches, [])
+
+            return type("Iterator", (), {"next": next_batch, "close": lambda _: None})()
+
+    lexical_index.rebuild_lexical_index(ScanningCollection())
+
+    assert [hit["candidate_name"] for hit in during["hits"]] == ["Erin"]
+    assert index.ready and len(index) == 2
+    assert index.search("java", 5) == []
+    assert [hit["candidate_name"] for hit in index.search("kubernetes", 5)] == ["Carol"]
+    assert [hit["candidate_name"] for hit in index.search("rust", 5)] == ["Finn"]
+    index.clear()
+
+
+def test_hybrid_search_falls_back_to_vector_hits_while_the_index_builds(monkeypatch):
+    class NamedCollection(StubCollection):
+        name = settings.milvus_collection
+
+    index = lexical_index.get_lexical_index()
+    index.clear()
+    search_cache.search_results.clear()
+    monkeypatch.setattr(search, "get_collection", lambda: NamedCollection())
+    monkeypatch.setattr(search, "encode_texts", lambda texts, model=None: [[0.1, 0.2]])
+
+    # The startup rebuild holds the build lock for the whole scan.
+    assert lexical_index._build_lock.acquire(timeout=1)
+    try:
+        started = time.perf_counter()
+        results = search.search_candidates("Kubernetes engineer", top_k=3, mode="hybrid")
+        assert time.perf_counter() - started < 1
+    finally:
+        lexical_index._build_lock.release()
+
+    assert results == [("Alice: Experienced engineer", 0.12), ("Bob: Data scientist", 0.34)]
+    assert not index.ready
+    assert search_cache.search_results.stats()["size"] == 0  # not cached as a hybrid result
+
+
+def test_skill_extraction_matches_taxonomy_on_word_boundaries():
+    matcher = skill_extraction.build_matcher(skill_extraction.DEFAULT_TAXONOMY)
+    text = "Senior JavaScript/Python dev: Django REST APIs, K8s on AWS, C++ and ASP.NET. Let's go!"
+
+    assert matcher.find(text) == [
+        "javascript", "python", "django", "rest api", "kubernetes", "aws", "c++", "c#"
+    ]
+    assert skill_extraction.extract_years_experience("7+ years of backend experience") == 7
+    assert skill_extraction.extract_years_experience(
+        "Acme 2014 - 2018\nGlobex 2019 – Present", today=skill_extraction.date(2024, 5, 1)
+    ) == 10
+    assert skill_extraction.extract_years_experience("No dates here") == skill_extraction.UNKNOWN_YEARS
+
+
+def test_filters_are_pushed_into_the_search_expression(monkeypatch):
+    class RecordingCollection(StubCollection):
+        exprs = []
+
+        def search(self, *args, expr=None, **kwargs):
+            RecordingCollection.exprs.append(expr)
+            return super().search(*args, **kwargs)
+
+    filters = search_filters.SearchFilters.from_dict(
+        {"skills_all": ["Python", "AWS"], "min_years": 5, "candidate_names": ['O"Brien']}
+    )
+    search.search_candidates(
+        "backend", top_k=2, filters=filters, collection=RecordingCollection(), model=StubModel()
+    )
+
+    assert RecordingCollection.exprs == [
+        'json_contains_all(skills, ["python", "aws"]) and years_experience >= 5 '
+        'and candidate_name in ["O\\"Brien"]'
+    ]
+    assert filters.matches('O"Brien', ["aws", "python", "go"], 6)
+    assert not filters.matches('O"Brien', ["python"], 6)
+    with pytest.raises(ValueError):
+        search_filters.SearchFilters.from_dict({"skill": ["python"]})
+
+
+def test_filters_coerce_years_and_names_so_both_retrievers_agree():
+    filters = search_filters.SearchFilters.from_dict(
+        {"min_years": "5", "max_years": 8.0, "candidate_names": "Dana"}
+    )
+
+    assert (filters.min_years, filters.max_years, filters.candidate_names) == (5, 8, ["Dana"])
+    assert filters.to_expr() == 'years_experience >= 5 and years_experience <= 8 and candidate_name in ["Dana"]'
+    assert filters.matches("Dana", [], 6)
+    assert not filters.matches("Dana", [], 4)
+    invalid_payloads = [
+        {"min_years": 4.5},
+        {"min_years": "five"},
+        {"max_years": True},
+        {"candidate_names": [{"name": "Dana"}]},
+        {"skills_any": [3]},
+    ]
+    for invalid in invalid_payloads:
+        with pytest.raises(ValueError):
+            search_filters.SearchFilters.from_dict(invalid)
+
+
+def test_ingest_resume_writes_extracted_profile(monkeypatch):
+    names = ("embedding", "text_chunk", "candidate_name", "skills", "years_experience")
+    schema = type("Schema", (), {"fields": [type("Field", (), {"name": name})() for name in names]})
+    stub_collection = StubCollection()
+    stub_collection.schema = schema
+
+    ingestion.ingest_resume(
+        "jane.pdf",
+        collection=stub_collection,
+        model=StubModel(),
+        extracted_text="Python and Kafka engineer with 6 years of experience",
+        flush_policy=flush_policy.FlushPolicy("never"),
+    )
+
+    data, fields = stub_collection.inserted[0]
+    assert fields[-1] == "years_experience"
+    assert data[3] == [["python", "kafka"]]
+    assert data[4] == [6]
+
+
+def test_search_params_follow_the_collection_index_profile():
+    class IndexedCollection:
+        def __init__(self, name, index_type):
+            self.name = name
+            self.indexes = [
+                type("Index", (), {"field_name": "embedding", "params": {"index_type": index_type}})()
+            ]
+
+    hnsw = IndexedCollection("hnsw_resumes", "HNSW")
+    ivf = IndexedCollection("ivf_resumes", "IVF_SQ8")
+
+    assert index_profiles.search_params(hnsw, 10) == {"metric_type": "COSINE", "params": {"ef": 64}}
+    # HNSW needs ef >= limit; recall levels scale the knob; explicit values win.
+    assert index_profiles.search_params(hnsw, 200)["params"] == {"ef": 200}
+    assert index_profiles.search_params(hnsw, 10, recall="high")["params"] == {"ef": 256}
+    assert index_profiles.search_params(ivf, 10, overrides={"nprobe": 64})["params"] == {"nprobe": 64}
+    with pytest.raises(ValueError):
+        index_profiles.search_params(ivf, 10, overrides={"ef": 64})
+
+    assert index_profiles.vector_index_params(index_profiles.get_index_profile("ivf_pq")) == {
+        "index_type": "IVF_PQ",
+        "metric_type": "COSINE",
+        "params": {"nlist": 1024, "m": 48, "nbits": 8},
+    }
+
+
+def test_vector_storage_round_trips_and_schema_follows_storage():
+    from pymilvus import DataType
+
+    from app.services import vector_storage
+
+    vectors = [[0.5, -0.25, 1.0, -2.0, 0.125, 3.0, -0.75, 0.0, 1.5]]
+    half = vector_storage.to_storage(vectors, "float16")[0]
+    assert vector_storage.from_storage(half.tobytes(), "float16").tolist() == vectors[0]
+    brain = vector_storage.to_storage(vectors, "bfloat16")[0]
+    assert len(brain) == 18
+    assert vector_storage.from_storage(brain, "bfloat16").tolist() == pytest.approx(vectors[0], rel=1e-2)
+    # One sign bit per dimension, packed big-endian and padded to whole bytes.
+    assert vector_storage.to_storage(vectors, "binary")[0] == bytes([0b10101100, 0b10000000])
+
+    embedding = next(field for field in milvus_client.build_fields("bfloat16") if field.name == "embedding")
+    assert embedding.dtype == DataType.BFLOAT16_VECTOR
+    assert index_profiles.vector_index_params(storage="binary")["metric_type"] == "HAMMING"
+
+
+def test_binary_storage_search_rescores_coarse_hits(monkeypatch):
+    from pymilvus import DataType
+
+    class BinaryCollection(StubCollection):
+        name = "binary_resumes"
+        schema = type(
+            "Schema", (), {"fields": [type("Field", (), {"name": "embedding", "dtype": DataType.BINARY_VECTOR})()]}
+        )
+
+        def search(self, data, anns_field=None, param=None, limit=None, output_fields=None, **kwargs):
+            self.request = {"data": data, "param": param, "limit": limit}
+            # Hamming order puts the worse chunk first.
+            return [[
+                StubHit({"candidate_name": "Bob", "text_chunk": "far", "skills": []}, 3),
+                StubHit({"candidate_name": "Alice", "text_chunk": "near", "skills": []}, 5),
+            ]]
+
+    class DirectionModel:
+        def encode(self, texts, show_progress_bar=False):
+            table = {"query": [1.0, 0.0], "near": [0.9, 0.1], "far": [0.1, 0.9]}
+            return [table[text] for text in texts]
+
+    monkeypatch.setattr(settings, "embedding_rescore_factor", 4)
+    collection = BinaryCollection()
+    results = search.search_candidates("query", top_k=1, collection=collection, model=DirectionModel())
+
+    assert collection.request["data"] == [bytes([0b10000000])]
+    assert collection.request["limit"] == 4
+    assert collection.request["param"]["metric_type"] == "HAMMING"
+    assert results == [("Alice: near", pytest.approx(0.9 / (0.81 + 0.01) ** 0.5))]
+
+
+class AxisModel:
+    """Embeds each known text as a fixed direction in the 384-dim space."""
+
+    def __init__(self, axes):
+        self.axes = axes
+
+    def encode(self, texts, show_progress_bar=False):
+        vectors = []
+        for text in texts:
+            vector = [0.0] * 384
+            for axis, weight in self.axes[text].items():
+                vector[axis] = weight
+            vectors.append(vector)
+        return vectors
+
+
+def test_local_vector_store_inserts_filters_deletes_and_persists(monkeypatch, tmp_path):
+    from pymilvus import CollectionSchema
+
+    from app.services import vector_store
+
+    schema = CollectionSchema(fields=milvus_client.build_fields("float32"))
+    collection = vector_store.LocalCollection("resumes", schema, path=str(tmp_path))
+    model = AxisModel(
+        {
+            "kafka platform": {0: 1.0},
+            "kafka streams": {0: 0.5, 1: 0.5},
+            "react ui": {1: 1.0},
+            "query": {0: 1.0, 1: 0.2},
+        }
+    )
+    texts = ["kafka platform", "kafka streams", "react ui"]
+    ingestion.insert_chunk_rows(
+        collection,
+        model.encode(texts),
+        texts,
+        ["Ann", "Bo and Co", "Cy"],
+        [["kafka"], ["kafka"], ["react"]],
+        [8, 2, 5],
+    )
+    monkeypatch.setattr(lexical_index, "lexical_index_for", lambda collection: None)
+
+    results = search.search_candidates("query", top_k=3, collection=collection, model=model)
+    assert [label for label, _ in results] == ["Ann: kafka platform", "Bo and Co: kafka streams", "Cy: react ui"]
+    assert results[0][1] == pytest.approx(1 / 1.04**0.5)
+
+    filters = search_filters.SearchFilters(skills_any=["kafka"], min_years=3)
+    assert search.search_candidates("query", collection=collection, model=model, filters=filters) == [
+        ("Ann: kafka platform", pytest.approx(results[0][1]))
+    ]
+
+    # JSON-quoted names containing "and" are not split into clauses.
+    collection.delete('candidate_name == "Bo and Co"')
+    collection.close()
+    reopened = vector_store.LocalCollection("resumes", schema, path=str(tmp_path))
+    assert reopened.num_entities == 2
+    hits = reopened.search([model.encode(["query"])[0]], "embedding", {}, 5, output_fields=["candidate_name"])
+    assert [hit.entity["candidate_name"] for hit in hits[0]] == ["Ann", "Cy"]
+    # Upserts delete replaced rows by primary key.
+    ingestion.delete_rows(reopened, [hit.id for hit in hits[0] if hit.entity["candidate_name"] == "Cy"])
+    assert reopened.num_entities == 1
+
+
+def test_filter_expressions_compile_to_row_predicates():
+    from app.services.vector_store import compile_expr
+
+    row = {"candidate_name": "Ann", "skills": ["python", "aws"], "years_experience": 6}
+    assert compile_expr('json_contains_all(skills, ["python", "aws"]) and years_experience >= 5')(row)
+    assert not compile_expr('candidate_name in ["Bo"] or json_contains(skills, "go")')(row)
+    assert compile_expr('not (years_experience < 5) and candidate_name not in ["Bo"]')(row)
+    assert compile_expr("")(row)
+    with pytest.raises(ValueError):
+        compile_expr("years_experience ~ 5")
+
+
+def test_local_backend_replaces_milvus_connection(monkeypatch):
+    from app.services import vector_store
+
+    monkeypatch.setattr(settings, "vector_backend", "local")
+    monkeypatch.setattr(settings, "local_vector_store_path", None)
+    monkeypatch.setattr(milvus_client, "connect_milvus", lambda alias="default": pytest.fail("connected"))
+    milvus_client.close_milvus()
+
+    collection = milvus_client.get_collection()
+    assert isinstance(collection, vector_store.LocalCollection)
+    assert milvus_client.refresh_collection() is collection
+    assert milvus_client.is_milvus_ready()
+    milvus_client.close_milvus()
+    assert not milvus_client.is_milvus_ready()
+
+
+def test_upload_names_are_reduced_and_zip_members_are_capped(monkeypatch):
+    import io
+    import zipfile
+
+    from app.services import uploads
+
+    assert uploads.upload_filename("C:\\Users\\x\\..\\Ann Lee.pdf") == "Ann Lee.pdf"
+    assert uploads.upload_filename("../\x00..") == "upload.pdf"
+    with pytest.raises(uploads.UploadTooLargeError):
+        uploads.read_limited(io.BytesIO(b"x" * 11), max_bytes=10)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("small.pdf", b"%PDF small")
+        zip_file.writestr("huge.pdf", b"0" * 4096)
+    archive.seek(0)
+    monkeypatch.setattr(settings, "upload_max_bytes", 1024)
+    upload = type("Upload", (), {"filename": "batch.zip", "file": archive})()
+    loaders = dict(bulk_ingestion.upload_pdf_sources([upload]))
+    assert loaders["small.pdf"]() == b"%PDF small"
+    with pytest.raises(uploads.UploadTooLargeError):
+        loaders["huge.pdf"]()
+
+
+class StubExtractor:
+    def __init__(self, name, pages=None, error=None, delay=0.0):
+        self.name = name
+        self.pages = pages or []
+        self.error = error
+        self.delay = delay
+
+    def page_count(self, source):
+        if self.error:
+            raise self.error
+        return len(self.pages)
+
+    def iter_pages(self, source, start=0, stop=None):
+        if self.error:
+            raise self.error
+        for page in self.pages[start:stop]:
+            time.sleep(self.delay)
+            yield page
+
+
+def test_pdf_extraction_falls_back_and_splits_page_ranges(monkeypatch):
+    from app.services import pdf_extraction
+
+    pages = [f"page {index}" for index in range(10)]
+    monkeypatch.setitem(pdf_extraction.PDF_EXTRACTORS, "pypdfium2", StubExtractor("pypdfium2", error=ValueError("bad xref")))
+    monkeypatch.setitem(pdf_extraction.PDF_EXTRACTORS, "pdfminer", StubExtractor("pdfminer", error=ImportError()))
+    monkeypatch.setitem(pdf_extraction.PDF_EXTRACTORS, "pypdf2", StubExtractor("pypdf2", pages))
+
+    assert [extractor.name for extractor in pdf_extraction.extractor_chain("pdfminer")] == ["pdfminer", "pypdf2"]
+    assert pdf_extraction.extract_page_range(b"%PDF", 2, 4, extractor="auto") == ["page 2", "page 3"]
+    assert pdf_extraction.pdf_page_count(b"%PDF", "pypdfium2") == 10
+
+    assert pdf_extraction.page_ranges(10, 4, 16) == [(0, 10)]
+    assert pdf_extraction.page_ranges(40, 4, 16) == [(0, 10), (10, 20), (20, 30), (30, 40)]
+    assert pdf_extraction.page_ranges(20, 4, 16) == [(0, 10), (10, 20)]
+
+    class CountOnly(pdf_extraction.PdfExtractor):
+        name = "count-only"
+
+        def page_count(self, source):
+            return 1
+
+    with pytest.raises(TypeError):
+        CountOnly()  # an incomplete backend fails when it is created, not mid-extraction
+
+
+def test_pdf_pages_stream_lazily_and_resume_on_the_fallback(monkeypatch):
+    from app.services import pdf_extraction
+
+    pages = [f"page {index}" for index in range(6)]
+    produced = []
+
+    class BrokenAfterTwo(StubExtractor):
+        def iter_pages(self, source, start=0, stop=None):
+            for page in self.pages[start:2]:
+                produced.append(page)
+                yield page
+            raise ValueError("bad object stream")
+
+    monkeypatch.setitem(pdf_extraction.PDF_EXTRACTORS, "pypdfium2", BrokenAfterTwo("pypdfium2", pages))
+    monkeypatch.setitem(pdf_extraction.PDF_EXTRACTORS, "pypdf2", StubExtractor("pypdf2", pages))
+    monkeypatch.setattr(settings, "pdf_extractor", "pypdfium2")
+
+    stream = pdf_extraction.iter_pdf_pages(b"%PDF")
+    assert next(stream) == "page 0"
+    assert produced == ["page 0"]  # later pages are not extracted yet
+    assert list(stream) == pages[1:]  # pypdf2 takes over at page 2
+
+    # Stubs do not reach the worker processes, so run the pool tasks on a thread here.
+    monkeypatch.setattr(pdf_extraction, "run_pdf", lambda func, *args: asyncio.to_thread(func, *args))
+    monkeypatch.setattr(settings, "pdf_max_workers", 1)
+    monkeypatch.setattr(pdf_extraction, "iter_chunks", lambda texts: [" / ".join(texts)])
+    chunks = asyncio.run(pdf_extraction.extract_pdf_chunks(b"%PDF"))
+    assert chunks == [" / ".join(pages)]
+
+
+def test_pdf_extraction_stops_at_the_deadline(monkeypatch):
+    from app.services import pdf_extraction
+
+    slow = StubExtractor("pypdf2", [f"page {index}" for index in range(50)], delay=0.01)
+    monkeypatch.setitem(pdf_extraction.PDF_EXTRACTORS, "pypdf2", slow)
+    monkeypatch.setattr(settings, "pdf_extractor", "pypdf2")
+    monkeypatch.setattr(settings, "pdf_extract_timeout_seconds", 0.05)
+    with pytest.raises(pdf_extraction.PdfExtractionTimeoutError):
+        pdf_extraction.extract_text_from_pdf(b"%PDF")
+
+    monkeypatch.setattr(settings, "pdf_extract_timeout_seconds", 0)
+    assert pdf_extraction.extract_text_from_pdf(b"%PDF").startswith("page 0\npage 1")
+
+
+def _tiny_sentence_transformer(path):
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + "senior python kafka java react backend data engineer years of experience with and".split()
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    encoder_dir = path / "encoder"
+    config = BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64)
+    BertModel(config).save_pretrained(encoder_dir)
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(encoder_dir)
+    model = SentenceTransformer(
+        modules=[models.Transformer(str(encoder_dir), max_seq_length=32), models.Pooling(32, "mean"), models.Normalize()]
+    )
+    model.save(str(path / "model"))
+    return model
+
+
+def test_onnx_backend_matches_torch_vectors_without_importing_torch(monkeypatch, tmp_path):
+    import subprocess
+    import sys
+
+    import numpy as np
+
+    pytest.importorskip("onnxruntime")
+    from app.services import onnx_embeddings
+
+    reference_model = _tiny_sentence_transformer(tmp_path)
+    model_name = str(tmp_path / "model")
+    export_dir = onnx_embeddings.export_onnx_model(model_name, onnx_embeddings.onnx_model_dir(model_name, str(tmp_path / "onnx")))
+
+    texts = ["senior python engineer", "kafka", "java react and data backend engineer with years of experience"]
+    reference = reference_model.encode(texts)
+    for quantization, tolerance in (("fp32", 1e-4), ("int8", 0.02)):
+        vectors = onnx_embeddings.OnnxEmbeddingModel(export_dir, quantization, threads=1).encode(texts)
+        assert vectors.shape == reference.shape
+        assert np.all((vectors * reference).sum(axis=1) > 1 - tolerance)
+
+    monkeypatch.setattr(settings, "embedding_backend", "onnx")
+    assert embeddings.embedding_model_key("all-MiniLM") == "all-MiniLM@onnx-int8"
+
+    script = (
+        "import sys\n"
+        "from app.services.embeddings import get_embedding_model\n"
+        "vector = get_embedding_model().encode(['senior python engineer'])[0]\n"
+        "print(len(vector), 'torch' in sys.modules, 'sentence_transformers' in sys.modules)\n"
+    )
+    env = {
+        **os.environ,
+        "EMBEDDING_BACKEND": "onnx",
+        "EMBEDDING_MODEL_NAME": model_name,
+        "EMBEDDING_ONNX_DIR": str(tmp_path / "onnx"),
+    }
+    root = Path(__file__).resolve().parents[1]
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["32", "False", "False"]
+
+
+class KeywordCrossEncoder:
+    """Scores a pair by how many query words the text contains; records batch calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        return [sum(word in text.lower().split() for word in query.lower().split()) for query, text in pairs]
+
+
+def test_reranker_rescores_chunks_and_candidates(monkeypatch):
+    from app.services import reranker
+
+    model = KeywordCrossEncoder()
+    monkeypatch.setattr(reranker, "get_reranker", lambda: model)
+    monkeypatch.setattr(settings, "rerank_top_k", 10)
+    search_cache.search_results.clear()
+
+    class ChunkCollection(StubCollection):
+        def search(self, data, anns_field=None, param=None, limit=None, **kwargs):
+            chunks = [("ann", "java developer", 0.9), ("cy", "python", 0.7), ("bob", "kafka python engineer", 0.5)]
+            return [[
+                StubHit(entity={"candidate_name": name, "text_chunk": text, "skills": []}, distance=score)
+                for name, text, score in chunks[:limit]
+            ]]
+
+    collection = ChunkCollection()
+    plain = search.search_candidates("python kafka", top_k=2, collection=collection, model=StubModel())
+    assert [text for text, _ in plain] == ["ann: java developer", "cy: python"]
+    reranked = search.search_candidates("python kafka", top_k=2, rerank=True, collection=collection, model=StubModel())
+    assert reranked == [("bob: kafka python engineer", 2.0), ("cy: python", 1.0)]
+    assert model.calls == [3]
+
+    monkeypatch.setattr(search, "encode_texts", lambda texts, model=None: [[0.3, 0.4]])
+    monkeypatch.setattr(candidate_search, "get_collection", lambda: collection)
+    page = candidate_search.search_top_candidates("python kafka", top_n=3, rerank=True)
+    assert [item["candidate_name"] for item in page["candidates"]] == ["bob", "cy", "ann"]
+    assert page["candidates"][0]["retrieval_score"] == pytest.approx(0.5)
+
+    assert reranker.score_profiles("python", ["java only", "python and python", ""]) == [0, 1, 0]
+
+
+def test_long_profiles_are_compressed_to_the_token_budget(monkeypatch):
+    from app.services import prompt_compression
+
+    def keyword_vectors(texts, model=None):
+        words = ("django", "python", "kubernetes")
+        return [[float(word in text.lower()) for word in words] + [0.1] for text in texts]
+
+    monkeypatch.setattr(prompt_compression, "encode_texts", keyword_vectors)
+    monkeypatch.setattr(prompt_compression, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(settings, "prompt_compression_chunk_size", 10)
+    monkeypatch.setattr(settings, "prompt_profile_token_budget", 25)
+
+    filler = " ".join(["hobbies include hiking cooking and travel with family"] * 6)
+    profile = f"Built Django REST services in Python for payments {filler} ran Kubernetes clusters with Python tooling"
+    compressed = prompt_compression.compress_profile(profile, "Django and Python backend on Kubernetes")
+    assert compressed.tokens <= 25 < compressed.original_tokens
+    assert compressed.text.startswith("Built Django REST services")
+    assert "Kubernetes clusters" in compressed.text and compressed.text.endswith("Python tooling")
+    assert compressed.text.count("hiking") == 1 and profile.count("hiking") == 6
+    assert (compressed.chunks_kept, compressed.chunks_total) == (3, 7)
+
+    prompts = []
+
+    class RecordingChat(StubChat):
+        def create(self, **kwargs):
+            prompts.append(kwargs["messages"][-1]["content"])
+            completion = StubCompletion('{"match_score": 90}')
+            completion.usage = type("Usage", (), {"prompt_tokens": 80, "completion_tokens": 5, "total_tokens": 85})()
+            return completion
+
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": RecordingChat("")})()})()
+    result = reasoning_engine.analyze_match(profile, "Django and Python backend on Kubernetes", client=client)
+    assert compressed.text in prompts[0] and profile not in prompts[0]
+    assert result["usage"]["total_tokens"] == 85
+    assert result["usage"]["compression"]["saved_tokens"] == compressed.original_tokens - compressed.tokens
+
+
+def test_batch_search_encodes_once_and_searches_many_vectors_per_call(monkeypatch):
+    encoded = []
+
+    def fake_encode(texts, model=None):
+        encoded.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    class MultiVectorCollection(StubCollection):
+        searches = []
+
+        def search(self, data, anns_field=None, param=None, limit=None, **kwargs):
+            MultiVectorCollection.searches.append(len(data))
+            return [
+                [StubHit(entity={"candidate_name": f"len-{int(vector[0])}", "text_chunk": "x", "skills": []}, distance=0.9)]
+                for vector in data
+            ]
+
+    search_cache.search_results.clear()
+    search_cache.query_vectors.clear()
+    monkeypatch.setattr(search, "encode_texts", fake_encode)
+    monkeypatch.setattr(candidate_search, "get_collection", lambda: MultiVectorCollection())
+
+    texts = ["java dev", "python engineer", "go"]
+    pages = candidate_search.search_top_candidates_batch(texts, top_n=1, queries_per_call=2)
+    assert [page["candidates"][0]["candidate_name"] for page in pages] == ["len-8", "len-15", "len-2"]
+    assert encoded == [["java dev", "python engineer"], ["go"]]
+    assert MultiVectorCollection.searches == [2, 1]
+
+    # Rankings are shared with the single-query cache, so a repeat costs no search or encode.
+    again = candidate_search.search_top_candidates_batch(texts, top_n=1, queries_per_call=2)
+    assert [page["candidates"] for page in again] == [page["candidates"] for page in pages]
+    single = candidate_search.search_top_candidates("python  engineer", top_n=1)
+    assert single["candidates"] == pages[1]["candidates"]
+    assert len(encoded) == 2 and MultiVectorCollection.searches == [2, 1]
+
+
+def test_batch_cursors_survive_a_batch_larger_than_the_cursor_cache(monkeypatch):
+    from app.services.caches import TTLCache
+
+    class TwoCandidateCollection(StubCollection):
+        def search(self, data, anns_field=None, param=None, limit=None, **kwargs):
+            return [
+                [
+                    StubHit(entity={"candidate_name": name, "text_chunk": "x", "skills": []}, distance=score)
+                    for name, score in ((f"first-{int(vector[0])}", 0.9), (f"second-{int(vector[0])}", 0.5))
+                ]
+                for vector in data
+            ]
+
+    search_cache.search_results.clear()
+    search_cache.query_vectors.clear()
+    monkeypatch.setattr(candidate_search, "cursor_snapshots", TTLCache(4, 60.0))
+    monkeypatch.setattr(search, "encode_texts", lambda texts, model=None: [[float(index), 1.0] for index, _ in enumerate(texts)])
+    monkeypatch.setattr(candidate_search, "get_collection", lambda: TwoCandidateCollection())
+
+    texts = [f"job {index}" for index in range(10)]
+    pages = candidate_search.search_top_candidates_batch(texts, top_n=1, queries_per_call=10)
+    assert candidate_search.cursor_snapshots.stats()["size"] == 1
+    first = candidate_search.search_top_candidates(cursor=pages[0]["next_cursor"], top_n=1)
+    last = candidate_search.search_top_candidates(cursor=pages[-1]["next_cursor"], top_n=1)
+    assert first["candidates"][0]["candidate_name"] == "second-0"
+    assert last["candidates"][0]["candidate_name"] == "second-9"
+
+
+def test_ingest_queue_retries_recovers_and_survives_reopening(monkeypatch, tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = ingest_queue.IngestQueue(path)
+    first = queue.enqueue("Jane Doe", "Jane Doe.pdf", b"%PDF-1 jane", max_attempts=2)
+    second = queue.enqueue("John Roe", "John Roe.pdf", b"%PDF-1 john", max_attempts=1)
+    assert first.status == "queued" and first.payload is None
+
+    # A retried job goes behind the jobs that were already due.
+    outcomes = iter([RuntimeError("milvus down"), ingest_queue.NonRetryableIngestError("timed out"), 7])
+    handled = []
+
+    def handler(queue, job):
+        handled.append(job.payload)
+        queue.progress(job.id, "indexing")
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(settings, "ingest_retry_backoff_seconds", 0.0)
+    assert ingest_queue.work_once(queue, "host:1", handler)  # Jane: fails, queued for a retry
+    retried = queue.get(first.id)
+    assert (retried.status, retried.stage, retried.attempts) == ("queued", "retrying", 1)
+    assert "milvus down" in retried.error
+    assert ingest_queue.work_once(queue, "host:1", handler)  # John: permanent failure
+    assert ingest_queue.work_once(queue, "host:1", handler)  # Jane again: succeeds
+    assert handled == [b"%PDF-1 jane", b"%PDF-1 john", b"%PDF-1 jane"]
+    assert not ingest_queue.work_once(queue, "host:1", handler)
+
+    done, failed = queue.get(first.id), queue.get(second.id)
+    assert (done.status, done.stage, done.chunks, done.attempts) == ("succeeded", "done", 7, 2)
+    assert done.error is None
+    assert (failed.status, failed.attempts) == ("failed", 1)
+    assert queue.get(second.id, with_payload=True).payload is None
+    assert queue.stats() == {"queued": 0, "running": 0, "succeeded": 1, "failed": 1}
+
+    # A job held by a worker that died mid-attempt is handed out again after a restart.
+    stuck = queue.enqueue("Ann Poe", "Ann Poe.pdf", b"%PDF-1 ann")
+    assert queue.claim("elsewhere:1").id == stuck.id
+    queue.close()
+    reopened = ingest_queue.IngestQueue(path)
+    monkeypatch.setattr(ingest_queue.socket, "gethostname", lambda: "elsewhere")
+    assert reopened.claim("host:2") is None  # still leased
+    assert reopened.requeue_orphaned(alive=lambda pid: False) == 1
+    resumed = reopened.claim("host:2")
+    assert (resumed.id, resumed.attempts, resumed.payload) == (stuck.id, 2, b"%PDF-1 ann")
+    reopened.close()
+
+
+def test_ingest_job_keeps_its_lease_while_a_long_stage_runs(tmp_path):
+    queue = ingest_queue.IngestQueue(str(tmp_path / "queue.sqlite3"))
+    job = queue.enqueue("Jane Doe", "Jane Doe.pdf", b"%PDF-1 jane")
+    stolen = []
+
+    def slow_handler(queue, job):
+        # One stage outlasting the lease several times over, with no progress updates.
+        for _ in range(5):
+            time.sleep(0.1)
+            stolen.append(queue.claim("host:2", lease_seconds=0.15))
+        return 3
+
+    assert ingest_queue.work_once(queue, "host:1", slow_handler, lease_seconds=0.15)
+
+    assert stolen == [None] * 5
+    finished = queue.get(job.id)
+    assert (finished.status, finished.attempts, finished.worker) == ("succeeded", 1, "host:1")
+    queue.close()
+
+
+def test_ingest_workers_run_jobs_in_process(monkeypatch, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    queue = ingest_queue.IngestQueue(str(tmp_path / "queue.sqlite3"))
+    ingested = []
+    pdf_pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(ingest_queue, "get_pdf_executor", lambda: pdf_pool)
+    monkeypatch.setattr(ingest_queue, "find_ingested_document", lambda file_hash: None)
+    monkeypatch.setattr(ingest_queue, "extract_chunks_from_pdf", lambda content: [content.decode(), "skills"])
+
+    def ingest_chunks(candidate_name, text_chunks, *, file_hash):
+        # Runs in this process, so the BM25 index, cache versions and local store see the rows.
+        ingested.append((candidate_name, text_chunks, os.getpid()))
+        return text_chunks
+
+    monkeypatch.setattr(ingest_queue, "ingest_chunks", ingest_chunks)
+    jobs = [queue.enqueue(f"Candidate {index}", f"c{index}.pdf", f"resume {index}".encode()) for index in range(3)]
+    monkeypatch.setattr(settings, "ingest_poll_interval_seconds", 0.01)
+    pool = ingest_queue.IngestWorkerPool(queue, 2)
+    pool.start()
+    deadline = time.time() + 5
+    while queue.stats()["succeeded"] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+    pdf_pool.shutdown()
+
+    assert [queue.get(job.id).chunks for job in jobs] == [2, 2, 2]
+    assert sorted(name for name, _, _ in ingested) == ["Candidate 0", "Candidate 1", "Candidate 2"]
+    assert {pid for _, _, pid in ingested} == {os.getpid()}
+    queue.close()